@@ -0,0 +1,488 @@
+"""Bounded in-memory cache for upstream API responses"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def json_default(value: Any) -> Any:
+    """Expand compact records (anything with `as_dict()`) for the json encoder"""
+    as_dict = getattr(value, "as_dict", None)
+    return as_dict() if as_dict is not None else str(value)
+
+
+def json_fingerprint(value: Any) -> Tuple[int, str]:
+    """Approximate the memory cost of a cached value by its JSON length,
+    and hash the same bytes into a content digest"""
+    try:
+        payload = json.dumps(value, separators=(",", ":"), default=json_default).encode()
+    except (TypeError, ValueError):
+        return 0, ""
+    return len(payload), hashlib.blake2b(payload, digest_size=12).hexdigest()
+
+
+# Snapshot file layout: a header, then one record per entry, most recently
+# used first. Each record is a fixed-size header followed by the key, the
+# namespace and the zlib-compressed JSON value; the CRC covers the value.
+SNAPSHOT_MAGIC = b"CVCACHE1"
+SNAPSHOT_HEADER = struct.Struct("<8sdI")  # magic, created at, entry count
+SNAPSHOT_RECORD = struct.Struct("<IHddII")  # key length, namespace length, ts, ttl, value length, crc32
+
+
+class SnapshotError(Exception):
+    """The snapshot file can't be used at all (wrong format or too old)"""
+
+
+class CacheEntry:
+    __slots__ = ("value", "ts", "ttl", "size", "digest", "namespace", "stale_while_revalidate", "stale_if_error")
+
+    def __init__(
+        self,
+        value: Any,
+        ts: float,
+        ttl: float,
+        size: int,
+        namespace: str,
+        stale_while_revalidate: float = 0,
+        stale_if_error: float = 0,
+        digest: str = "",
+    ):
+        self.value = value
+        self.ts = ts
+        self.ttl = ttl
+        self.size = size
+        self.digest = digest
+        self.namespace = namespace
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+
+    def fresh(self, now: Optional[float] = None) -> bool:
+        """Within the soft TTL: serve as is"""
+        now = time.time() if now is None else now
+        return now - self.ts < self.ttl
+
+    def revalidatable(self, now: Optional[float] = None) -> bool:
+        """Past the soft TTL but still servable while a refresh runs"""
+        now = time.time() if now is None else now
+        return now - self.ts < self.ttl + self.stale_while_revalidate
+
+    def expired(self, now: float) -> bool:
+        """Past the hard TTL: no longer servable even if the upstream fails"""
+        return now - self.ts >= self.ttl + max(self.stale_while_revalidate, self.stale_if_error)
+
+
+class TTLCache:
+    """LRU cache with per-namespace TTLs and an entry count / byte budget.
+
+    Each entry has a soft TTL (its namespace TTL) and a hard TTL that adds
+    the larger of the `stale_while_revalidate` and `stale_if_error` windows;
+    `lookup()` returns stale entries up to the hard TTL so callers can
+    decide whether to refresh in the background or fall back on errors.
+
+    Expired entries are dropped lazily on read and by `sweep()`, which
+    `run_sweeper()` calls periodically. When either budget is exceeded the
+    least recently used entries are evicted.
+
+    `compact`, if given, converts values to a smaller in-memory form as they
+    are stored; it must return something callers can use in their place.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        default_ttl: float = 60 * 60,
+        namespace_ttls: Optional[Dict[str, float]] = None,
+        stale_while_revalidate: float = 0,
+        stale_if_error: float = 0,
+        fingerprint: Callable[[Any], Tuple[int, str]] = json_fingerprint,
+        compact: Optional[Callable[[Any], Any]] = None,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.namespace_ttls = dict(namespace_ttls or {})
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+        self.fingerprint = fingerprint
+        self.compact = compact
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and not entry.expired(time.time())
+
+    def ttl_for(self, namespace: str) -> float:
+        return self.namespace_ttls.get(namespace, self.default_ttl)
+
+    def peek(self, key: str) -> Optional[CacheEntry]:
+        """Return a servable entry without touching LRU order or hit counters"""
+        entry = self._entries.get(key)
+        return entry if entry is not None and not entry.expired(time.time()) else None
+
+    def lookup(self, key: str) -> Optional[CacheEntry]:
+        """Return the entry (fresh or stale) and mark it most recently used"""
+        entry = self._entries.get(key)
+        now = time.time()
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expired(now):
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        if entry.fresh(now):
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a fresh value, else None"""
+        entry = self.lookup(key)
+        return entry.value if entry is not None and entry.fresh() else None
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        namespace: str = "default",
+        ttl: Optional[float] = None,
+        ts: Optional[float] = None,
+    ) -> Optional[CacheEntry]:
+        """Store a value, evicting least recently used entries if over budget.
+
+        `ts` backdates the entry, e.g. when it is copied from another tier.
+        """
+        if key in self._entries:
+            self._remove(key)
+        size, digest = self.fingerprint(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            logger.warning(f"Not caching {key}: {size} bytes exceeds the cache budget")
+            return None
+        ttl = self.ttl_for(namespace) if ttl is None else ttl
+        entry = CacheEntry(
+            self.compact(value) if self.compact is not None else value,
+            time.time() if ts is None else ts,
+            ttl,
+            size,
+            namespace,
+            self.stale_while_revalidate,
+            self.stale_if_error,
+            digest,
+        )
+        self._entries[key] = entry
+        self.bytes += size
+        self._evict()
+        return entry
+
+    def delete(self, key: str) -> bool:
+        if key not in self._entries:
+            return False
+        self._remove(key)
+        return True
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop every expired entry, returning how many were removed"""
+        now = time.time() if now is None else now
+        expired = [key for key, entry in self._entries.items() if entry.expired(now)]
+        for key in expired:
+            self._remove(key)
+        self.expirations += len(expired)
+        return len(expired)
+
+    async def run_sweeper(self, interval: float):
+        """Sweep expired entries every `interval` seconds until cancelled"""
+        while True:
+            await asyncio.sleep(interval)
+            removed = self.sweep()
+            if removed:
+                logger.info(f"Cache sweep removed {removed} expired entries")
+
+    def items_by_recency(self) -> List[Tuple[str, CacheEntry]]:
+        """Servable entries, most recently used first"""
+        now = time.time()
+        return [(key, entry) for key, entry in reversed(self._entries.items()) if not entry.expired(now)]
+
+    def load_snapshot(self, path: str, max_age: float, budget: float) -> Dict[str, Any]:
+        """Restore entries written by `write_snapshot`, keeping their timestamps.
+
+        Records are read from a memory map, most recently used first, until
+        `budget` seconds have passed. Expired records are skipped, a record
+        failing its CRC is dropped and a truncated file is read up to the cut.
+        Raises SnapshotError if the file isn't a snapshot or is older than
+        `max_age` seconds, and OSError if it can't be read.
+        """
+        started = time.perf_counter()
+        stats = {"loaded": 0, "expired": 0, "corrupt": 0, "over_budget": 0}
+        loaded = []
+        if os.path.getsize(path) < SNAPSHOT_HEADER.size:
+            raise SnapshotError("file is truncated")
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, created_at, count = SNAPSHOT_HEADER.unpack_from(mm, 0)
+            if magic != SNAPSHOT_MAGIC:
+                raise SnapshotError("not a cache snapshot")
+            if time.time() - created_at > max_age:
+                raise SnapshotError(f"snapshot is {time.time() - created_at:.0f}s old")
+            offset = SNAPSHOT_HEADER.size
+            for i in range(count):
+                if time.perf_counter() - started > budget:
+                    stats["over_budget"] = count - i
+                    break
+                if offset + SNAPSHOT_RECORD.size > len(mm):
+                    stats["corrupt"] += 1
+                    break
+                key_len, ns_len, ts, ttl, value_len, crc = SNAPSHOT_RECORD.unpack_from(mm, offset)
+                offset += SNAPSHOT_RECORD.size
+                end = offset + key_len + ns_len + value_len
+                if end > len(mm):
+                    stats["corrupt"] += 1
+                    break
+                key = mm[offset:offset + key_len].decode()
+                namespace = mm[offset + key_len:offset + key_len + ns_len].decode()
+                payload = mm[end - value_len:end]
+                offset = end
+                entry = CacheEntry(None, ts, ttl, 0, namespace, self.stale_while_revalidate, self.stale_if_error)
+                if entry.expired(time.time()):
+                    stats["expired"] += 1
+                    continue
+                try:
+                    if zlib.crc32(payload) != crc:
+                        raise ValueError("CRC mismatch")
+                    value = json.loads(zlib.decompress(payload))
+                except (ValueError, zlib.error):
+                    stats["corrupt"] += 1
+                    continue
+                if self.set(key, value, namespace, ttl, ts=ts) is not None:
+                    loaded.append(key)
+        # Written most recent first, so replay the order to rebuild the LRU
+        for key in reversed(loaded):
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        stats["loaded"] = len(loaded)
+        stats["load_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.stale_hits + self.misses
+        namespaces: Dict[str, int] = {}
+        for entry in self._entries.values():
+            namespaces[entry.namespace] = namespaces.get(entry.namespace, 0) + 1
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else None,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "namespaces": namespaces,
+        }
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+
+    def _evict(self):
+        while self._entries and (
+            (self.max_entries is not None and len(self._entries) > self.max_entries)
+            or (self.max_bytes is not None and self.bytes > self.max_bytes)
+        ):
+            key, entry = self._entries.popitem(last=False)
+            self.bytes -= entry.size
+            self.evictions += 1
+
+
+def write_snapshot(path: str, entries: List[Tuple[str, CacheEntry]], compress_level: int = 1) -> Dict[str, Any]:
+    """Write entries (see `TTLCache.items_by_recency`) to a snapshot file.
+
+    The file is written to a temp file of its own next to `path` and moved
+    into place, so a crash mid-write leaves the previous snapshot intact and
+    workers sharing `path` never write into each other's file. Safe to run
+    in a thread.
+    """
+    started = time.perf_counter()
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f"{os.path.basename(path)}.", suffix=".tmp", dir=os.path.dirname(path) or "."
+    )
+    try:
+        count, size = _write_snapshot_file(fd, entries, compress_level)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return {"entries": count, "bytes": size, "save_ms": round((time.perf_counter() - started) * 1000, 1)}
+
+
+def _write_snapshot_file(fd: int, entries: List[Tuple[str, CacheEntry]], compress_level: int) -> Tuple[int, int]:
+    count = 0
+    with os.fdopen(fd, "wb") as f:
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, time.time(), 0))
+        for key, entry in entries:
+            try:
+                value = json.dumps(entry.value, separators=(",", ":"), default=json_default).encode()
+            except (TypeError, ValueError):
+                continue
+            payload = zlib.compress(value, compress_level)
+            key_bytes, ns_bytes = key.encode(), entry.namespace.encode()
+            f.write(SNAPSHOT_RECORD.pack(
+                len(key_bytes), len(ns_bytes), entry.ts, entry.ttl, len(payload), zlib.crc32(payload)
+            ))
+            f.write(key_bytes)
+            f.write(ns_bytes)
+            f.write(payload)
+            count += 1
+        size = f.tell()
+        f.seek(0)
+        f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, time.time(), count))
+        f.flush()
+        os.fsync(f.fileno())
+    return count, size
+
+
+class MongoCacheTier:
+    """Shared second-level cache in a MongoDB collection.
+
+    Sits behind a per-process TTLCache so that workers and replicas share
+    upstream responses and restarts don't start cold. Payloads are stored
+    as zlib-compressed JSON and removed by a TTL index once past their hard
+    TTL; soft expiry is judged from the stored timestamp, as in L1.
+    """
+
+    def __init__(self, collection, compress_level: int = 6):
+        self.collection = collection
+        self.compress_level = compress_level
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def encode(self, value: Any) -> bytes:
+        return zlib.compress(
+            json.dumps(value, separators=(",", ":"), default=json_default).encode(), self.compress_level
+        )
+
+    def decode(self, payload: bytes) -> Any:
+        return json.loads(zlib.decompress(payload))
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored document for a key, or None"""
+        try:
+            doc = await self.collection.find_one({"_id": key})
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"L2 cache read failed for {key}: {e}")
+            return None
+        if doc is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return doc
+
+    async def set(self, key: str, entry: CacheEntry):
+        """Write an L1 entry through to the shared tier"""
+        hard_ttl = entry.ttl + max(entry.stale_while_revalidate, entry.stale_if_error)
+        doc = {
+            "ns": entry.namespace,
+            "ts": entry.ts,
+            "ttl": entry.ttl,
+            "v": self.encode(entry.value),
+            "expires_at": datetime.fromtimestamp(entry.ts, timezone.utc) + timedelta(seconds=hard_ttl),
+        }
+        try:
+            await self.collection.replace_one({"_id": key}, doc, upsert=True)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"L2 cache write failed for {key}: {e}")
+
+    async def fill(self, cache: TTLCache, key: str) -> Optional[CacheEntry]:
+        """Copy a still-servable L2 document into L1 and return its entry"""
+        doc = await self.get(key)
+        if doc is None:
+            return None
+        entry = cache.set(key, self.decode(doc["v"]), doc["ns"], doc["ttl"], ts=doc["ts"])
+        if entry is None or entry.expired(time.time()):
+            cache.delete(key)
+            return None
+        return entry
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "errors": self.errors}
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight task.
+
+    The first caller for a key starts the task; everyone arriving while it
+    runs awaits the same result or exception. A cancelled caller only stops
+    waiting, and the task itself is cancelled once no caller is left.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t: self._finish(key, t))
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._calls.get(key) is task and self._waiters[key] == 1 and not task.done():
+                self._forget(key)
+                task.cancel()
+            raise
+        finally:
+            if key in self._waiters and self._calls.get(key) is task:
+                self._waiters[key] -= 1
+
+    def _forget(self, key: str):
+        self._calls.pop(key, None)
+        self._waiters.pop(key, None)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._calls.get(key) is task:
+            self._forget(key)
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
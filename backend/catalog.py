@@ -0,0 +1,232 @@
+"""Local mirror of the TMDB catalog, built from the daily ID export files"""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from compact import MEDIA_ITEM_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# TMDB names its exports movie_ids_MM_DD_YYYY.json.gz and tv_series_ids_MM_DD_YYYY.json.gz
+EXPORT_PREFIXES = {"movie": "movie_ids", "tv": "tv_series_ids"}
+EXPORT_NAME = re.compile(r"(?P<prefix>[a-z_]+)_(?P<month>\d\d)_(?P<day>\d\d)_(?P<year>\d{4})\.json\.gz")
+# Catalog documents read back as normalized list items
+ITEM_PROJECTION = {"_id": 0, **{name: 1 for name in MEDIA_ITEM_FIELDS}}
+
+
+def latest_export(directory: str, media_type: str) -> Optional[Tuple[str, date]]:
+    """The newest export file for a media type in `directory` and its date, or None"""
+    found = []
+    for name in os.listdir(directory):
+        match = EXPORT_NAME.fullmatch(name)
+        if match and match["prefix"] == EXPORT_PREFIXES[media_type]:
+            found.append((date(int(match["year"]), int(match["month"]), int(match["day"])), name))
+    if not found:
+        return None
+    export_date, name = max(found)
+    return os.path.join(directory, name), export_date
+
+
+def read_export(path: str, batch_size: int) -> Iterator[Tuple[List[Dict], int]]:
+    """Stream a gzipped JSON-lines export as (records, skipped lines) batches.
+
+    Lines that aren't JSON objects with an id are skipped and counted rather
+    than failing the whole file; a truncated gzip stream raises EOFError.
+    """
+    batch, skipped = [], 0
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(record, dict) or not isinstance(record.get("id"), int):
+                skipped += 1
+                continue
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch, skipped
+                batch, skipped = [], 0
+    if batch or skipped:
+        yield batch, skipped
+
+
+class CatalogStore:
+    """Catalog documents in MongoDB, one per (media_type, id).
+
+    Export records create bare documents (original title, popularity, adult
+    flag) waiting for enrichment; `enriched_at` is None until the detail
+    fields have been fetched and is reset when TMDB reports a change.
+    Documents are shaped like a normalized list item, so enriched ones can
+    be served as list results directly. Sync progress per media type
+    (export date, changes fetched through) lives in `state`.
+    """
+
+    def __init__(self, collection, state):
+        self.collection = collection
+        self.state = state
+
+    async def ensure_indexes(self):
+        await self.collection.create_index(
+            [("media_type", ASCENDING), ("id", ASCENDING)], unique=True, name="catalog_title_unique"
+        )
+        await self.collection.create_index(
+            [("enriched_at", ASCENDING), ("popularity", DESCENDING)], name="catalog_enrich_queue"
+        )
+        await self.collection.create_index(
+            [("media_type", ASCENDING), ("popularity", DESCENDING)], name="catalog_popular"
+        )
+        await self.collection.create_index(
+            [("media_type", ASCENDING), ("vote_average", DESCENDING)], name="catalog_top_rated"
+        )
+        await self.collection.create_index(
+            [("title", "text"), ("original_title", "text")], name="catalog_search", default_language="none"
+        )
+
+    async def get_state(self, media_type: str) -> Dict[str, Any]:
+        return await self.state.find_one({"_id": media_type}) or {"_id": media_type}
+
+    async def set_state(self, media_type: str, **fields):
+        await self.state.update_one({"_id": media_type}, {"$set": fields}, upsert=True)
+
+    async def ingest(self, path: str, media_type: str, export_date: date, batch_size: int) -> Dict[str, int]:
+        """Bulk-upsert an export file in batches of `batch_size`.
+
+        The file is read off the event loop one batch at a time. Documents
+        are stamped with the export date so titles TMDB has since dropped
+        can be pruned afterwards.
+        """
+        stats = {"read": 0, "skipped": 0, "upserted": 0, "modified": 0, "batches": 0}
+        stamp = export_date.isoformat()
+        batches = read_export(path, batch_size)
+        while True:
+            batch = await asyncio.to_thread(next, batches, None)
+            if batch is None:
+                break
+            records, skipped = batch
+            stats["skipped"] += skipped
+            if not records:
+                continue
+            operations = [
+                UpdateOne(
+                    {"media_type": media_type, "id": record["id"]},
+                    {
+                        "$set": {
+                            "original_title": record.get("original_title") or record.get("original_name"),
+                            "popularity": record.get("popularity"),
+                            "adult": bool(record.get("adult", False)),
+                            "export_date": stamp,
+                        },
+                        "$setOnInsert": {"enriched_at": None},
+                    },
+                    upsert=True,
+                )
+                for record in records
+            ]
+            result = await self.collection.bulk_write(operations, ordered=False)
+            stats["read"] += len(records)
+            stats["upserted"] += result.upserted_count
+            stats["modified"] += result.modified_count
+            stats["batches"] += 1
+        return stats
+
+    async def prune(self, media_type: str, export_date: date) -> int:
+        """Delete titles missing from the export of `export_date`"""
+        result = await self.collection.delete_many(
+            {"media_type": media_type, "export_date": {"$lt": export_date.isoformat()}}
+        )
+        return result.deleted_count
+
+    async def mark_changed(self, media_type: str, ids: List[int]) -> int:
+        """Queue changed titles for re-enrichment, adding ones not seen yet"""
+        if not ids:
+            return 0
+        operations = [
+            UpdateOne(
+                {"media_type": media_type, "id": tmdb_id},
+                {"$set": {"enriched_at": None}, "$setOnInsert": {"popularity": 0}},
+                upsert=True,
+            )
+            for tmdb_id in ids
+        ]
+        result = await self.collection.bulk_write(operations, ordered=False)
+        return result.modified_count + result.upserted_count
+
+    async def pending(self, limit: int, stale_before: datetime) -> List[Tuple[str, int]]:
+        """(media_type, id) of titles never enriched or enriched before
+        `stale_before`, most popular first"""
+        cursor = self.collection.find(
+            {"adult": {"$ne": True}, "$or": [{"enriched_at": None}, {"enriched_at": {"$lt": stale_before}}]},
+            {"_id": 0, "media_type": 1, "id": 1},
+        ).sort("popularity", DESCENDING).limit(limit)
+        return [(doc["media_type"], doc["id"]) async for doc in cursor]
+
+    async def save(self, media_type: str, tmdb_id: int, fields: Dict[str, Any]):
+        await self.collection.update_one(
+            {"media_type": media_type, "id": tmdb_id},
+            {"$set": {**fields, "enriched_at": datetime.now(timezone.utc)}},
+            upsert=True,
+        )
+
+    async def remove(self, media_type: str, tmdb_id: int):
+        await self.collection.delete_one({"media_type": media_type, "id": tmdb_id})
+
+    async def page(self, filters: Dict[str, Any], sort: str, page: int, size: int,
+                   total: Optional[int] = None, max_total: Optional[int] = None) -> Tuple[List[Dict], int]:
+        """One page of enriched titles matching `filters`, highest `sort` first,
+        and the number of matching titles.
+
+        The count is skipped when the caller already knows `total`, and stops
+        at `max_total` otherwise.
+        """
+        query = {**filters, "enriched_at": {"$ne": None}, "adult": {"$ne": True}}
+        if total is None:
+            total = await self.collection.count_documents(query, **({"limit": max_total} if max_total else {}))
+        cursor = self.collection.find(query, ITEM_PROJECTION).sort([(sort, DESCENDING), ("id", ASCENDING)])
+        return await cursor.skip((page - 1) * size).limit(size).to_list(size), total
+
+    def top_titles(self, limit: int):
+        """Cursor over up to `limit` enriched titles as list items, most popular first"""
+        query = {"enriched_at": {"$ne": None}, "adult": {"$ne": True}}
+        return self.collection.find(query, ITEM_PROJECTION).sort("popularity", DESCENDING).limit(limit)
+
+    def enriched_titles(self, fields: Iterable[str]):
+        """Cursor over every enriched title with the given fields"""
+        query = {"enriched_at": {"$ne": None}, "adult": {"$ne": True}}
+        return self.collection.find(query, {"_id": 0, **{name: 1 for name in fields}})
+
+    async def find_titles(self, titles: Iterable[Tuple[str, int]], fields: Iterable[str]) -> Dict[Tuple[str, int], Dict]:
+        """The given fields of those enriched titles that are in the catalog, by (media_type, id)"""
+        by_type: Dict[str, List[int]] = {}
+        for media_type, tmdb_id in titles:
+            by_type.setdefault(media_type, []).append(tmdb_id)
+        projection = {"_id": 0, "id": 1, **{name: 1 for name in fields}}
+        found = {}
+        for media_type, ids in by_type.items():
+            query = {"media_type": media_type, "id": {"$in": ids}, "enriched_at": {"$ne": None}}
+            async for doc in self.collection.find(query, projection):
+                found[(media_type, doc["id"])] = doc
+        return found
+
+    async def counts(self) -> Dict[str, Dict[str, int]]:
+        """Titles and enriched titles per media type"""
+        pipeline = [
+            {"$group": {
+                "_id": "$media_type",
+                "titles": {"$sum": 1},
+                "enriched": {"$sum": {"$cond": [{"$ifNull": ["$enriched_at", False]}, 1, 0]}},
+            }},
+        ]
+        docs = await self.collection.aggregate(pipeline).to_list(None)
+        return {doc["_id"]: {"titles": doc["titles"], "enriched": doc["enriched"]} for doc in docs}
@@ -0,0 +1,117 @@
+"""Compact in-memory records for cached catalog data"""
+
+import sys
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Optional, Tuple
+
+EMPTY: Tuple = ()
+# Genre id combinations repeat across titles, so equal tuples are shared
+_genre_ids: Dict[Tuple[int, ...], Tuple[int, ...]] = {}
+MAX_INTERNED_GENRE_IDS = 10000
+
+
+def _intern(value: Any) -> Any:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _intern_genre_ids(genre_ids) -> Tuple[int, ...]:
+    key = tuple(genre_ids or EMPTY)
+    shared = _genre_ids.get(key)
+    if shared is None:
+        if len(_genre_ids) >= MAX_INTERNED_GENRE_IDS:
+            return key
+        shared = _genre_ids[key] = key
+    return shared
+
+
+@dataclass(frozen=True, slots=True)
+class MediaItem:
+    """A normalized movie/TV item (see `normalize_media_item` in server.py).
+
+    Slotted, with interned short strings and shared genre id tuples, this
+    takes a fraction of the memory of the equivalent dict. orjson serializes
+    it natively, field order matching the dict's key order, and it supports
+    read-only mapping access (`item["title"]`, `item.get()`, `{**item}`) so
+    cached values can be used as the dicts they replace.
+    """
+    id: Optional[int]
+    media_type: str
+    title: Optional[str]
+    original_title: Optional[str]
+    overview: Optional[str]
+    poster_path: Optional[str]
+    backdrop_path: Optional[str]
+    release_date: Optional[str]
+    vote_average: Optional[float]
+    vote_count: Optional[int]
+    popularity: Optional[float]
+    genre_ids: Tuple[int, ...]
+    genres: Tuple[Dict, ...]
+
+    @classmethod
+    def from_dict(cls, item: Dict) -> "MediaItem":
+        return cls(
+            item["id"],
+            _intern(item["media_type"]),
+            item["title"],
+            # Usually equal to the title, in which case one string is kept
+            item["title"] if item["original_title"] == item["title"] else item["original_title"],
+            item["overview"],
+            item["poster_path"],
+            item["backdrop_path"],
+            _intern(item["release_date"]),
+            item["vote_average"],
+            item["vote_count"],
+            item["popularity"],
+            _intern_genre_ids(item["genre_ids"]),
+            tuple(item["genres"]) if item["genres"] else EMPTY,
+        )
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return getattr(self, key, default)
+
+    def keys(self):
+        return MEDIA_ITEM_FIELDS
+
+    def as_dict(self) -> Dict[str, Any]:
+        """The plain dict this record replaces"""
+        item = {name: getattr(self, name) for name in MEDIA_ITEM_FIELDS}
+        item["genre_ids"] = list(self.genre_ids)
+        item["genres"] = list(self.genres)
+        return item
+
+
+MEDIA_ITEM_FIELDS = tuple(f.name for f in fields(MediaItem))
+MEDIA_ITEM_KEYS = frozenset(MEDIA_ITEM_FIELDS)
+
+
+def compact_value(value: Any) -> Any:
+    """Copy a JSON value with every normalized media item dict replaced by a MediaItem"""
+    if isinstance(value, dict):
+        if value.keys() == MEDIA_ITEM_KEYS:
+            return MediaItem.from_dict(value)
+        return {key: compact_value(v) for key, v in value.items()}
+    if isinstance(value, list):
+        return [compact_value(v) for v in value]
+    return value
+
+
+def iter_media_items(value: Any):
+    """Every normalized media item (dict or MediaItem) inside a JSON value"""
+    if isinstance(value, MediaItem):
+        yield value
+    elif isinstance(value, dict):
+        if value.keys() == MEDIA_ITEM_KEYS:
+            yield value
+        else:
+            for v in value.values():
+                yield from iter_media_items(v)
+    elif isinstance(value, list):
+        for v in value:
+            yield from iter_media_items(v)
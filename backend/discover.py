@@ -0,0 +1,196 @@
+"""Columnar in-memory table answering discover queries locally"""
+
+import math
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+MEDIA_TYPES = ("movie", "tv")
+# TMDB sort_by values the table can evaluate, and the column each sorts on
+SORT_COLUMNS = {
+    "popularity": "popularity",
+    "vote_average": "vote_average",
+    "vote_count": "vote_count",
+    "primary_release_date": "release_date",
+    "first_air_date": "release_date",
+    "release_date": "release_date",
+}
+
+
+def parse_ids(value: Optional[str]) -> Tuple[List[int], bool]:
+    """TMDB id list syntax: "28,12" means all of them, "28|12" any of them.
+
+    Raises ValueError for a part that isn't an id.
+    """
+    if not value:
+        return [], False
+    any_of = "|" in value
+    return [int(part) for part in value.replace("|", ",").split(",") if part.strip()], any_of
+
+
+def date_number(release_date: Optional[str]) -> int:
+    """2024-05-17 -> 20240517, 0 when unknown"""
+    digits = (release_date or "").replace("-", "")
+    return int(digits) if len(digits) == 8 and digits.isdigit() else 0
+
+
+class DiscoverTable:
+    """Known titles as NumPy columns, one row per title.
+
+    Genres are a 64-bit mask per row (bit positions assigned per genre id as
+    they're first seen), languages are small integer codes, and streaming
+    providers are posting lists of rows per (region, provider id) since a
+    title streams on only a few of the hundreds of providers. A query builds
+    one boolean mask from vectorized comparisons, then sorts only the rows it
+    needs for the requested page. The table is immutable; it is rebuilt and
+    swapped when the catalog changes.
+    """
+
+    def __init__(self, docs: Iterable[Dict[str, Any]], item=lambda doc: doc):
+        """Build from catalog documents; `item(doc)` is what a result row returns"""
+        self.items: List[Any] = []
+        self.genre_bits: Dict[int, int] = {}
+        self.languages: Dict[str, int] = {}
+        postings: Dict[Tuple[str, int], List[int]] = {}
+        columns: Dict[str, List] = {name: [] for name in (
+            "id", "media", "genres", "year", "release_date", "vote_average", "vote_count", "popularity", "language"
+        )}
+        for doc in docs:
+            row = len(self.items)
+            mask = 0
+            for genre_id in doc.get("genre_ids") or ():
+                bit = self.genre_bits.setdefault(genre_id, len(self.genre_bits))
+                if bit < 64:
+                    mask |= 1 << bit
+            release_date = date_number(doc.get("release_date"))
+            columns["id"].append(doc["id"])
+            columns["media"].append(MEDIA_TYPES.index(doc["media_type"]))
+            columns["genres"].append(mask)
+            columns["year"].append(release_date // 10000)
+            columns["release_date"].append(release_date)
+            columns["vote_average"].append(doc.get("vote_average") or 0.0)
+            columns["vote_count"].append(doc.get("vote_count") or 0)
+            columns["popularity"].append(doc.get("popularity") or 0.0)
+            language = doc.get("original_language") or ""
+            columns["language"].append(self.languages.setdefault(language, len(self.languages)))
+            for region, provider_ids in (doc.get("providers") or {}).items():
+                for provider_id in provider_ids:
+                    postings.setdefault((region, provider_id), []).append(row)
+            self.items.append(item(doc))
+
+        self.id = np.array(columns["id"], dtype=np.int64)
+        self.media = np.array(columns["media"], dtype=np.int8)
+        self.genres = np.array(columns["genres"], dtype=np.uint64)
+        self.year = np.array(columns["year"], dtype=np.int16)
+        self.release_date = np.array(columns["release_date"], dtype=np.int32)
+        self.vote_average = np.array(columns["vote_average"], dtype=np.float32)
+        self.vote_count = np.array(columns["vote_count"], dtype=np.int32)
+        self.popularity = np.array(columns["popularity"], dtype=np.float32)
+        self.language = np.array(columns["language"], dtype=np.int16)
+        self.providers = {key: np.array(rows, dtype=np.int32) for key, rows in postings.items()}
+        self.counts = {media_type: int(np.count_nonzero(self.media == i)) for i, media_type in enumerate(MEDIA_TYPES)}
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def genre_mask(self, genre_ids: List[int]) -> Optional[int]:
+        """Bit mask of the genres, None if one has never been seen"""
+        mask = 0
+        for genre_id in genre_ids:
+            bit = self.genre_bits.get(genre_id)
+            if bit is None or bit >= 64:
+                return None
+            mask |= 1 << bit
+        return mask
+
+    def match(
+        self,
+        media_type: str,
+        with_genres: Optional[str] = None,
+        year: Optional[int] = None,
+        vote_average_gte: Optional[float] = None,
+        vote_average_lte: Optional[float] = None,
+        vote_count_gte: Optional[int] = None,
+        with_original_language: Optional[str] = None,
+        with_watch_providers: Optional[str] = None,
+        watch_region: str = "US",
+    ) -> np.ndarray:
+        """Boolean mask of the rows passing every filter (TMDB discover semantics).
+        Malformed id lists match nothing."""
+        mask = self.media == MEDIA_TYPES.index(media_type)
+        try:
+            genre_ids, any_genre = parse_ids(with_genres)
+            provider_ids, any_provider = parse_ids(with_watch_providers)
+        except ValueError:
+            return np.zeros(len(self), dtype=bool)
+        if genre_ids:
+            bits = self.genre_mask(genre_ids) if not any_genre else \
+                self.genre_mask([g for g in genre_ids if g in self.genre_bits])
+            if bits is None or (any_genre and not bits):
+                return np.zeros(len(self), dtype=bool)
+            bits = np.uint64(bits)
+            if any_genre:
+                mask &= (self.genres & bits) != 0
+            else:
+                mask &= (self.genres & bits) == bits
+        if year:
+            mask &= self.year == year
+        if vote_average_gte is not None:
+            mask &= self.vote_average >= vote_average_gte
+        if vote_average_lte is not None:
+            mask &= self.vote_average <= vote_average_lte
+        if vote_count_gte is not None:
+            mask &= self.vote_count >= vote_count_gte
+        if with_original_language:
+            code = self.languages.get(with_original_language)
+            if code is None:
+                return np.zeros(len(self), dtype=bool)
+            mask &= self.language == code
+        if provider_ids:
+            streams = np.zeros(len(self), dtype=bool)
+            for i, provider_id in enumerate(provider_ids):
+                rows = self.providers.get((watch_region.upper(), provider_id))
+                provider_mask = np.zeros(len(self), dtype=bool)
+                if rows is not None:
+                    provider_mask[rows] = True
+                if any_provider or i == 0:
+                    streams |= provider_mask
+                else:
+                    streams &= provider_mask
+            mask &= streams
+        return mask
+
+    def page(self, mask: np.ndarray, sort_by: str, page: int, size: int) -> Tuple[List[Any], int]:
+        """The requested page of matching rows in `sort_by` order ("column.desc"/"column.asc"),
+        and the number of matches"""
+        field, _, direction = (sort_by or "popularity.desc").partition(".")
+        rows = np.flatnonzero(mask)
+        total = len(rows)
+        start = (page - 1) * size
+        if start >= total:
+            return [], total
+        keys = getattr(self, SORT_COLUMNS[field])[rows].astype(np.float64)
+        if direction != "asc":
+            keys = -keys
+        # Only the rows up to the end of the page (and any tied with the last) need ordering
+        end = min(start + size, total)
+        if end < total:
+            head = np.flatnonzero(keys <= np.partition(keys, end - 1)[end - 1])
+        else:
+            head = np.arange(total)
+        # Ties (and so page boundaries) are broken by TMDB id for a stable order
+        ordered = head[np.lexsort((self.id[rows[head]], keys[head]))]
+        return [self.items[row] for row in rows[ordered[start:end]]], total
+
+    def discover(self, media_type: str, sort_by: Optional[str], page: int, size: int,
+                 **filters) -> Optional[Dict[str, Any]]:
+        """A discover response page, or None if `sort_by` can't be evaluated locally"""
+        if media_type not in MEDIA_TYPES or (sort_by or "popularity.desc").partition(".")[0] not in SORT_COLUMNS:
+            return None
+        results, total = self.page(self.match(media_type, **filters), sort_by, page, size)
+        return {
+            "results": results,
+            "page": page,
+            "total_pages": math.ceil(total / size),
+            "total_results": total,
+        }
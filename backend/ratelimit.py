@@ -0,0 +1,186 @@
+"""Client-side rate limiting for upstream API calls"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+
+class Priority(IntEnum):
+    """Lower values are served first"""
+    INTERACTIVE = 0  # details and search a user is waiting on
+    NORMAL = 1  # list rows
+    BACKGROUND = 2  # cache warming and prefetch
+
+
+class RateLimitExceeded(Exception):
+    """The upstream queue is full; the call was shed instead of queued"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def take(self) -> float:
+        """Take a token, or return how many seconds until one is available"""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def pause(self, seconds: float):
+        """Stop handing out tokens, e.g. after the upstream answered 429.
+
+        The pause ends with a single token and refill resumes from there, so
+        the queued calls don't all go out at once.
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 1.0
+        self.updated = self.paused_until
+
+
+class MongoRateWindow:
+    """Cross-process request budget using fixed windows counted in MongoDB.
+
+    Every acquire increments the counter document for the current window;
+    once the count passes `limit` the caller waits for the next window.
+    Fails open if MongoDB is unavailable.
+    """
+
+    def __init__(self, collection, name: str, limit: int, window: float = 1.0):
+        self.collection = collection
+        self.name = name
+        self.limit = limit
+        self.window = window
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def acquire(self):
+        while True:
+            now = time.time()
+            window = int(now // self.window)
+            try:
+                doc = await self.collection.find_one_and_update(
+                    {"_id": f"{self.name}:{window}"},
+                    {
+                        "$inc": {"n": 1},
+                        "$setOnInsert": {
+                            "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.window * 10)
+                        },
+                    },
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+            except Exception as e:
+                logger.warning(f"Shared rate limit check failed, continuing: {e}")
+                return
+            if doc["n"] <= self.limit:
+                return
+            await asyncio.sleep((window + 1) * self.window - now)
+
+
+class PriorityRateLimiter:
+    """Token bucket with a bounded priority queue in front of it.
+
+    Callers get a token straight away while the bucket has one and nobody is
+    queued; otherwise they wait in priority order. When `max_queue` callers
+    are already waiting a new caller displaces the lowest-priority waiter if
+    it outranks it, and is shed with RateLimitExceeded otherwise.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_queue: int,
+        coordinator: Optional[MongoRateWindow] = None,
+    ):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_queue = max_queue
+        self.coordinator = coordinator
+        self._queue: List[Tuple[Priority, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.granted = 0
+        self.shed = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, fut in self._queue if not fut.done())
+
+    async def acquire(self, priority: Priority = Priority.NORMAL):
+        if not self.queued and self.bucket.take() == 0:
+            self.granted += 1
+        else:
+            await self._wait(priority)
+        if self.coordinator is not None:
+            await self.coordinator.acquire()
+
+    def pause(self, seconds: float):
+        self.bucket.pause(seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.bucket.rate,
+            "burst": self.bucket.burst,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "granted": self.granted,
+            "shed": self.shed,
+        }
+
+    async def _wait(self, priority: Priority):
+        if self.queued >= self.max_queue:
+            self._queue = [e for e in self._queue if not e[2].done()]
+            heapq.heapify(self._queue)
+            worst = max(self._queue, default=None)
+            retry_after = max(1.0, self.max_queue / self.bucket.rate)
+            if worst is None or worst[0] <= priority:
+                self.shed += 1
+                raise RateLimitExceeded("Upstream request queue is full", retry_after)
+            self._queue.remove(worst)
+            heapq.heapify(self._queue)
+            worst[2].set_exception(RateLimitExceeded("Displaced by a higher priority request", retry_after))
+            self.shed += 1
+
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._seq), fut))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await fut
+
+    async def _dispatch(self):
+        while True:
+            while self._queue and self._queue[0][2].done():
+                heapq.heappop(self._queue)
+            if not self._queue:
+                return
+            wait = self.bucket.take()
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+            _, _, fut = heapq.heappop(self._queue)
+            fut.set_result(None)
+            self.granted += 1
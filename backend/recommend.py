@@ -0,0 +1,72 @@
+"""Content and co-occurrence scoring for per-user recommendations"""
+
+import math
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+# How much a watchlisted title says about taste, by status
+STATUS_WEIGHTS = {"watched": 1.0, "watching": 0.7, "plan_to_watch": 0.4}
+# Each feature group adds up to its weight however many features it has,
+# so fifty keywords don't drown out three genres
+GROUP_WEIGHTS = {"g": 1.0, "k": 0.8, "c": 0.6}
+
+FeatureVector = Dict[str, float]
+
+
+def feature_vector(genre_ids: Iterable[int] = (), keyword_ids: Iterable[int] = (),
+                   cast_ids: Iterable[int] = ()) -> FeatureVector:
+    """Sparse feature vector of a title: "g28" for a genre, "k9" a keyword, "c42" a cast member"""
+    vector = {}
+    for group, ids in (("g", genre_ids), ("k", keyword_ids), ("c", cast_ids)):
+        ids = list(dict.fromkeys(ids or ()))
+        for feature_id in ids:
+            vector[f"{group}{feature_id}"] = GROUP_WEIGHTS[group] / math.sqrt(len(ids))
+    return vector
+
+
+def encode(vectors: Sequence[FeatureVector], vocabulary: Dict[str, int]) -> Tuple[np.ndarray, ...]:
+    """Sparse vectors as COO arrays (row, column, value), growing the vocabulary"""
+    rows, columns, values = [], [], []
+    for row, vector in enumerate(vectors):
+        for feature, value in vector.items():
+            rows.append(row)
+            columns.append(vocabulary.setdefault(feature, len(vocabulary)))
+            values.append(value)
+    return np.array(rows, dtype=np.int32), np.array(columns, dtype=np.int32), np.array(values, dtype=np.float64)
+
+
+def score_candidates(seeds: Sequence[FeatureVector], seed_weights: Sequence[float],
+                     candidates: Sequence[FeatureVector], cooccurrence: Sequence[float],
+                     content_weight: float = 0.7) -> np.ndarray:
+    """Score candidates by cosine similarity to the weighted sum of the seed
+    vectors, blended with their normalized co-occurrence counts.
+
+    The taste profile is a dense vector over the features seen here; the
+    candidates stay sparse, so every dot product and norm is one `bincount`
+    over the candidate features.
+    """
+    n = len(candidates)
+    vocabulary: Dict[str, int] = {}
+    seed_rows, seed_columns, seed_values = encode(seeds, vocabulary)
+    rows, columns, values = encode(candidates, vocabulary)
+    weights = np.asarray(seed_weights, dtype=np.float64)
+    profile = np.bincount(seed_columns, weights=seed_values * weights[seed_rows], minlength=len(vocabulary))
+
+    dots = np.bincount(rows, weights=values * profile[columns], minlength=n)
+    norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=n)) * np.linalg.norm(profile)
+    content = np.divide(dots, norms, out=np.zeros(n), where=norms > 0)
+
+    counts = np.asarray(cooccurrence, dtype=np.float64)
+    peak = counts.max() if n else 0.0
+    together = counts / peak if peak > 0 else np.zeros(n)
+    return content_weight * content + (1 - content_weight) * together
+
+
+def top(scores: np.ndarray, limit: int) -> List[int]:
+    """Indexes of the `limit` best scores, best first"""
+    if limit < len(scores):
+        best = np.argpartition(-scores, limit - 1)[:limit]
+    else:
+        best = np.arange(len(scores))
+    return [int(i) for i in best[np.lexsort((best, -scores[best]))]]
@@ -1,17 +1,42 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import FastAPI, APIRouter, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.routing import APIRoute
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any, Iterable
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timedelta, timezone
 import httpx
 import json
 import time
+import asyncio
+import re
+import math
+import base64
+import hashlib
+import random
+from contextvars import ContextVar
+
+try:
+    import orjson
+except ImportError:  # optional, responses fall back to the stdlib encoder
+    orjson = None
+
+from cache import MongoCacheTier, SingleFlight, SnapshotError, TTLCache, json_default, write_snapshot
+from catalog import CatalogStore, latest_export
+from compact import MEDIA_ITEM_FIELDS, compact_value, iter_media_items
+from discover import DiscoverTable
+from ratelimit import MongoRateWindow, Priority, PriorityRateLimiter, RateLimitExceeded
+from recommend import STATUS_WEIGHTS, feature_vector, score_candidates, top
+from suggest import SuggestIndex
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -25,20 +50,128 @@ db = client[os.environ['DB_NAME']]
 TMDB_API_KEY = os.environ.get('TMDB_API_KEY', '')
 OMDB_API_KEY = os.environ.get('OMDB_API_KEY', '')
 
+# Upstream HTTP settings
+TMDB_BASE_URL = os.environ.get('TMDB_BASE_URL', 'https://api.themoviedb.org/3')
+OMDB_BASE_URL = os.environ.get('OMDB_BASE_URL', 'http://www.omdbapi.com/')
+HTTP_TIMEOUT = float(os.environ.get('HTTP_TIMEOUT', 10.0))
+HTTP_MAX_CONNECTIONS = int(os.environ.get('HTTP_MAX_CONNECTIONS', 20))  # per upstream host
+HTTP_MAX_KEEPALIVE = int(os.environ.get('HTTP_MAX_KEEPALIVE', 10))  # per upstream host
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get('HTTP_KEEPALIVE_EXPIRY', 30.0))
+HTTP2_ENABLED = os.environ.get('HTTP2_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+http_clients: Dict[str, httpx.AsyncClient] = {}
+
+# TMDB request budget (requests/second), enforced before calls go out
+TMDB_RATE_LIMIT = float(os.environ.get('TMDB_RATE_LIMIT', 40))
+TMDB_RATE_BURST = int(os.environ.get('TMDB_RATE_BURST', 40))
+TMDB_MAX_QUEUE = int(os.environ.get('TMDB_MAX_QUEUE', 200))
+# Also count requests in MongoDB so all workers/replicas share one budget
+TMDB_RATE_LIMIT_SHARED = os.environ.get('TMDB_RATE_LIMIT_SHARED', 'false').lower() in ('1', 'true', 'yes')
+tmdb_limiter = PriorityRateLimiter(
+    TMDB_RATE_LIMIT,
+    TMDB_RATE_BURST,
+    TMDB_MAX_QUEUE,
+    coordinator=MongoRateWindow(db.rate_limits, "tmdb", int(TMDB_RATE_LIMIT)) if TMDB_RATE_LIMIT_SHARED else None,
+)
+
 # Cache settings
-CACHE_TTL_DEFAULT = 60 * 60  # 1 hour
-CACHE_TTL_CONFIG = 24 * 60 * 60  # 24 hours
-cache: Dict[str, Dict] = {}
+CACHE_TTL_DEFAULT = int(os.environ.get('CACHE_TTL_DEFAULT', 60 * 60))  # 1 hour
+CACHE_TTL_CONFIG = int(os.environ.get('CACHE_TTL_CONFIG', 24 * 60 * 60))  # 24 hours
+CACHE_TTL_DETAILS = int(os.environ.get('CACHE_TTL_DETAILS', 6 * 60 * 60))  # 6 hours
+CACHE_TTL_OMDB = int(os.environ.get('CACHE_TTL_OMDB', 24 * 60 * 60))  # 24 hours
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', 8))  # parallel detail fetches per batch
+CACHE_TTL_HOME = int(os.environ.get('CACHE_TTL_HOME', 5 * 60))  # 5 minutes, rows have their own TTL
+CACHE_MAX_ENTRIES = int(os.environ.get('CACHE_MAX_ENTRIES', 5000))
+CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 64 * 1024 * 1024))  # 64 MB
+CACHE_SWEEP_INTERVAL = int(os.environ.get('CACHE_SWEEP_INTERVAL', 60))
+# Past its TTL an entry is served while a background refresh runs...
+CACHE_STALE_WHILE_REVALIDATE = int(os.environ.get('CACHE_STALE_WHILE_REVALIDATE', 10 * 60))  # 10 minutes
+# ...and for this long it is the fallback when the upstream fails
+CACHE_STALE_IF_ERROR = int(os.environ.get('CACHE_STALE_IF_ERROR', 24 * 60 * 60))  # 24 hours
+CACHE_COMPACT_ITEMS = os.environ.get('CACHE_COMPACT_ITEMS', 'true').lower() in ('1', 'true', 'yes')
+# How long browsers may reuse catalog responses before revalidating with their ETag
+CATALOG_MAX_AGE = int(os.environ.get('CATALOG_MAX_AGE', 60))
+CATALOG_ETAG_ENTRIES = int(os.environ.get('CATALOG_ETAG_ENTRIES', 5000))  # catalog URLs whose ETag is remembered
+
+# Response encoding
+FAST_JSON_ENABLED = os.environ.get('FAST_JSON_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+RESPONSE_COMPRESSION = os.environ.get('RESPONSE_COMPRESSION', 'gzip').lower()  # gzip, br or off
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))  # bytes
+COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+cache = TTLCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    default_ttl=CACHE_TTL_DEFAULT,
+    namespace_ttls={
+        "config": CACHE_TTL_CONFIG,
+        "lists": CACHE_TTL_DEFAULT,
+        "details": CACHE_TTL_DETAILS,
+        "omdb": CACHE_TTL_OMDB,
+    },
+    stale_while_revalidate=CACHE_STALE_WHILE_REVALIDATE,
+    stale_if_error=CACHE_STALE_IF_ERROR,
+    # Normalized media items are kept as slotted records (see compact.py)
+    compact=compact_value if CACHE_COMPACT_ITEMS else None,
+)
+# Optional on-disk snapshot of the cache so restarts don't start cold
+CACHE_SNAPSHOT_PATH = os.environ.get('CACHE_SNAPSHOT_PATH', '')  # empty disables snapshots
+CACHE_SNAPSHOT_INTERVAL = int(os.environ.get('CACHE_SNAPSHOT_INTERVAL', 5 * 60))
+CACHE_SNAPSHOT_MAX_AGE = int(os.environ.get('CACHE_SNAPSHOT_MAX_AGE', 24 * 60 * 60))  # ignore older snapshots
+CACHE_SNAPSHOT_LOAD_BUDGET = float(os.environ.get('CACHE_SNAPSHOT_LOAD_BUDGET', 2.0))  # seconds spent loading
+snapshot_status: Dict[str, Any] = {"path": CACHE_SNAPSHOT_PATH or None, "last_load": None, "last_save": None}
+# Optional shared L2 in MongoDB behind the per-process cache
+CACHE_L2_ENABLED = os.environ.get('CACHE_L2_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+cache_l2 = MongoCacheTier(db.tmdb_cache) if CACHE_L2_ENABLED else None
+inflight = SingleFlight()
+refresh_tasks: set = set()
+background_tasks: List[asyncio.Task] = []
+
+# Background cache warming: refresh hot entries before they expire
+CACHE_WARM_ENABLED = os.environ.get('CACHE_WARM_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+CACHE_WARM_INTERVAL = int(os.environ.get('CACHE_WARM_INTERVAL', 60))  # seconds between runs
+CACHE_WARM_AHEAD = int(os.environ.get('CACHE_WARM_AHEAD', 5 * 60))  # refresh entries expiring within this
+CACHE_WARM_JITTER = int(os.environ.get('CACHE_WARM_JITTER', 15))  # +/- seconds added to each interval
+CACHE_WARM_CONCURRENCY = int(os.environ.get('CACHE_WARM_CONCURRENCY', 4))  # warm jobs running at once
+CACHE_WARM_TOP_N = int(os.environ.get('CACHE_WARM_TOP_N', 20))  # detail pages per trending/popular row
+CACHE_WARM_WATCHLIST_TITLES = int(os.environ.get('CACHE_WARM_WATCHLIST_TITLES', 200))
+# Counters of the warm run the current task belongs to, None outside the warmer
+warm_run: ContextVar[Optional[Dict]] = ContextVar("warm_run", default=None)
+# Upstream errors `cached_upstream` turned into None in the current task, when collected
+upstream_failures: ContextVar[Optional[list]] = ContextVar("upstream_failures", default=None)
+
+# Local catalog mirror fed by TMDB's daily ID export files (see catalog.py)
+CATALOG_EXPORT_DIR = os.environ.get('CATALOG_EXPORT_DIR', '')  # empty disables the mirror
+CATALOG_SYNC_INTERVAL = int(os.environ.get('CATALOG_SYNC_INTERVAL', 15 * 60))
+CATALOG_INGEST_BATCH = int(os.environ.get('CATALOG_INGEST_BATCH', 1000))  # upserts per bulk write
+CATALOG_ENRICH_BATCH = int(os.environ.get('CATALOG_ENRICH_BATCH', 200))  # titles enriched per sync run
+CATALOG_ENRICH_CONCURRENCY = int(os.environ.get('CATALOG_ENRICH_CONCURRENCY', 4))  # detail fetches at once
+CATALOG_ENRICH_MAX_AGE = int(os.environ.get('CATALOG_ENRICH_MAX_AGE', 30 * 24 * 60 * 60))  # re-enrich after
+CATALOG_LISTS_MIN_TITLES = int(os.environ.get('CATALOG_LISTS_MIN_TITLES', 10000))  # per media type, 0 = never first
+catalog = CatalogStore(db.catalog, db.catalog_state)
+
+# Discover answered from a columnar table of the enriched catalog (see discover.py)
+DISCOVER_LOCAL_ENABLED = os.environ.get('DISCOVER_LOCAL_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+DISCOVER_MIN_TITLES = int(os.environ.get('DISCOVER_MIN_TITLES', 10000))  # per media type before it's trusted
+DISCOVER_MIN_RESULTS = int(os.environ.get('DISCOVER_MIN_RESULTS', 20))  # fewer local matches go to TMDB
+discover_table: Optional[DiscoverTable] = None
+
+# Per-user "For You" recommendations from watchlist contents
+RECOMMEND_SEED_TITLES = int(os.environ.get('RECOMMEND_SEED_TITLES', 50))  # strongest watchlisted titles used
+RECOMMEND_NEIGHBOUR_LISTS = int(os.environ.get('RECOMMEND_NEIGHBOUR_LISTS', 500))  # other lists sampled
+RECOMMEND_COOCCURRING = int(os.environ.get('RECOMMEND_COOCCURRING', 200))  # co-occurring titles considered
+RECOMMEND_MAX_RESULTS = 50
+
+# Typeahead index over every title seen in responses, watchlists and the catalog
+SUGGEST_MAX_TITLES = int(os.environ.get('SUGGEST_MAX_TITLES', 200_000))
+suggest_index = SuggestIndex(max_titles=SUGGEST_MAX_TITLES)
 
 # TMDB Configuration
 IMAGE_BASE = "https://image.tmdb.org/t/p/"
 
+API_VERSION = "1.0.0"
+
 # Create the main app
 app = FastAPI(title="CineVault API")
 
-# Create a router with the /api prefix
-api_router = APIRouter(prefix="/api")
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -87,14 +220,190 @@ class Watchlist(BaseModel):
     name: str
     items: List[WatchlistItem] = []
     created_at: str = Field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    revision: int = 0  # bumped on every change to the watchlist or its items
 
 class WatchlistItemUpdate(BaseModel):
     status: Optional[str] = None
     watchlist_id: Optional[str] = None
 
+class WatchlistBatchOperation(BaseModel):
+    op: Literal["add", "update", "remove", "move"]
+    item: Optional[WatchlistItemCreate] = None  # add
+    item_id: Optional[str] = None  # update, remove, move
+    status: Optional[str] = None  # update, optionally move
+    watchlist_id: Optional[str] = None  # move target
+
+class WatchlistBatchRequest(BaseModel):
+    operations: List[WatchlistBatchOperation] = Field(..., max_length=500)
+    ordered: bool = True  # stop at the first failing operation
+
+class TitleRef(BaseModel):
+    media_type: str  # "movie" or "tv"
+    tmdb_id: int
+
+class TitleBatchRequest(BaseModel):
+    items: List[TitleRef] = Field(..., max_length=500)
+    watch_region: str = "US"
+
 # ==================== TMDB API HELPERS ====================
 
-async def tmdb_request(endpoint: str, params: Optional[Dict] = None, ttl: int = CACHE_TTL_DEFAULT) -> Optional[Dict]:
+def _http2_available() -> bool:
+    """HTTP/2 needs the optional `h2` package (pip install httpx[http2])"""
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def create_http_client() -> httpx.AsyncClient:
+    """Create a pooled client for a single upstream host.
+
+    Each upstream gets its own client so the connection limits act per host:
+    a burst of TMDB calls can never starve OMDB lookups of connections.
+    """
+    http2 = HTTP2_ENABLED and _http2_available()
+    if HTTP2_ENABLED and not http2:
+        logger.warning("HTTP2_ENABLED is set but h2 is not installed, falling back to HTTP/1.1")
+    return httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """Get the app-lifetime client for an upstream ("tmdb" or "omdb")"""
+    http_client = http_clients.get(name)
+    if http_client is None or http_client.is_closed:
+        http_client = http_clients[name] = create_http_client()
+    return http_client
+
+async def close_http_clients():
+    """Close all pooled upstream clients"""
+    for http_client in http_clients.values():
+        await http_client.aclose()
+    http_clients.clear()
+
+def cache_namespace(endpoint: str) -> str:
+    """Pick the cache namespace (and so the TTL) for a TMDB endpoint"""
+    if endpoint.startswith(("/genre/", "/watch/providers/", "/configuration")):
+        return "config"
+    if re.fullmatch(r"/(movie|tv)/\d+", endpoint):
+        return "details"
+    return "lists"
+
+async def fetch_tmdb(endpoint: str, params: Dict, priority: Priority = Priority.NORMAL) -> Dict:
+    """Fetch a TMDB endpoint within the rate limit, raising on failure"""
+    url = f"{TMDB_BASE_URL}{endpoint}"
+    params = {"api_key": TMDB_API_KEY, **params}
+    params = {k: v for k, v in params.items() if v is not None}
+    
+    http_client = get_http_client("tmdb")
+    if warm_run.get() is not None:
+        priority = Priority.BACKGROUND
+    await tmdb_limiter.acquire(priority)
+    response = await http_client.get(url, params=params)
+    if response.status_code == 429:
+        # Hold back every queued call, not just this one, then retry in turn
+        tmdb_limiter.pause(int(response.headers.get("Retry-After", 2)))
+        await tmdb_limiter.acquire(priority)
+        response = await http_client.get(url, params=params)
+    response.raise_for_status()
+    return response.json()
+
+async def fetch_omdb(imdb_id: str) -> Optional[Dict]:
+    """Fetch OMDB data for an IMDb id, None if OMDB doesn't know it"""
+    response = await get_http_client("omdb").get(
+        OMDB_BASE_URL,
+        params={"i": imdb_id, "apikey": OMDB_API_KEY}
+    )
+    response.raise_for_status()
+    data = response.json()
+    return data if data.get("Response") == "True" else None
+
+def refresh_in_background(cache_key: str, load, source: str):
+    """Refresh a stale cache entry without making the caller wait"""
+    async def refresh():
+        try:
+            await inflight.do(cache_key, load)
+        except Exception as e:
+            logger.warning(f"{source} background refresh failed for {cache_key}: {e}")
+
+    task = asyncio.create_task(refresh())
+    refresh_tasks.add(task)
+    task.add_done_callback(refresh_tasks.discard)
+
+async def cached_upstream(cache_key: str, namespace: str, fetch, ttl: Optional[int] = None,
+                          source: str = "TMDB") -> Optional[Dict]:
+    """Serve an upstream response from cache with stale-while-revalidate.
+
+    Entries are read from the in-process cache, then from the shared MongoDB
+    tier when enabled. Fresh entries are returned as is. Stale entries inside
+    the revalidate window are returned immediately while a background refresh
+    runs. On a miss the upstream is called (once per key, see `inflight`), and
+    if that fails any stale entry still inside its error grace period is served.
+    
+    Called from the cache warmer, fresh entries due to expire within
+    CACHE_WARM_AHEAD are refreshed as well, in the foreground.
+    """
+    warm = warm_run.get()
+    if warm is not None:
+        warm["checked"] += 1
+    # The warmer's reads shouldn't count as hits or keep entries in the LRU
+    entry = cache.lookup(cache_key) if warm is None else cache.peek(cache_key)
+    if entry is None and cache_l2 is not None:
+        entry = await inflight.do(f"l2_{cache_key}", lambda: cache_l2.fill(cache, cache_key))
+    if entry is not None and entry.fresh():
+        if warm is None or entry.fresh(time.time() + CACHE_WARM_AHEAD):
+            return entry.value
+    
+    async def load():
+        data = await fetch()
+        if data is not None:
+            stored = cache.set(cache_key, data, namespace, ttl)
+            if warm is not None:
+                warm["refreshed"] += 1
+            if stored is not None:
+                if cache_l2 is not None:
+                    await cache_l2.set(cache_key, stored)
+                # Hand out the cached (possibly compacted) value, the same one later hits get
+                return stored.value
+        return data
+    
+    if warm is None and entry is not None and entry.revalidatable():
+        refresh_in_background(cache_key, load, source)
+        return entry.value
+    
+    # Concurrent misses for the same key share one upstream call
+    try:
+        return await inflight.do(cache_key, load)
+    except RateLimitExceeded as e:
+        if entry is not None:
+            return entry.value
+        logger.warning(f"{source} request shed: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail=f"{source} is busy, try again shortly",
+            headers={"Retry-After": str(math.ceil(e.retry_after))},
+        )
+    except Exception as e:
+        if entry is not None:
+            logger.warning(f"{source} request failed, serving stale data: {e}")
+            return entry.value
+        logger.error(f"{source} request failed: {e}")
+        failures = upstream_failures.get()
+        if failures is not None:
+            failures.append(e)
+        return None
+
+def is_not_found(error: Exception) -> bool:
+    return isinstance(error, httpx.HTTPStatusError) and error.response.status_code == 404
+
+async def tmdb_request(endpoint: str, params: Optional[Dict] = None, ttl: Optional[int] = None,
+                       priority: Priority = Priority.NORMAL) -> Optional[Dict]:
     """Make a request to TMDB API with caching"""
     if not TMDB_API_KEY:
         logger.warning("TMDB_API_KEY not configured, using demo mode")
@@ -102,30 +411,36 @@ async def tmdb_request(endpoint: str, params: Optional[Dict] = None, ttl: int =
     
     params = params or {}
     cache_key = f"tmdb_{endpoint}_{json.dumps(params, sort_keys=True)}"
+    data = await cached_upstream(
+        cache_key, cache_namespace(endpoint), lambda: fetch_tmdb(endpoint, params, priority), ttl
+    )
+    note_cache_dependency(cache_key, data)
+    return data
+
+def response_cache_key(route: str, endpoint: str, params: Dict) -> str:
+    return f"{route}_{endpoint}_{json.dumps(params, sort_keys=True)}"
+
+async def tmdb_response(route: str, endpoint: str, params: Optional[Dict], shape,
+                        priority: Priority = Priority.NORMAL) -> Optional[Any]:
+    """Make a TMDB request and cache the route's response shape instead of the raw payload.
+
+    `shape` turns the TMDB payload into what the route returns; the result is
+    cached under the route and parameters, so a warm hit does no per-item work.
+    """
+    if not TMDB_API_KEY:
+        logger.warning("TMDB_API_KEY not configured, using demo mode")
+        return None
     
-    # Check cache
-    cached = cache.get(cache_key)
-    if cached and time.time() - cached["ts"] < ttl:
-        return cached["data"]
+    params = params or {}
+    cache_key = response_cache_key(route, endpoint, params)
     
-    url = f"https://api.themoviedb.org/3{endpoint}"
-    params = {"api_key": TMDB_API_KEY, **params}
-    params = {k: v for k, v in params.items() if v is not None}
+    async def fetch():
+        data = await fetch_tmdb(endpoint, params, priority)
+        return shape(data) if data is not None else None
     
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, params=params)
-            if response.status_code == 429:
-                retry_after = int(response.headers.get("Retry-After", 2))
-                await asyncio.sleep(retry_after)
-                response = await client.get(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            cache[cache_key] = {"data": data, "ts": time.time()}
-            return data
-    except Exception as e:
-        logger.error(f"TMDB request failed: {e}")
-        return None
+    data = await cached_upstream(cache_key, cache_namespace(endpoint), fetch)
+    note_cache_dependency(cache_key, data)
+    return data
 
 async def omdb_request(imdb_id: str) -> Optional[Dict]:
     """Make a request to OMDB API for ratings"""
@@ -134,25 +449,9 @@ async def omdb_request(imdb_id: str) -> Optional[Dict]:
         return None
     
     cache_key = f"omdb_{imdb_id}"
-    cached = cache.get(cache_key)
-    if cached and time.time() - cached["ts"] < CACHE_TTL_DEFAULT:
-        return cached["data"]
-    
-    try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(
-                "http://www.omdbapi.com/",
-                params={"i": imdb_id, "apikey": OMDB_API_KEY}
-            )
-            response.raise_for_status()
-            data = response.json()
-            if data.get("Response") == "True":
-                cache[cache_key] = {"data": data, "ts": time.time()}
-                return data
-            return None
-    except Exception as e:
-        logger.error(f"OMDB request failed: {e}")
-        return None
+    data = await cached_upstream(cache_key, "omdb", lambda: fetch_omdb(imdb_id), source="OMDB")
+    note_cache_dependency(cache_key, data)
+    return data
 
 def get_image_url(path: Optional[str], size: str = "w500") -> Optional[str]:
     """Get full image URL from TMDB path"""
@@ -161,7 +460,7 @@ def get_image_url(path: Optional[str], size: str = "w500") -> Optional[str]:
 def normalize_media_item(item: Dict, media_type: Optional[str] = None) -> Dict:
     """Normalize movie/TV data to common format"""
     mt = media_type or item.get("media_type", "movie")
-    return {
+    normalized = {
         "id": item.get("id"),
         "media_type": mt,
         "title": item.get("title") or item.get("name"),
@@ -176,14 +475,328 @@ def normalize_media_item(item: Dict, media_type: Optional[str] = None) -> Dict:
         "genre_ids": item.get("genre_ids", []),
         "genres": item.get("genres", []),
     }
+    suggest_index.add_item(normalized)
+    return normalized
+
+def normalize_page(data: Dict, media_type: Optional[str] = None) -> Dict:
+    """Normalize a page of TMDB list results"""
+    return {
+        "results": [normalize_media_item(item, media_type) for item in data.get("results", [])],
+        "page": data.get("page", 1),
+        "total_pages": data.get("total_pages", 0),
+        "total_results": data.get("total_results", 0)
+    }
+
+def movie_page(data: Dict) -> Dict:
+    return normalize_page(data, "movie")
+
+def tv_page(data: Dict) -> Dict:
+    return normalize_page(data, "tv")
+
+def search_page(data: Dict) -> Dict:
+    # Filter out person results, only keep movies and TV
+    results = [item for item in data.get("results", []) if item.get("media_type") in ["movie", "tv"]]
+    return normalize_page({**data, "results": results})
+
+def empty_page() -> Dict:
+    return {"results": [], "page": 1, "total_pages": 0, "total_results": 0}
+
+def parse_omdb_ratings(data: Optional[Dict]) -> Dict:
+    """Pick IMDb, Rotten Tomatoes and Metacritic ratings out of an OMDB response"""
+    if not data:
+        return {"ratings": None}
+    
+    ratings = {
+        "imdb": None,
+        "rotten_tomatoes": None,
+        "metacritic": None
+    }
+    
+    # Parse IMDb rating
+    if data.get("imdbRating") and data["imdbRating"] != "N/A":
+        ratings["imdb"] = {
+            "value": data["imdbRating"],
+            "votes": data.get("imdbVotes", "").replace(",", "")
+        }
+    
+    # Parse other ratings
+    for rating in data.get("Ratings", []):
+        source = rating.get("Source", "")
+        value = rating.get("Value", "")
+        if "Rotten Tomatoes" in source:
+            ratings["rotten_tomatoes"] = {"value": value}
+        elif "Metacritic" in source:
+            ratings["metacritic"] = {"value": value}
+    
+    return {
+        "ratings": ratings,
+        "rated": data.get("Rated"),
+        "awards": data.get("Awards"),
+        "box_office": data.get("BoxOffice")
+    }
+
+DETAIL_APPEND = "credits,videos,watch/providers,external_ids,recommendations"
+DETAIL_ROUTE = "details_v2"  # bump when the cached detail shape changes
+DETAIL_PARAMS = {"append_to_response": DETAIL_APPEND}
+
+async def tmdb_details(media_type: str, tmdb_id: int, include_ratings: bool = False):
+    """Fetch TMDB details, plus OMDB data when `include_ratings` is set.
+
+    The TMDB data is the cached detail response (see `movie_details` and
+    `tv_details`). The TMDB -> IMDb id mapping is cached on every detail
+    fetch, so once a title has been seen its OMDB lookup runs alongside the
+    TMDB one instead of after it. Returns (tmdb_data, omdb_data).
+    """
+    mapping_key = f"imdb_{media_type}_{tmdb_id}"
+    details = tmdb_response(
+        DETAIL_ROUTE,
+        f"/{media_type}/{tmdb_id}",
+        DETAIL_PARAMS,
+        movie_details if media_type == "movie" else tv_details,
+        priority=Priority.INTERACTIVE
+    )
+    known_imdb_id = cache.get(mapping_key) if include_ratings else None
+    if known_imdb_id:
+        data, omdb_data = await asyncio.gather(details, omdb_request(known_imdb_id))
+    else:
+        data, omdb_data = await details, None
+    if not data:
+        return None, None
+    
+    imdb_id = data.get("imdb_id")
+    if imdb_id:
+        cache.set(mapping_key, imdb_id, "config")
+        if include_ratings and imdb_id != known_imdb_id:
+            omdb_data = await omdb_request(imdb_id)
+    return data, omdb_data
+
+def detail_cache_key(media_type: str, tmdb_id: int) -> str:
+    return response_cache_key(DETAIL_ROUTE, f"/{media_type}/{tmdb_id}", DETAIL_PARAMS)
+
+def cached_details(media_type: str, tmdb_id: int) -> Optional[Dict]:
+    """The cached detail response of a title, if any, without fetching it or
+    touching LRU order"""
+    entry = cache.peek(detail_cache_key(media_type, tmdb_id))
+    return entry.value if entry is not None else None
+
+# ==================== PAGINATION HELPERS ====================
+
+# Users and watchlists are paged by (created_at, id): a cursor holds the
+# last document's sort key, so each page is an index range scan no matter
+# how deep it is. The next cursor is returned in the X-Next-Cursor header
+# to keep the list response bodies unchanged.
+
+PAGE_SORT = [("created_at", ASCENDING), ("id", ASCENDING)]
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+STREAM_BATCH_SIZE = 100
+
+def encode_cursor(doc: Dict) -> str:
+    raw = json.dumps([doc["created_at"], doc["id"]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def cursor_query(cursor: Optional[str]) -> Dict:
+    """Mongo filter for documents after the cursor position"""
+    if not cursor:
+        return {}
+    try:
+        created_at, doc_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {"$or": [
+        {"created_at": {"$gt": created_at}},
+        {"created_at": created_at, "id": {"$gt": doc_id}},
+    ]}
+
+async def fetch_page(collection, query: Dict, limit: int, cursor: Optional[str], response: Response) -> List[Dict]:
+    """Fetch one page and set the next cursor header if more remain"""
+    query = {**query, **cursor_query(cursor)}
+    docs = await collection.find(query, {"_id": 0}).sort(PAGE_SORT).limit(limit + 1).to_list(limit + 1)
+    if len(docs) > limit:
+        docs = docs[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(docs[-1])
+    return docs
+
+def stream_ndjson(collection, query: Dict, cursor: Optional[str], enrich=None) -> StreamingResponse:
+    """Stream every matching document as NDJSON straight from the Motor cursor"""
+    query = {**query, **cursor_query(cursor)}
+
+    async def lines():
+        mongo_cursor = collection.find(query, {"_id": 0}).sort(PAGE_SORT)
+        mongo_cursor.batch_size(STREAM_BATCH_SIZE)
+        batch = []
+        async for doc in mongo_cursor:
+            batch.append(doc)
+            if len(batch) == STREAM_BATCH_SIZE:
+                yield await ndjson_batch(batch, enrich)
+                batch = []
+        if batch:
+            yield await ndjson_batch(batch, enrich)
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+async def ndjson_batch(docs: List[Dict], enrich=None) -> str:
+    if enrich is not None:
+        docs = await enrich(docs)
+    return "".join(json.dumps(doc) + "\n" for doc in docs)
+
+# ==================== CONDITIONAL REQUESTS ====================
+
+# GET responses carry a weak ETag and a 304 is returned when it matches
+# If-None-Match. Catalog ETags hash the digests of the cache entries a
+# response was built from, so a revalidation whose entries are all still
+# fresh is answered without running the route at all, unless the catalog
+# mirror or discover table may have taken over the route since. Watchlist
+# ETags come from per-watchlist revision counters bumped on every mutation.
+
+CATALOG_CACHE_CONTROL = f"public, max-age={CATALOG_MAX_AGE}"
+WATCHLIST_CACHE_CONTROL = "private, no-cache"
+
+# The ETag and dependencies of recent catalog URLs, kept apart from the
+# response cache so they never evict payloads or end up in snapshots
+etag_cache = TTLCache(max_entries=CATALOG_ETAG_ENTRIES, default_ttl=CACHE_TTL_DEFAULT)
+# Bumped when routes may start answering from a different source (the catalog
+# mirror covering more lists, a new discover table), which outdates every ETag
+answer_sources_version = 0
+
+def answer_sources_changed():
+    global answer_sources_version
+    answer_sources_version += 1
+
+# (cache key, digest) pairs of the entries read while building a response
+cache_dependencies: ContextVar[Optional[list]] = ContextVar("cache_dependencies", default=None)
+
+def note_cache_dependency(cache_key: str, value: Any):
+    """Record that the current response was built from a cached value"""
+    dependencies = cache_dependencies.get()
+    if dependencies is None or value is None:
+        return
+    entry = cache.peek(cache_key)
+    # A value that didn't come from (or didn't make it into) the cache can't be revalidated
+    dependencies.append((cache_key, entry.digest if entry is not None and entry.value is value else None))
+
+def make_etag(*parts: Any) -> str:
+    raw = json.dumps([API_VERSION, *parts], separators=(",", ":"), default=str)
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+def dependencies_fresh(dependencies: List) -> bool:
+    for cache_key, digest in dependencies:
+        entry = cache.peek(cache_key)
+        if entry is None or not entry.fresh() or entry.digest != digest:
+            return False
+    return True
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed"""
+
+    def render(self, content: Any) -> bytes:
+        if FAST_JSON_ENABLED and orjson is not None:
+            return orjson.dumps(content)
+        return json.dumps(
+            content, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=json_default
+        ).encode("utf-8")
+
+def render_directly(endpoint, response_class):
+    """Wrap an endpoint so its plain dict/list result is rendered as is.
+
+    FastAPI otherwise walks the whole payload with `jsonable_encoder` before
+    rendering it; routes returning already-normalized JSON types can skip that.
+    """
+    async def call(*args, **kwargs):
+        content = await endpoint(*args, **kwargs)
+        if isinstance(content, (dict, list)):
+            return response_class(content)
+        return content
+    return call
+
+class ConditionalRoute(APIRoute):
+    """Route class adding ETag / If-None-Match handling to catalog and watchlist GETs,
+    and direct rendering to routes declared with `response_class=FastJSONResponse`"""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+        response_class = getattr(self.response_class, "value", self.response_class)
+        if issubclass(response_class, FastJSONResponse) and self.response_model is None:
+            self.dependant.call = render_directly(self.dependant.call, response_class)
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+        if "GET" not in self.methods:
+            return handler
+        if self.path.startswith("/api/tmdb/") or self.path == "/api/home":
+            return self.catalog_handler(handler)
+        if self.path in ("/api/watchlists", "/api/watchlists/{watchlist_id}"):
+            return self.watchlist_handler(handler)
+        return handler
+
+    @staticmethod
+    def catalog_handler(handler):
+        async def conditional_handler(request: Request) -> Response:
+            etag_key = f"etag_{request.url.path}?{request.url.query}"
+            known = etag_cache.peek(etag_key)
+            if known is not None and etag_matches(request, known.value["etag"]) \
+                    and known.value["sources"] == answer_sources_version \
+                    and dependencies_fresh(known.value["dependencies"]):
+                return not_modified(known.value["etag"], CATALOG_CACHE_CONTROL)
+            
+            dependencies = []
+            token = cache_dependencies.set(dependencies)
+            try:
+                response = await handler(request)
+            finally:
+                cache_dependencies.reset(token)
+            if response.status_code != 200 or not dependencies or any(d is None for _, d in dependencies):
+                return response
+            
+            etag = make_etag(etag_key, answer_sources_version, [digest for _, digest in dependencies])
+            etag_cache.set(etag_key, {"etag": etag, "dependencies": dependencies, "sources": answer_sources_version})
+            if etag_matches(request, etag):
+                return not_modified(etag, CATALOG_CACHE_CONTROL)
+            response.headers["ETag"] = etag
+            response.headers["Cache-Control"] = CATALOG_CACHE_CONTROL
+            return response
+        return conditional_handler
+
+    @staticmethod
+    def watchlist_handler(handler):
+        async def conditional_handler(request: Request) -> Response:
+            etag = await watchlist_etag(request)
+            if etag is not None and etag_matches(request, etag):
+                return not_modified(etag, WATCHLIST_CACHE_CONTROL)
+            response = await handler(request)
+            if etag is not None and response.status_code == 200:
+                response.headers["ETag"] = etag
+                response.headers["Cache-Control"] = WATCHLIST_CACHE_CONTROL
+            return response
+        return conditional_handler
+
+# Create a router with the /api prefix
+api_router = APIRouter(prefix="/api", route_class=ConditionalRoute)
 
 # ==================== USER ENDPOINTS ====================
 
 @api_router.get("/users", response_model=List[User])
-async def get_users():
-    """Get all users"""
-    users = await db.users.find({}, {"_id": 0}).to_list(100)
-    return users
+async def get_users(
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    stream: bool = False
+):
+    """Get users, oldest first, a page at a time (or all of them as NDJSON with stream=true)"""
+    if stream:
+        return stream_ndjson(db.users, {}, cursor)
+    return await fetch_page(db.users, {}, limit, cursor, response)
 
 @api_router.post("/users", response_model=User)
 async def create_user(user_data: UserCreate):
@@ -207,22 +820,150 @@ async def delete_user(user_id: str):
     result = await db.users.delete_one({"id": user_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
+    watchlist_ids = await db.watchlists.distinct("id", {"user_id": user_id})
+    await db.watchlist_items.delete_many({"watchlist_id": {"$in": watchlist_ids}})
     await db.watchlists.delete_many({"user_id": user_id})
     return {"message": "User deleted"}
 
+# ==================== INDEXES ====================
+
+async def create_indexes():
+    """Create the indexes behind every hot query (idempotent)"""
+    await db.users.create_index("id", unique=True, name="user_id_unique")
+    await db.users.create_index(PAGE_SORT, name="user_page")
+    await db.watchlists.create_index("id", unique=True, name="watchlist_id_unique")
+    await db.watchlists.create_index("user_id", name="watchlist_user")
+    await db.watchlists.create_index([("user_id", ASCENDING), *PAGE_SORT], name="watchlist_user_page")
+    await db.watchlist_items.create_index(
+        [("watchlist_id", ASCENDING), ("media_type", ASCENDING), ("tmdb_id", ASCENDING)],
+        unique=True, name="watchlist_title_unique"
+    )
+    await db.watchlist_items.create_index("id", unique=True, name="item_id_unique")
+    await db.watchlist_items.create_index(
+        [("watchlist_id", ASCENDING), ("status", ASCENDING)], name="watchlist_status"
+    )
+    await db.watchlist_items.create_index(
+        [("watchlist_id", ASCENDING), ("added_at", ASCENDING)], name="watchlist_added_at"
+    )
+    # Finds the watchlists holding a title, for co-occurrence
+    await db.watchlist_items.create_index(
+        [("media_type", ASCENDING), ("tmdb_id", ASCENDING)], name="watchlist_item_title"
+    )
+
+async def log_index_state():
+    for name in ("users", "watchlists", "watchlist_items"):
+        indexes = await db[name].index_information()
+        logger.info(f"Indexes on {name}: {', '.join(sorted(indexes))}")
+
+# ==================== WATCHLIST ITEM STORAGE ====================
+
+# Items live in their own collection, one document per item. Watchlists
+# created before that kept them in an embedded `items` array; those are
+# moved over lazily on first access and by a background pass at startup.
+
+async def migrate_embedded_items(watchlist: Dict) -> int:
+    """Move a watchlist's embedded items into watchlist_items.
+
+    Safe to run concurrently and repeatedly: items are upserted on the
+    unique (watchlist_id, media_type, tmdb_id) key and only the migrated
+    ones are pulled from the embedded array.
+    """
+    items = watchlist.get("items") or []
+    if not items:
+        return 0
+    ops = [
+        UpdateOne(
+            {"watchlist_id": watchlist["id"], "media_type": item["media_type"], "tmdb_id": item["tmdb_id"]},
+            {"$setOnInsert": {**item, "watchlist_id": watchlist["id"]}},
+            upsert=True
+        )
+        for item in items
+    ]
+    await db.watchlist_items.bulk_write(ops, ordered=False)
+    await db.watchlists.update_one(
+        {"id": watchlist["id"]},
+        {"$pull": {"items": {"id": {"$in": [item["id"] for item in items]}}}}
+    )
+    return len(items)
+
+async def migrate_all_embedded_items():
+    """Background pass over every watchlist still holding embedded items"""
+    migrated = 0
+    try:
+        async for watchlist in db.watchlists.find({"items.0": {"$exists": True}}, {"_id": 0}):
+            migrated += await migrate_embedded_items(watchlist)
+    except Exception as e:
+        logger.error(f"Watchlist item migration failed: {e}")
+    if migrated:
+        logger.info(f"Migrated {migrated} embedded watchlist items")
+
+async def attach_items(watchlists: List[Dict]) -> List[Dict]:
+    """Load the items of the given watchlists with one query"""
+    for watchlist in watchlists:
+        if watchlist.get("items"):
+            await migrate_embedded_items(watchlist)
+        watchlist["items"] = []
+    by_id = {w["id"]: w for w in watchlists}
+    cursor = db.watchlist_items.find(
+        {"watchlist_id": {"$in": list(by_id)}}, {"_id": 0}
+    ).sort("added_at", ASCENDING)
+    async for item in cursor:
+        by_id[item.pop("watchlist_id")]["items"].append(item)
+    return watchlists
+
+def index_watchlist_item(item: Dict):
+    """Make a watchlisted title suggestable (watchlist items carry no popularity)"""
+    suggest_index.add(item["media_type"], item["tmdb_id"], item["title"], poster_path=item.get("poster_path"))
+
+async def bump_revision(*watchlist_ids: str):
+    """Invalidate the ETags of watchlists whose items changed"""
+    await db.watchlists.update_many({"id": {"$in": list(watchlist_ids)}}, {"$inc": {"revision": 1}})
+
+async def watchlist_etag(request: Request) -> Optional[str]:
+    """ETag for a watchlist GET from revision counters alone, without loading items"""
+    watchlist_id = request.path_params.get("watchlist_id")
+    if watchlist_id:
+        watchlist = await db.watchlists.find_one({"id": watchlist_id}, {"_id": 0, "revision": 1})
+        if watchlist is None:
+            return None
+        revisions = [[watchlist_id, watchlist.get("revision", 0)]]
+    else:
+        user_id = request.query_params.get("user_id")
+        if not user_id:
+            return None
+        revisions = await user_watchlist_revisions(user_id)
+    return make_etag(request.url.path, request.url.query, revisions)
+
+async def user_watchlist_revisions(user_id: str) -> List[List]:
+    """[watchlist id, revision] of each of a user's watchlists; changes with any
+    change to the user's watchlists or their items"""
+    cursor = db.watchlists.find({"user_id": user_id}, {"_id": 0, "id": 1, "revision": 1}).sort(PAGE_SORT)
+    return [[w["id"], w.get("revision", 0)] async for w in cursor]
+
+def revisions_key(revisions: List[List]) -> str:
+    return hashlib.blake2b(json.dumps(revisions).encode(), digest_size=8).hexdigest()
+
 # ==================== WATCHLIST ENDPOINTS ====================
 
 @api_router.get("/watchlists", response_model=List[Watchlist])
-async def get_watchlists(user_id: str = Query(...)):
-    """Get all watchlists for a user"""
-    watchlists = await db.watchlists.find({"user_id": user_id}, {"_id": 0}).to_list(100)
-    return watchlists
+async def get_watchlists(
+    response: Response,
+    user_id: str = Query(...),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    stream: bool = False
+):
+    """Get a user's watchlists a page at a time (or all of them as NDJSON with stream=true)"""
+    if stream:
+        return stream_ndjson(db.watchlists, {"user_id": user_id}, cursor, enrich=attach_items)
+    watchlists = await fetch_page(db.watchlists, {"user_id": user_id}, limit, cursor, response)
+    return await attach_items(watchlists)
 
 @api_router.post("/watchlists", response_model=Watchlist)
 async def create_watchlist(watchlist_data: WatchlistCreate):
     """Create a new watchlist"""
     watchlist = Watchlist(**watchlist_data.model_dump())
-    doc = watchlist.model_dump()
+    doc = watchlist.model_dump(exclude={"items"})
     await db.watchlists.insert_one(doc)
     return watchlist
 
@@ -232,14 +973,14 @@ async def get_watchlist(watchlist_id: str):
     watchlist = await db.watchlists.find_one({"id": watchlist_id}, {"_id": 0})
     if not watchlist:
         raise HTTPException(status_code=404, detail="Watchlist not found")
-    return watchlist
+    return (await attach_items([watchlist]))[0]
 
 @api_router.put("/watchlists/{watchlist_id}")
 async def update_watchlist(watchlist_id: str, name: str = Query(...)):
     """Update watchlist name"""
     result = await db.watchlists.update_one(
         {"id": watchlist_id},
-        {"$set": {"name": name}}
+        {"$set": {"name": name}, "$inc": {"revision": 1}}
     )
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Watchlist not found")
@@ -251,6 +992,7 @@ async def delete_watchlist(watchlist_id: str):
     result = await db.watchlists.delete_one({"id": watchlist_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Watchlist not found")
+    await db.watchlist_items.delete_many({"watchlist_id": watchlist_id})
     return {"message": "Watchlist deleted"}
 
 # ==================== WATCHLIST ITEMS ENDPOINTS ====================
@@ -258,216 +1000,271 @@ async def delete_watchlist(watchlist_id: str):
 @api_router.post("/watchlists/{watchlist_id}/items", response_model=WatchlistItem)
 async def add_to_watchlist(watchlist_id: str, item_data: WatchlistItemCreate):
     """Add an item to a watchlist"""
-    watchlist = await db.watchlists.find_one({"id": watchlist_id})
+    watchlist = await db.watchlists.find_one({"id": watchlist_id}, {"_id": 0, "id": 1, "items": 1})
     if not watchlist:
         raise HTTPException(status_code=404, detail="Watchlist not found")
+    if watchlist.get("items"):
+        await migrate_embedded_items(watchlist)
     
-    # Check if item already exists in this watchlist
-    for existing in watchlist.get("items", []):
-        if existing["tmdb_id"] == item_data.tmdb_id and existing["media_type"] == item_data.media_type:
-            raise HTTPException(status_code=400, detail="Item already in watchlist")
-    
+    # Duplicates are rejected by the unique (watchlist_id, media_type, tmdb_id) index
     item = WatchlistItem(**item_data.model_dump())
-    await db.watchlists.update_one(
-        {"id": watchlist_id},
-        {"$push": {"items": item.model_dump()}}
-    )
+    try:
+        await db.watchlist_items.insert_one({**item.model_dump(), "watchlist_id": watchlist_id})
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Item already in watchlist")
+    await bump_revision(watchlist_id)
+    index_watchlist_item(item.model_dump())
     return item
 
+async def migrate_watchlist_holding(watchlist_id: str, item_id: str) -> bool:
+    """Migrate a watchlist if the item is still embedded in it"""
+    watchlist = await db.watchlists.find_one({"id": watchlist_id, "items.id": item_id}, {"_id": 0})
+    return bool(watchlist) and await migrate_embedded_items(watchlist) > 0
+
+async def get_move_targets(watchlist_id: str, target_ids: List[str]) -> set:
+    """Ids of the target watchlists that belong to the same user as the source"""
+    source = await db.watchlists.find_one({"id": watchlist_id}, {"_id": 0, "user_id": 1})
+    if not source or not target_ids:
+        return set()
+    targets = await db.watchlists.find(
+        {"id": {"$in": target_ids}, "user_id": source["user_id"]}, {"_id": 0, "id": 1, "items": 1}
+    ).to_list(len(target_ids))
+    for target in targets:
+        if target.get("items"):
+            await migrate_embedded_items(target)
+    return {target["id"] for target in targets}
+
 @api_router.put("/watchlists/{watchlist_id}/items/{item_id}")
 async def update_watchlist_item(watchlist_id: str, item_id: str, update_data: WatchlistItemUpdate):
-    """Update an item's status in a watchlist"""
+    """Update an item's status, or move it to another of the user's watchlists"""
+    changes = {}
     if update_data.status:
-        await db.watchlists.update_one(
-            {"id": watchlist_id, "items.id": item_id},
-            {"$set": {"items.$.status": update_data.status}}
-        )
+        changes["status"] = update_data.status
+    if update_data.watchlist_id and update_data.watchlist_id != watchlist_id:
+        if update_data.watchlist_id not in await get_move_targets(watchlist_id, [update_data.watchlist_id]):
+            raise HTTPException(status_code=404, detail="Watchlist not found")
+        changes["watchlist_id"] = update_data.watchlist_id
+    if changes:
+        query = {"id": item_id, "watchlist_id": watchlist_id}
+        update = {"$set": changes}
+        try:
+            result = await db.watchlist_items.update_one(query, update)
+            if result.matched_count == 0 and await migrate_watchlist_holding(watchlist_id, item_id):
+                await db.watchlist_items.update_one(query, update)
+        except DuplicateKeyError:
+            raise HTTPException(status_code=400, detail="Item already in watchlist")
+        await bump_revision(watchlist_id, *([changes["watchlist_id"]] if "watchlist_id" in changes else []))
     return {"message": "Item updated"}
 
 @api_router.delete("/watchlists/{watchlist_id}/items/{item_id}")
 async def remove_from_watchlist(watchlist_id: str, item_id: str):
     """Remove an item from a watchlist"""
-    await db.watchlists.update_one(
-        {"id": watchlist_id},
-        {"$pull": {"items": {"id": item_id}}}
-    )
+    query = {"id": item_id, "watchlist_id": watchlist_id}
+    result = await db.watchlist_items.delete_one(query)
+    if result.deleted_count == 0 and await migrate_watchlist_holding(watchlist_id, item_id):
+        result = await db.watchlist_items.delete_one(query)
+    if result.deleted_count:
+        await bump_revision(watchlist_id)
     return {"message": "Item removed"}
 
+def batch_write_request(watchlist_id: str, operation: WatchlistBatchOperation, existing: set, targets: set):
+    """Turn one batch operation into a bulk write request, or an error message.
+
+    Returns (request, None) or (None, error); an add returns the new item
+    in place of the error. `existing` is the set of item ids in the watchlist
+    and is kept up to date, so each operation sees the effect of earlier ones.
+    """
+    if operation.op == "add":
+        if operation.item is None:
+            return None, "Missing item"
+        item = WatchlistItem(**operation.item.model_dump()).model_dump()
+        existing.add(item["id"])
+        return InsertOne({**item, "watchlist_id": watchlist_id}), item
+    if operation.item_id not in existing:
+        return None, "Item not found"
+    query = {"id": operation.item_id, "watchlist_id": watchlist_id}
+    if operation.op == "remove":
+        existing.discard(operation.item_id)
+        return DeleteOne(query), None
+    if operation.op == "update":
+        if not operation.status:
+            return None, "Missing status"
+        return UpdateOne(query, {"$set": {"status": operation.status}}), None
+    if operation.watchlist_id == watchlist_id:
+        return None, "Item is already in this watchlist"
+    if operation.watchlist_id not in targets:
+        return None, "Target watchlist not found"
+    changes = {"watchlist_id": operation.watchlist_id}
+    if operation.status:
+        changes["status"] = operation.status
+    existing.discard(operation.item_id)
+    return UpdateOne(query, {"$set": changes}), None
+
+@api_router.post("/watchlists/{watchlist_id}/items:batch")
+async def batch_update_watchlist(watchlist_id: str, batch: WatchlistBatchRequest):
+    """Apply many add/update/remove/move operations with one bulk write.
+
+    Returns one result per operation: "ok", "error" (with a message) or
+    "skipped" when an earlier operation failed in an ordered batch.
+    """
+    watchlist = await db.watchlists.find_one({"id": watchlist_id}, {"_id": 0, "id": 1, "items": 1})
+    if not watchlist:
+        raise HTTPException(status_code=404, detail="Watchlist not found")
+    if watchlist.get("items"):
+        await migrate_embedded_items(watchlist)
+    
+    operations = batch.operations
+    item_ids = list({op.item_id for op in operations if op.item_id})
+    existing = set(await db.watchlist_items.distinct(
+        "id", {"watchlist_id": watchlist_id, "id": {"$in": item_ids}}
+    )) if item_ids else set()
+    target_ids = list({op.watchlist_id for op in operations if op.op == "move" and op.watchlist_id} - {watchlist_id})
+    targets = await get_move_targets(watchlist_id, target_ids)
+    
+    results = [{"index": i, "op": op.op, "status": "skipped"} for i, op in enumerate(operations)]
+    requests, request_ops = [], []
+    for i, operation in enumerate(operations):
+        request, detail = batch_write_request(watchlist_id, operation, existing, targets)
+        if request is None:
+            results[i].update(status="error", error=detail)
+            if batch.ordered:
+                break
+            continue
+        requests.append(request)
+        request_ops.append(i)
+        results[i]["status"] = "ok"
+        if operation.op == "add":
+            results[i]["item"] = detail
+    
+    if requests:
+        try:
+            await db.watchlist_items.bulk_write(requests, ordered=batch.ordered)
+        except BulkWriteError as e:
+            for write_error in e.details.get("writeErrors", []):
+                i = request_ops[write_error["index"]]
+                results[i].pop("item", None)
+                results[i]["status"] = "error"
+                results[i]["error"] = (
+                    "Item already in watchlist" if write_error.get("code") == 11000 else write_error.get("errmsg")
+                )
+                if batch.ordered:
+                    # Mongo stops at the first error, so nothing after it ran
+                    for later in results[i + 1:]:
+                        later.pop("item", None)
+                        later.pop("error", None)
+                        later["status"] = "skipped"
+        await bump_revision(watchlist_id, *targets)
+        for result in results:
+            if "item" in result:
+                index_watchlist_item(result["item"])
+    return {"results": results}
+
 # ==================== TMDB ENDPOINTS ====================
 
-@api_router.get("/tmdb/genres")
+# Movie genres served when TMDB is not configured, and names for user stats
+DEFAULT_GENRES = [
+    {"id": 28, "name": "Action"},
+    {"id": 12, "name": "Adventure"},
+    {"id": 16, "name": "Animation"},
+    {"id": 35, "name": "Comedy"},
+    {"id": 80, "name": "Crime"},
+    {"id": 99, "name": "Documentary"},
+    {"id": 18, "name": "Drama"},
+    {"id": 10751, "name": "Family"},
+    {"id": 14, "name": "Fantasy"},
+    {"id": 36, "name": "History"},
+    {"id": 27, "name": "Horror"},
+    {"id": 10402, "name": "Music"},
+    {"id": 9648, "name": "Mystery"},
+    {"id": 10749, "name": "Romance"},
+    {"id": 878, "name": "Science Fiction"},
+    {"id": 10770, "name": "TV Movie"},
+    {"id": 53, "name": "Thriller"},
+    {"id": 10752, "name": "War"},
+    {"id": 37, "name": "Western"},
+]
+
+@api_router.get("/tmdb/genres", response_class=FastJSONResponse)
 async def get_genres(media_type: str = "movie"):
     """Get all genres for movies or TV"""
     data = await tmdb_request(f"/genre/{media_type}/list")
     if not data:
         # Return default genres if TMDB is not configured
-        return {"genres": [
-            {"id": 28, "name": "Action"},
-            {"id": 12, "name": "Adventure"},
-            {"id": 16, "name": "Animation"},
-            {"id": 35, "name": "Comedy"},
-            {"id": 80, "name": "Crime"},
-            {"id": 99, "name": "Documentary"},
-            {"id": 18, "name": "Drama"},
-            {"id": 10751, "name": "Family"},
-            {"id": 14, "name": "Fantasy"},
-            {"id": 36, "name": "History"},
-            {"id": 27, "name": "Horror"},
-            {"id": 10402, "name": "Music"},
-            {"id": 9648, "name": "Mystery"},
-            {"id": 10749, "name": "Romance"},
-            {"id": 878, "name": "Science Fiction"},
-            {"id": 10770, "name": "TV Movie"},
-            {"id": 53, "name": "Thriller"},
-            {"id": 10752, "name": "War"},
-            {"id": 37, "name": "Western"},
-        ]}
+        return {"genres": DEFAULT_GENRES}
     return data
 
-@api_router.get("/tmdb/trending")
+@api_router.get("/tmdb/trending", response_class=FastJSONResponse)
 async def get_trending(media_type: str = "all", time_window: str = "week", page: int = 1):
     """Get trending movies/TV shows"""
-    data = await tmdb_request(f"/trending/{media_type}/{time_window}", {"page": page})
-    if not data:
-        return {"results": [], "page": 1, "total_pages": 0, "total_results": 0}
-    
-    results = [normalize_media_item(item) for item in data.get("results", [])]
-    return {
-        "results": results,
-        "page": data.get("page", 1),
-        "total_pages": data.get("total_pages", 0),
-        "total_results": data.get("total_results", 0)
-    }
+    data = await tmdb_response("trending", f"/trending/{media_type}/{time_window}", {"page": page}, normalize_page)
+    return data or empty_page()
 
-@api_router.get("/tmdb/movie/now-playing")
+@api_router.get("/tmdb/movie/now-playing", response_class=FastJSONResponse)
 async def get_now_playing(page: int = 1):
     """Get movies currently in theaters"""
-    data = await tmdb_request("/movie/now_playing", {"page": page})
-    if not data:
-        return {"results": [], "page": 1, "total_pages": 0, "total_results": 0}
-    
-    results = [normalize_media_item(item, "movie") for item in data.get("results", [])]
-    return {
-        "results": results,
-        "page": data.get("page", 1),
-        "total_pages": data.get("total_pages", 0),
-        "total_results": data.get("total_results", 0)
-    }
+    data = await tmdb_response("now_playing", "/movie/now_playing", {"page": page}, movie_page)
+    return data or empty_page()
 
-@api_router.get("/tmdb/movie/upcoming")
+@api_router.get("/tmdb/movie/upcoming", response_class=FastJSONResponse)
 async def get_upcoming(page: int = 1):
     """Get upcoming movies"""
-    data = await tmdb_request("/movie/upcoming", {"page": page})
-    if not data:
-        return {"results": [], "page": 1, "total_pages": 0, "total_results": 0}
-    
-    results = [normalize_media_item(item, "movie") for item in data.get("results", [])]
-    return {
-        "results": results,
-        "page": data.get("page", 1),
-        "total_pages": data.get("total_pages", 0),
-        "total_results": data.get("total_results", 0)
-    }
+    data = await tmdb_response("upcoming", "/movie/upcoming", {"page": page}, movie_page)
+    return data or empty_page()
 
-@api_router.get("/tmdb/movie/popular")
+@api_router.get("/tmdb/movie/popular", response_class=FastJSONResponse)
 async def get_popular_movies(page: int = 1):
-    """Get popular movies"""
-    data = await tmdb_request("/movie/popular", {"page": page})
-    if not data:
-        return {"results": [], "page": 1, "total_pages": 0, "total_results": 0}
-    
-    results = [normalize_media_item(item, "movie") for item in data.get("results", [])]
-    return {
-        "results": results,
-        "page": data.get("page", 1),
-        "total_pages": data.get("total_pages", 0),
-        "total_results": data.get("total_results", 0)
-    }
+    """Get popular movies, from the catalog mirror once it covers them"""
+    local = await catalog_page("movie", "popularity", page, require_coverage=True)
+    if local is not None:
+        return local
+    data = await tmdb_response("popular_movies", "/movie/popular", {"page": page}, movie_page)
+    return data or await catalog_page("movie", "popularity", page) or empty_page()
 
-@api_router.get("/tmdb/movie/top-rated")
+@api_router.get("/tmdb/movie/top-rated", response_class=FastJSONResponse)
 async def get_top_rated_movies(page: int = 1):
-    """Get top rated movies"""
-    data = await tmdb_request("/movie/top_rated", {"page": page})
-    if not data:
-        return {"results": [], "page": 1, "total_pages": 0, "total_results": 0}
-    
-    results = [normalize_media_item(item, "movie") for item in data.get("results", [])]
-    return {
-        "results": results,
-        "page": data.get("page", 1),
-        "total_pages": data.get("total_pages", 0),
-        "total_results": data.get("total_results", 0)
-    }
+    """Get top rated movies, from the catalog mirror once it covers them"""
+    local = await catalog_page("movie", "vote_average", page, require_coverage=True)
+    if local is not None:
+        return local
+    data = await tmdb_response("top_rated_movies", "/movie/top_rated", {"page": page}, movie_page)
+    return data or await catalog_page("movie", "vote_average", page) or empty_page()
 
-@api_router.get("/tmdb/tv/popular")
+@api_router.get("/tmdb/tv/popular", response_class=FastJSONResponse)
 async def get_popular_tv(page: int = 1):
-    """Get popular TV shows"""
-    data = await tmdb_request("/tv/popular", {"page": page})
-    if not data:
-        return {"results": [], "page": 1, "total_pages": 0, "total_results": 0}
-    
-    results = [normalize_media_item(item, "tv") for item in data.get("results", [])]
-    return {
-        "results": results,
-        "page": data.get("page", 1),
-        "total_pages": data.get("total_pages", 0),
-        "total_results": data.get("total_results", 0)
-    }
+    """Get popular TV shows, from the catalog mirror once it covers them"""
+    local = await catalog_page("tv", "popularity", page, require_coverage=True)
+    if local is not None:
+        return local
+    data = await tmdb_response("popular_tv", "/tv/popular", {"page": page}, tv_page)
+    return data or await catalog_page("tv", "popularity", page) or empty_page()
 
-@api_router.get("/tmdb/tv/top-rated")
+@api_router.get("/tmdb/tv/top-rated", response_class=FastJSONResponse)
 async def get_top_rated_tv(page: int = 1):
-    """Get top rated TV shows"""
-    data = await tmdb_request("/tv/top_rated", {"page": page})
-    if not data:
-        return {"results": [], "page": 1, "total_pages": 0, "total_results": 0}
-    
-    results = [normalize_media_item(item, "tv") for item in data.get("results", [])]
-    return {
-        "results": results,
-        "page": data.get("page", 1),
-        "total_pages": data.get("total_pages", 0),
-        "total_results": data.get("total_results", 0)
-    }
+    """Get top rated TV shows, from the catalog mirror once it covers them"""
+    local = await catalog_page("tv", "vote_average", page, require_coverage=True)
+    if local is not None:
+        return local
+    data = await tmdb_response("top_rated_tv", "/tv/top_rated", {"page": page}, tv_page)
+    return data or await catalog_page("tv", "vote_average", page) or empty_page()
 
-@api_router.get("/tmdb/tv/on-the-air")
+@api_router.get("/tmdb/tv/on-the-air", response_class=FastJSONResponse)
 async def get_on_the_air(page: int = 1):
     """Get TV shows currently on air"""
-    data = await tmdb_request("/tv/on_the_air", {"page": page})
-    if not data:
-        return {"results": [], "page": 1, "total_pages": 0, "total_results": 0}
-    
-    results = [normalize_media_item(item, "tv") for item in data.get("results", [])]
-    return {
-        "results": results,
-        "page": data.get("page", 1),
-        "total_pages": data.get("total_pages", 0),
-        "total_results": data.get("total_results", 0)
-    }
+    data = await tmdb_response("on_the_air", "/tv/on_the_air", {"page": page}, tv_page)
+    return data or empty_page()
 
-@api_router.get("/tmdb/search")
+@api_router.get("/tmdb/search", response_class=FastJSONResponse)
 async def search_multi(query: str, page: int = 1):
     """Search movies, TV shows, and people"""
-    data = await tmdb_request("/search/multi", {"query": query, "page": page})
-    if not data:
-        return {"results": [], "page": 1, "total_pages": 0, "total_results": 0}
-    
-    # Filter out person results, only keep movies and TV
-    results = [
-        normalize_media_item(item)
-        for item in data.get("results", [])
-        if item.get("media_type") in ["movie", "tv"]
-    ]
-    return {
-        "results": results,
-        "page": data.get("page", 1),
-        "total_pages": data.get("total_pages", 0),
-        "total_results": data.get("total_results", 0)
-    }
+    data = await tmdb_response(
+        "search", "/search/multi", {"query": query, "page": page}, search_page, priority=Priority.INTERACTIVE
+    )
+    return data or await catalog_page(None, "popularity", page, query) or empty_page()
 
-@api_router.get("/tmdb/discover/{media_type}")
+@api_router.get("/tmdb/discover/{media_type}", response_class=FastJSONResponse)
 async def discover(
     media_type: str,
-    page: int = 1,
+    page: int = Query(1, ge=1),
     sort_by: Optional[str] = "popularity.desc",
     with_genres: Optional[str] = None,
     year: Optional[int] = None,
@@ -475,15 +1272,31 @@ async def discover(
     vote_average_lte: Optional[float] = None,
     with_watch_providers: Optional[str] = None,
     with_original_language: Optional[str] = None,
-    watch_region: str = "US"
+    watch_region: str = "US",
+    vote_count_gte: Optional[int] = None
 ):
-    """Discover movies/TV with filters"""
+    """Discover movies/TV with filters, locally when the catalog covers them"""
+    filters = {
+        "with_genres": with_genres,
+        "year": year,
+        "vote_average_gte": vote_average_gte,
+        "vote_average_lte": vote_average_lte,
+        "vote_count_gte": vote_count_gte,
+        "with_original_language": with_original_language,
+        "with_watch_providers": with_watch_providers,
+        "watch_region": watch_region,
+    }
+    local = discover_locally(media_type, sort_by, page, filters)
+    if local is not None:
+        return local
+    
     params = {
         "page": page,
         "sort_by": sort_by,
         "with_genres": with_genres,
         "vote_average.gte": vote_average_gte,
         "vote_average.lte": vote_average_lte,
+        "vote_count.gte": vote_count_gte,
         "with_watch_providers": with_watch_providers,
         "watch_region": watch_region if with_watch_providers else None,
         "with_original_language": with_original_language
@@ -494,28 +1307,29 @@ async def discover(
     elif media_type == "tv" and year:
         params["first_air_date_year"] = year
     
-    data = await tmdb_request(f"/discover/{media_type}", params)
-    if not data:
-        return {"results": [], "page": 1, "total_pages": 0, "total_results": 0}
-    
-    results = [normalize_media_item(item, media_type) for item in data.get("results", [])]
+    data = await tmdb_response(
+        "discover", f"/discover/{media_type}", params, lambda data: normalize_page(data, media_type)
+    )
+    return data or discover_locally(media_type, sort_by, page, filters, require_coverage=False) or empty_page()
+
+NO_PROVIDERS = {"flatrate": [], "rent": [], "buy": []}
+
+def watch_providers_by_region(data: Dict) -> Dict:
+    """The flatrate/rent/buy providers of every region in a TMDB watch/providers block"""
     return {
-        "results": results,
-        "page": data.get("page", 1),
-        "total_pages": data.get("total_pages", 0),
-        "total_results": data.get("total_results", 0)
+        region: {kind: providers.get(kind, []) for kind in NO_PROVIDERS}
+        for region, providers in data.get("watch/providers", {}).get("results", {}).items()
     }
 
-@api_router.get("/tmdb/movie/{movie_id}")
-async def get_movie_details(movie_id: int):
-    """Get detailed movie information"""
-    data = await tmdb_request(
-        f"/movie/{movie_id}",
-        {"append_to_response": "credits,videos,watch/providers,external_ids,recommendations"}
-    )
-    if not data:
-        raise HTTPException(status_code=404, detail="Movie not found")
-    
+def region_details(data: Dict, watch_region: str) -> Dict:
+    """A cached detail response with only the streaming providers of one region"""
+    details = {**data}
+    details["streaming"] = details.pop("watch_providers").get(watch_region.upper(), NO_PROVIDERS)
+    return details
+
+def movie_details(data: Dict) -> Dict:
+    """The movie detail response built from a TMDB payload, before the region
+    is picked and ratings are added"""
     # Get trailer
     trailer_url = None
     videos = data.get("videos", {}).get("results", [])
@@ -524,10 +1338,7 @@ async def get_movie_details(movie_id: int):
             trailer_url = f"https://www.youtube.com/embed/{video['key']}"
             break
     
-    # Get streaming providers for US
-    providers = data.get("watch/providers", {}).get("results", {}).get("US", {})
-    
-    return {
+    details = {
         **normalize_media_item(data, "movie"),
         "runtime": data.get("runtime"),
         "status": data.get("status"),
@@ -555,27 +1366,28 @@ async def get_movie_details(movie_id: int):
             if c.get("job") in ["Director", "Writer", "Screenplay"]
         ],
         "trailer_url": trailer_url,
-        "streaming": {
-            "flatrate": providers.get("flatrate", []),
-            "rent": providers.get("rent", []),
-            "buy": providers.get("buy", [])
-        },
+        "watch_providers": watch_providers_by_region(data),
         "recommendations": [
             normalize_media_item(r, "movie")
             for r in data.get("recommendations", {}).get("results", [])[:8]
         ]
     }
+    return details
 
-@api_router.get("/tmdb/tv/{tv_id}")
-async def get_tv_details(tv_id: int):
-    """Get detailed TV show information"""
-    data = await tmdb_request(
-        f"/tv/{tv_id}",
-        {"append_to_response": "credits,videos,watch/providers,external_ids,recommendations"}
-    )
+@api_router.get("/tmdb/movie/{movie_id}", response_class=FastJSONResponse)
+async def get_movie_details(movie_id: int, include_ratings: bool = False, watch_region: str = "US"):
+    """Get detailed movie information, optionally with OMDB ratings inlined"""
+    data, omdb_data = await tmdb_details("movie", movie_id, include_ratings)
     if not data:
-        raise HTTPException(status_code=404, detail="TV show not found")
-    
+        raise HTTPException(status_code=404, detail="Movie not found")
+    details = region_details(data, watch_region)
+    if include_ratings:
+        details["omdb"] = parse_omdb_ratings(omdb_data)
+    return details
+
+def tv_details(data: Dict) -> Dict:
+    """The TV show detail response built from a TMDB payload, before the region
+    is picked and ratings are added"""
     # Get trailer
     trailer_url = None
     videos = data.get("videos", {}).get("results", [])
@@ -584,10 +1396,7 @@ async def get_tv_details(tv_id: int):
             trailer_url = f"https://www.youtube.com/embed/{video['key']}"
             break
     
-    # Get streaming providers for US
-    providers = data.get("watch/providers", {}).get("results", {}).get("US", {})
-    
-    return {
+    details = {
         **normalize_media_item(data, "tv"),
         "number_of_seasons": data.get("number_of_seasons"),
         "number_of_episodes": data.get("number_of_episodes"),
@@ -619,73 +1428,868 @@ async def get_tv_details(tv_id: int):
             if c.get("job") in ["Executive Producer", "Creator"]
         ],
         "trailer_url": trailer_url,
-        "streaming": {
-            "flatrate": providers.get("flatrate", []),
-            "rent": providers.get("rent", []),
-            "buy": providers.get("buy", [])
-        },
+        "watch_providers": watch_providers_by_region(data),
         "recommendations": [
             normalize_media_item(r, "tv")
             for r in data.get("recommendations", {}).get("results", [])[:8]
         ]
     }
+    return details
 
-@api_router.get("/tmdb/watch-providers")
+@api_router.get("/tmdb/tv/{tv_id}", response_class=FastJSONResponse)
+async def get_tv_details(tv_id: int, include_ratings: bool = False, watch_region: str = "US"):
+    """Get detailed TV show information, optionally with OMDB ratings inlined"""
+    data, omdb_data = await tmdb_details("tv", tv_id, include_ratings)
+    if not data:
+        raise HTTPException(status_code=404, detail="TV show not found")
+    details = region_details(data, watch_region)
+    if include_ratings:
+        details["omdb"] = parse_omdb_ratings(omdb_data)
+    return details
+
+def summarize_details(data: Dict, media_type: str, watch_region: str = "US") -> Dict:
+    """Compact summary of a detail response for list views"""
+    providers = data["watch_providers"].get(watch_region.upper(), NO_PROVIDERS)
+    if media_type == "movie":
+        runtime = data.get("runtime")
+    else:
+        runtime = next(iter(data.get("episode_run_time") or []), None)
+    return {
+        "id": data.get("id"),
+        "media_type": media_type,
+        "title": data.get("title"),
+        "poster_path": data.get("poster_path"),
+        "release_date": data.get("release_date"),
+        "vote_average": data.get("vote_average"),
+        "runtime": runtime,
+        "number_of_seasons": data.get("number_of_seasons"),
+        "genres": [g["name"] for g in data.get("genres", [])],
+        "imdb_id": data.get("imdb_id"),
+        "streaming": [p["provider_name"] for p in providers["flatrate"]],
+    }
+
+@api_router.post("/tmdb/batch", response_class=FastJSONResponse)
+async def get_titles_batch(batch: TitleBatchRequest):
+    """Get compact summaries for many titles at once.
+
+    Returns whatever could be fetched; titles that failed are listed in
+    `errors` instead of failing the whole batch.
+    """
+    refs = list(dict.fromkeys((ref.media_type, ref.tmdb_id) for ref in batch.items))
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def summarize(media_type: str, tmdb_id: int):
+        if media_type not in ("movie", "tv"):
+            return None, "Unsupported media type"
+        failures = []
+        token = upstream_failures.set(failures)
+        async with semaphore:
+            try:
+                data, _ = await tmdb_details(media_type, tmdb_id)
+            except HTTPException as e:
+                return None, e.detail
+            finally:
+                upstream_failures.reset(token)
+        if not data:
+            # A 5xx or network failure isn't a missing title
+            return None, "Not found" if all(is_not_found(e) for e in failures) else "Upstream error"
+        return summarize_details(data, media_type, batch.watch_region), None
+    
+    outcomes = await asyncio.gather(*(summarize(mt, tmdb_id) for mt, tmdb_id in refs))
+    results, errors = [], []
+    for (media_type, tmdb_id), (summary, error) in zip(refs, outcomes):
+        if summary is not None:
+            results.append(summary)
+        else:
+            errors.append({"media_type": media_type, "tmdb_id": tmdb_id, "error": error})
+    return {"results": results, "errors": errors}
+
+@api_router.get("/tmdb/watch-providers", response_class=FastJSONResponse)
 async def get_watch_providers(watch_region: str = "US"):
     """Get available streaming providers"""
-    movie_providers = await tmdb_request("/watch/providers/movie", {"watch_region": watch_region})
-    tv_providers = await tmdb_request("/watch/providers/tv", {"watch_region": watch_region})
-    
-    # Merge and deduplicate providers
-    all_providers = {}
-    for p in (movie_providers or {}).get("results", []) + (tv_providers or {}).get("results", []):
-        if p["provider_id"] not in all_providers:
-            all_providers[p["provider_id"]] = {
-                "provider_id": p["provider_id"],
-                "provider_name": p["provider_name"],
-                "logo_path": get_image_url(p.get("logo_path"), "w92")
-            }
+    if not TMDB_API_KEY:
+        return {"providers": []}
+    watch_region = watch_region.upper()
+    params = {"watch_region": watch_region}
+    
+    async def fetch():
+        # Both lists or neither: a half-merged list shouldn't be cached for a day
+        movie_providers, tv_providers = await asyncio.gather(
+            fetch_tmdb("/watch/providers/movie", params), fetch_tmdb("/watch/providers/tv", params)
+        )
+        
+        # Merge and deduplicate providers
+        all_providers = {}
+        for p in movie_providers.get("results", []) + tv_providers.get("results", []):
+            if p["provider_id"] not in all_providers:
+                all_providers[p["provider_id"]] = {
+                    "provider_id": p["provider_id"],
+                    "provider_name": p["provider_name"],
+                    "logo_path": get_image_url(p.get("logo_path"), "w92")
+                }
+        return {"providers": list(all_providers.values())}
     
-    return {"providers": list(all_providers.values())}
+    cache_key = f"watch_providers_{watch_region}"
+    data = await cached_upstream(cache_key, "config", fetch)
+    note_cache_dependency(cache_key, data)
+    return data or {"providers": []}
 
-# ==================== OMDB ENDPOINTS ====================
+# ==================== HOME ENDPOINT ====================
 
-@api_router.get("/omdb/{imdb_id}")
-async def get_omdb_ratings(imdb_id: str):
-    """Get IMDb and Rotten Tomatoes ratings from OMDB"""
-    data = await omdb_request(imdb_id)
-    if not data:
-        return {"ratings": None}
+async def build_home() -> Dict:
+    """Fetch every home page row concurrently and pick the hero item"""
+    trending, now_playing, popular_movies, on_the_air, popular_tv = await asyncio.gather(
+        get_trending("all", "week"),
+        get_now_playing(),
+        get_popular_movies(),
+        get_on_the_air(),
+        get_popular_tv(),
+    )
+    hero = next((item for item in trending["results"] if item["backdrop_path"]), None)
+    if hero is None and trending["results"]:
+        hero = trending["results"][0]
+    home = {
+        "hero": hero,
+        "trending": trending["results"],
+        "now_playing": now_playing["results"],
+        "popular_movies": popular_movies["results"],
+        "on_the_air": on_the_air["results"],
+        "popular_tv": popular_tv["results"],
+    }
+    # Don't pin a partially empty page (demo mode or an upstream outage)
+    if all(home[row] for row in ("trending", "now_playing", "popular_movies", "on_the_air", "popular_tv")):
+        stored = cache.set("home", home, "lists", CACHE_TTL_HOME)
+        if stored is not None:
+            return stored.value
+    return home
+
+@api_router.get("/home", response_class=FastJSONResponse)
+async def get_home():
+    """Get all home page rows and the hero item in one response"""
+    home = cache.get("home")
+    if home is None:
+        home = await inflight.do("home", build_home)
+    note_cache_dependency("home", home)
+    return home
+
+# ==================== CACHE WARMER ====================
+
+# Each run re-requests the hot keys (home rows, genres, providers) and the
+# detail pages of the top trending/popular titles and of watchlisted titles
+# with `warm_run` set, so `cached_upstream` refreshes whatever is about to
+# expire at background priority and leaves everything else alone.
+
+warmer_status: Dict[str, Any] = {
+    "enabled": CACHE_WARM_ENABLED,
+    "running": False,
+    "runs": 0,
+    "last_started": None,
+    "last_finished": None,
+    "last_duration_ms": None,
+    "last_jobs": 0,
+    "last_checked": 0,
+    "last_refreshed": 0,
+    "last_errors": 0,
+    "next_run": None,
+}
+
+async def watchlist_titles(limit: int) -> List[tuple]:
+    """The most watchlisted (media_type, tmdb_id) pairs"""
+    pipeline = [
+        {"$group": {"_id": {"media_type": "$media_type", "tmdb_id": "$tmdb_id"}, "n": {"$sum": 1}}},
+        {"$sort": {"n": -1}},
+        {"$limit": limit},
+    ]
+    try:
+        docs = await db.watchlist_items.aggregate(pipeline).to_list(limit)
+    except Exception as e:
+        logger.warning(f"Cache warmer could not read watchlist titles: {e}")
+        return []
+    return [(doc["_id"]["media_type"], doc["_id"]["tmdb_id"]) for doc in docs]
+
+def top_titles(home: Dict, n: int) -> List[tuple]:
+    """(media_type, tmdb_id) of the first `n` titles of the trending and popular rows"""
+    titles = []
+    for row in ("trending", "popular_movies", "popular_tv"):
+        titles += [(item["media_type"], item["id"]) for item in home[row][:n]]
+    return [(media_type, tmdb_id) for media_type, tmdb_id in titles if media_type in ("movie", "tv")]
+
+async def warm_cache_once() -> Dict[str, Any]:
+    """Run every warm job once within the concurrency budget"""
+    run = {"checked": 0, "refreshed": 0, "errors": 0}
+    token = warm_run.set(run)
+    semaphore = asyncio.Semaphore(CACHE_WARM_CONCURRENCY)
     
-    ratings = {
-        "imdb": None,
-        "rotten_tomatoes": None,
-        "metacritic": None
+    async def job(coro):
+        async with semaphore:
+            try:
+                return await coro
+            except Exception as e:
+                run["errors"] += 1
+                logger.warning(f"Cache warm job failed: {e}")
+    
+    started = time.time()
+    warmer_status.update(running=True, last_started=datetime.fromtimestamp(started, timezone.utc).isoformat())
+    try:
+        jobs = [get_genres("movie"), get_genres("tv"), get_watch_providers()]
+        home, *_ = await asyncio.gather(job(build_home()), *(job(j) for j in jobs))
+        titles = top_titles(home, CACHE_WARM_TOP_N) if home else []
+        titles += await watchlist_titles(CACHE_WARM_WATCHLIST_TITLES)
+        titles = list(dict.fromkeys(titles))
+        await asyncio.gather(*(job(tmdb_details(media_type, tmdb_id)) for media_type, tmdb_id in titles))
+        run["jobs"] = 1 + len(jobs) + len(titles)
+    finally:
+        warm_run.reset(token)
+        warmer_status.update(
+            running=False,
+            runs=warmer_status["runs"] + 1,
+            last_finished=datetime.now(timezone.utc).isoformat(),
+            last_duration_ms=round((time.time() - started) * 1000),
+            last_jobs=run.get("jobs", 0),
+            last_checked=run["checked"],
+            last_refreshed=run["refreshed"],
+            last_errors=run["errors"],
+        )
+    return run
+
+async def run_cache_warmer():
+    """Warm the cache every CACHE_WARM_INTERVAL (+/- jitter) seconds until cancelled"""
+    # Stagger the first run so replicas started together don't warm in lockstep
+    await asyncio.sleep(random.uniform(0, CACHE_WARM_JITTER))
+    while True:
+        try:
+            run = await warm_cache_once()
+            if run["refreshed"]:
+                logger.info(f"Cache warmer refreshed {run['refreshed']} of {run['checked']} keys")
+        except Exception as e:
+            logger.error(f"Cache warm run failed: {e}")
+        delay = max(1.0, CACHE_WARM_INTERVAL + random.uniform(-CACHE_WARM_JITTER, CACHE_WARM_JITTER))
+        warmer_status["next_run"] = datetime.fromtimestamp(time.time() + delay, timezone.utc).isoformat()
+        await asyncio.sleep(delay)
+
+# ==================== CACHE SNAPSHOTS ====================
+
+def restore_cache_snapshot():
+    """Load the snapshot written by the previous process, if it is usable"""
+    try:
+        stats = cache.load_snapshot(CACHE_SNAPSHOT_PATH, CACHE_SNAPSHOT_MAX_AGE, CACHE_SNAPSHOT_LOAD_BUDGET)
+    except FileNotFoundError:
+        logger.info(f"No cache snapshot at {CACHE_SNAPSHOT_PATH}, starting cold")
+        return
+    except (SnapshotError, OSError, ValueError) as e:
+        logger.warning(f"Ignoring cache snapshot {CACHE_SNAPSHOT_PATH}: {e}")
+        snapshot_status["last_load"] = {"error": str(e)}
+        return
+    snapshot_status["last_load"] = stats
+    logger.info(
+        f"Restored {stats['loaded']} cache entries in {stats['load_ms']} ms "
+        f"({stats['expired']} expired, {stats['corrupt']} corrupt, {stats['over_budget']} over budget)"
+    )
+
+async def save_cache_snapshot():
+    """Write the cache to disk off the event loop"""
+    try:
+        stats = await asyncio.to_thread(write_snapshot, CACHE_SNAPSHOT_PATH, cache.items_by_recency())
+    except OSError as e:
+        logger.error(f"Could not write cache snapshot {CACHE_SNAPSHOT_PATH}: {e}")
+        return
+    snapshot_status["last_save"] = {**stats, "at": datetime.now(timezone.utc).isoformat()}
+
+async def run_cache_snapshots(interval: float):
+    """Snapshot the cache every `interval` seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        await save_cache_snapshot()
+
+# ==================== CATALOG MIRROR ====================
+
+# TMDB publishes a gzipped JSON-lines file of every movie and TV id each day.
+# The newest file found in CATALOG_EXPORT_DIR is bulk-upserted into the
+# `catalog` collection, then titles are enriched through the detail endpoint
+# (most popular first, a batch per sync run) and TMDB's changes feed queues
+# titles edited since the export for re-enrichment. Once a media type has
+# CATALOG_LISTS_MIN_TITLES enriched titles its popular and top rated lists
+# are answered from the mirror without a TMDB round trip; before that, and
+# for search (whose TMDB results include people and are ranked by relevance),
+# the mirror only answers when TMDB can't. List totals are counted once per
+# sync, and never past the 500 pages TMDB serves either.
+
+CATALOG_PAGE_SIZE = 20
+CATALOG_MIN_VOTES = 200  # top rated lists leave out titles with fewer votes
+CATALOG_CHANGES_MAX_DAYS = 14  # the widest range TMDB's changes endpoints accept
+CATALOG_APPEND = "watch/providers,keywords,credits"
+CATALOG_MAX_PAGES = 500
+
+# Enriched titles per media type and list totals, as of the last sync that changed something
+catalog_enriched: Dict[str, int] = {}
+catalog_totals: Dict[tuple, int] = {}
+
+catalog_status: Dict[str, Any] = {
+    "enabled": bool(CATALOG_EXPORT_DIR),
+    "running": False,
+    "runs": 0,
+    "last_finished": None,
+    "last_duration_ms": None,
+    "last_run": None,
+    "next_run": None,
+}
+
+def catalog_entry(data: Dict, media_type: str) -> Dict:
+    """The catalog fields of a TMDB detail payload: a normalized list item
+    plus what local filtering and recommendations need"""
+    item = normalize_media_item(data, media_type)
+    # Detail payloads carry genre objects rather than genre_ids
+    item["genre_ids"] = [g["id"] for g in data.get("genres", [])]
+    if media_type == "movie":
+        runtime = data.get("runtime")
+        keywords = data.get("keywords", {}).get("keywords", [])
+    else:
+        runtime = next(iter(data.get("episode_run_time") or []), None)
+        keywords = data.get("keywords", {}).get("results", [])
+    return {
+        **item,
+        "adult": bool(data.get("adult", False)),
+        "original_language": data.get("original_language"),
+        "runtime": runtime,
+        "keyword_ids": [k["id"] for k in keywords],
+        "cast_ids": [c["id"] for c in data.get("credits", {}).get("cast", [])[:10]],
+        # Flatrate provider ids per region
+        "providers": {
+            region: [p["provider_id"] for p in providers.get("flatrate", [])]
+            for region, providers in data.get("watch/providers", {}).get("results", {}).items()
+        },
+    }
+
+async def catalog_page(media_type: Optional[str], sort: str, page: int, query: Optional[str] = None,
+                       require_coverage: bool = False) -> Optional[Dict]:
+    """A list page answered from the local catalog, None if the mirror is off or has nothing
+    (or, with `require_coverage`, doesn't hold enough of the media type to replace TMDB)"""
+    if not CATALOG_EXPORT_DIR:
+        return None
+    if require_coverage and not 0 < CATALOG_LISTS_MIN_TITLES <= catalog_enriched.get(media_type, 0):
+        return None
+    filters: Dict[str, Any] = {}
+    if media_type:
+        filters["media_type"] = media_type
+    if sort == "vote_average":
+        filters["vote_count"] = {"$gte": CATALOG_MIN_VOTES}
+    if query:
+        filters["$text"] = {"$search": query}
+    totals_key = (media_type, sort, query)
+    try:
+        results, total = await catalog.page(
+            filters, sort, page, CATALOG_PAGE_SIZE,
+            total=catalog_totals.get(totals_key), max_total=CATALOG_MAX_PAGES * CATALOG_PAGE_SIZE,
+        )
+    except Exception as e:
+        logger.warning(f"Catalog query failed: {e}")
+        return None
+    if query is None:
+        catalog_totals[totals_key] = total
+    if not total:
+        return None
+    return {
+        "results": results,
+        "page": page,
+        "total_pages": math.ceil(total / CATALOG_PAGE_SIZE),
+        "total_results": total,
     }
+
+async def ingest_catalog_exports() -> Dict[str, Any]:
+    """Ingest the newest export of each media type if it hasn't been yet"""
+    stats = {}
+    for media_type in ("movie", "tv"):
+        export = latest_export(CATALOG_EXPORT_DIR, media_type)
+        if export is None:
+            continue
+        path, export_date = export
+        state = await catalog.get_state(media_type)
+        if state.get("export_date", "") >= export_date.isoformat():
+            continue
+        try:
+            ingested = await catalog.ingest(path, media_type, export_date, CATALOG_INGEST_BATCH)
+        except (OSError, EOFError) as e:
+            # A partly read file mustn't prune the titles after the break
+            logger.error(f"Could not read catalog export {path}: {e}")
+            stats[media_type] = {"error": str(e)}
+            continue
+        ingested["pruned"] = await catalog.prune(media_type, export_date)
+        # The export is a snapshot of its day, later edits come from the changes feed
+        changes_through = max(state.get("changes_through", ""), export_date.isoformat())
+        await catalog.set_state(media_type, export_date=export_date.isoformat(), changes_through=changes_through)
+        stats[media_type] = ingested
+        logger.info(
+            f"Ingested {ingested['read']} {media_type} titles from {path} "
+            f"({ingested['upserted']} new, {ingested['pruned']} pruned, {ingested['skipped']} bad lines)"
+        )
+    return stats
+
+async def fetch_catalog_changes(media_type: str, start: date, end: date) -> List[int]:
+    """Ids of titles TMDB reports as changed between `start` and `end`"""
+    ids, page, total_pages = [], 1, 1
+    while page <= total_pages:
+        data = await fetch_tmdb(
+            f"/{media_type}/changes",
+            {"start_date": start.isoformat(), "end_date": end.isoformat(), "page": page},
+            Priority.BACKGROUND,
+        )
+        ids += [item["id"] for item in data.get("results", []) if not item.get("adult")]
+        total_pages = data.get("total_pages", 1)
+        page += 1
+    return list(dict.fromkeys(ids))
+
+async def apply_catalog_changes() -> Dict[str, int]:
+    """Queue titles changed since the last delta for re-enrichment, a day at a time"""
+    stats = {}
+    yesterday = datetime.now(timezone.utc).date() - timedelta(days=1)
+    for media_type in ("movie", "tv"):
+        state = await catalog.get_state(media_type)
+        if not state.get("changes_through"):
+            continue  # nothing ingested yet
+        through = date.fromisoformat(state["changes_through"])
+        if through >= yesterday:
+            continue
+        start = max(through + timedelta(days=1), yesterday - timedelta(days=CATALOG_CHANGES_MAX_DAYS - 1))
+        ids = await fetch_catalog_changes(media_type, start, yesterday)
+        stats[media_type] = await catalog.mark_changed(media_type, ids)
+        await catalog.set_state(media_type, changes_through=yesterday.isoformat())
+    return stats
+
+async def enrich_catalog(limit: int) -> Dict[str, int]:
+    """Fetch details for up to `limit` pending titles, CATALOG_ENRICH_CONCURRENCY at a time"""
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=CATALOG_ENRICH_MAX_AGE)
+    titles = await catalog.pending(limit, stale_before)
+    semaphore = asyncio.Semaphore(CATALOG_ENRICH_CONCURRENCY)
+    stats = {"enriched": 0, "removed": 0, "errors": 0}
     
-    # Parse IMDb rating
-    if data.get("imdbRating") and data["imdbRating"] != "N/A":
-        ratings["imdb"] = {
-            "value": data["imdbRating"],
-            "votes": data.get("imdbVotes", "").replace(",", "")
-        }
+    async def enrich(media_type: str, tmdb_id: int):
+        async with semaphore:
+            try:
+                data = await fetch_tmdb(
+                    f"/{media_type}/{tmdb_id}", {"append_to_response": CATALOG_APPEND}, Priority.BACKGROUND
+                )
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code == 404:
+                    # Deleted or merged on TMDB since the export
+                    await catalog.remove(media_type, tmdb_id)
+                    stats["removed"] += 1
+                    return
+                stats["errors"] += 1
+                logger.warning(f"Could not enrich {media_type} {tmdb_id}: {e}")
+                return
+            except Exception as e:
+                stats["errors"] += 1
+                logger.warning(f"Could not enrich {media_type} {tmdb_id}: {e}")
+                return
+            await catalog.save(media_type, tmdb_id, catalog_entry(data, media_type))
+            stats["enriched"] += 1
     
-    # Parse other ratings
-    for rating in data.get("Ratings", []):
-        source = rating.get("Source", "")
-        value = rating.get("Value", "")
-        if "Rotten Tomatoes" in source:
-            ratings["rotten_tomatoes"] = {"value": value}
-        elif "Metacritic" in source:
-            ratings["metacritic"] = {"value": value}
+    await asyncio.gather(*(enrich(media_type, tmdb_id) for media_type, tmdb_id in titles))
+    return stats
+
+async def sync_catalog_once() -> Dict[str, Any]:
+    """Ingest new exports, then (with a TMDB key) apply the changes feed and enrich a batch"""
+    started = time.time()
+    catalog_status["running"] = True
+    run: Dict[str, Any] = {}
+    try:
+        run["ingested"] = await ingest_catalog_exports()
+        if TMDB_API_KEY:
+            run["changed"] = await apply_catalog_changes()
+            run.update(await enrich_catalog(CATALOG_ENRICH_BATCH))
+        changed = any(run["ingested"].values()) or run.get("enriched") or run.get("removed")
+        if changed or not catalog_enriched:
+            counts = await catalog.counts()
+            catalog_enriched.clear()
+            catalog_enriched.update({media_type: c["enriched"] for media_type, c in counts.items()})
+            catalog_totals.clear()
+            answer_sources_changed()
+        if DISCOVER_LOCAL_ENABLED and (changed or discover_table is None):
+            run["discover_titles"] = await refresh_discover_table()
+    finally:
+        catalog_status.update(
+            running=False,
+            runs=catalog_status["runs"] + 1,
+            last_finished=datetime.now(timezone.utc).isoformat(),
+            last_duration_ms=round((time.time() - started) * 1000),
+            last_run=run,
+        )
+    return run
+
+async def run_catalog_sync():
+    """Sync the catalog every CATALOG_SYNC_INTERVAL seconds until cancelled"""
+    while True:
+        try:
+            await sync_catalog_once()
+        except Exception as e:
+            logger.error(f"Catalog sync failed: {e}")
+        catalog_status["next_run"] = datetime.fromtimestamp(
+            time.time() + CATALOG_SYNC_INTERVAL, timezone.utc
+        ).isoformat()
+        await asyncio.sleep(CATALOG_SYNC_INTERVAL)
+
+# ==================== LOCAL DISCOVER ====================
+
+# After a catalog sync changes something, the enriched titles are loaded into
+# a fresh DiscoverTable which replaces the current one. Discover requests are
+# answered from it when the media type has DISCOVER_MIN_TITLES titles and the
+# filters match at least DISCOVER_MIN_RESULTS of them, otherwise by TMDB (and
+# by the table regardless when TMDB can't answer).
+
+DISCOVER_FIELDS = (*MEDIA_ITEM_FIELDS, "original_language", "providers")
+
+def discover_item(doc: Dict) -> Any:
+    """The list item a table row returns"""
+    item = {name: doc.get(name) for name in MEDIA_ITEM_FIELDS}
+    return compact_value(item) if CACHE_COMPACT_ITEMS else item
+
+async def refresh_discover_table() -> int:
+    """Rebuild the discover table from the enriched catalog and swap it in"""
+    global discover_table
+    started = time.time()
+    docs = await catalog.enriched_titles(DISCOVER_FIELDS).to_list(None)
+    table = await asyncio.to_thread(DiscoverTable, docs, discover_item)
+    discover_table = table
+    answer_sources_changed()
+    logger.info(f"Discover table rebuilt with {len(table)} titles in {time.time() - started:.1f}s")
+    return len(table)
+
+def discover_locally(media_type: str, sort_by: Optional[str], page: int, filters: Dict,
+                     require_coverage: bool = True) -> Optional[Dict]:
+    """A discover page from the local table, None when TMDB should answer instead"""
+    table = discover_table
+    if not DISCOVER_LOCAL_ENABLED or table is None:
+        return None
+    if require_coverage and table.counts.get(media_type, 0) < DISCOVER_MIN_TITLES:
+        return None
+    data = table.discover(media_type, sort_by, page, CATALOG_PAGE_SIZE, **filters)
+    if data is None or (require_coverage and data["total_results"] < DISCOVER_MIN_RESULTS):
+        return None
+    return data
+
+# ==================== SEARCH SUGGESTIONS ====================
+
+# `normalize_media_item` adds every title it sees to `suggest_index`, so the
+# index grows with list pages, detail pages and catalog enrichment. At startup
+# it is seeded from the (restored) cache, watchlists and the catalog mirror,
+# yielding to the event loop every SUGGEST_SEED_CHUNK titles (a few ms).
+
+SUGGEST_SEED_CHUNK = 64
+
+async def seed_suggest_index():
+    """Index titles already held by the cache, watchlists and the catalog"""
+    started = time.time()
+    indexed = 0
     
+    async def pace():
+        nonlocal indexed
+        indexed += 1
+        if indexed % SUGGEST_SEED_CHUNK == 0:
+            await asyncio.sleep(0)
+    
+    for _, entry in cache.items_by_recency():
+        for item in iter_media_items(entry.value):
+            suggest_index.add_item(item)
+            await pace()
+    try:
+        projection = {"_id": 0, "media_type": 1, "tmdb_id": 1, "title": 1, "poster_path": 1}
+        async for item in db.watchlist_items.find({}, projection):
+            index_watchlist_item(item)
+            await pace()
+        if CATALOG_EXPORT_DIR:
+            async for item in catalog.top_titles(SUGGEST_MAX_TITLES):
+                suggest_index.add_item(item)
+                await pace()
+    except Exception as e:
+        logger.warning(f"Could not seed the suggestion index: {e}")
+    logger.info(f"Suggestion index seeded with {len(suggest_index)} titles in {time.time() - started:.1f}s")
+
+@api_router.get("/search/suggest", response_class=FastJSONResponse)
+async def search_suggest(
+    q: str = "",
+    limit: int = Query(8, ge=1, le=50),
+    media_type: Optional[str] = None,
+):
+    """Titles whose words start with the words typed so far, most popular first.
+
+    Answered from the in-process index only, never from TMDB.
+    """
+    return {"query": q, "results": suggest_index.suggest(q, limit, media_type)}
+
+# ==================== RECOMMENDATIONS ====================
+
+# "For You" picks. The user's RECOMMEND_SEED_TITLES strongest watchlisted
+# titles (by status, then most recently added) each contribute a sparse
+# genre/keyword/cast vector, weighted by status, to a taste profile.
+# Candidates are TMDB's recommendations for those titles plus the titles
+# most often found in other users' watchlists alongside them; they are scored
+# by similarity to the profile blended with that co-occurrence (see
+# recommend.py). Per-title profiles are cached on their own, so a watchlist
+# change only looks up the titles it added, and results are cached under the
+# user's watchlist revisions, which every mutation bumps.
+
+CATALOG_FEATURE_FIELDS = (*MEDIA_ITEM_FIELDS, "keyword_ids", "cast_ids")
+
+async def catalog_docs(titles: List[tuple], fields: Iterable[str] = CATALOG_FEATURE_FIELDS) -> Dict[tuple, Dict]:
+    """Catalog documents of the titles the mirror has enriched"""
+    if not CATALOG_EXPORT_DIR or not titles:
+        return {}
+    try:
+        return await catalog.find_titles(titles, fields)
+    except Exception as e:
+        logger.warning(f"Could not read catalog documents: {e}")
+        return {}
+
+async def user_titles(watchlist_ids: List[str]) -> List[Dict]:
+    """The titles in the given watchlists, strongest signal first: by status
+    weight, then most recently added"""
+    projection = {"_id": 0, "media_type": 1, "tmdb_id": 1, "status": 1, "added_at": 1}
+    titles: Dict[tuple, Dict] = {}
+    async for item in db.watchlist_items.find({"watchlist_id": {"$in": watchlist_ids}}, projection):
+        key = (item["media_type"], item["tmdb_id"])
+        weight = STATUS_WEIGHTS.get(item.get("status"), STATUS_WEIGHTS["plan_to_watch"])
+        known = titles.get(key)
+        if known is None or (weight, item.get("added_at", "")) > (known["weight"], known["added_at"]):
+            titles[key] = {"key": key, "weight": weight, "added_at": item.get("added_at", "")}
+    return sorted(titles.values(), key=lambda t: (t["weight"], t["added_at"]), reverse=True)
+
+async def title_profile(media_type: str, tmdb_id: int, doc: Optional[Dict]) -> Dict:
+    """A title's feature vector and TMDB recommendations, cached per title"""
+    key = f"profile_{media_type}_{tmdb_id}"
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    data, _ = await tmdb_details(media_type, tmdb_id)
+    if data is None and doc is None:
+        return {"features": {}, "recommendations": []}
+    genre_ids = [g["id"] for g in data["genres"]] if data else doc.get("genre_ids")
+    cast_ids = [c["id"] for c in data["cast"]] if data else doc.get("cast_ids")
+    profile = {
+        # Keywords only come from the catalog, detail responses don't carry them
+        "features": feature_vector(genre_ids, (doc or {}).get("keyword_ids"), cast_ids),
+        "recommendations": data["recommendations"] if data else [],
+    }
+    stored = cache.set(key, profile, "details")
+    return stored.value if stored is not None else profile
+
+async def cooccurring_titles(seeds: List[Dict], own_watchlist_ids: List[str]) -> List[Dict]:
+    """Titles most often in other watchlists holding any of the seed titles, with counts"""
+    by_type: Dict[str, List[int]] = {}
+    for seed in seeds:
+        media_type, tmdb_id = seed["key"]
+        by_type.setdefault(media_type, []).append(tmdb_id)
+    if not by_type:
+        return []
+    match = {
+        "$or": [{"media_type": media_type, "tmdb_id": {"$in": ids}} for media_type, ids in by_type.items()],
+        "watchlist_id": {"$nin": own_watchlist_ids},
+    }
+    neighbours = await db.watchlist_items.aggregate([
+        {"$match": match},
+        {"$group": {"_id": "$watchlist_id"}},
+        {"$limit": RECOMMEND_NEIGHBOUR_LISTS},
+    ]).to_list(RECOMMEND_NEIGHBOUR_LISTS)
+    if not neighbours:
+        return []
+    limit = RECOMMEND_COOCCURRING + len(seeds)  # the seeds themselves come back too
+    return await db.watchlist_items.aggregate([
+        {"$match": {"watchlist_id": {"$in": [n["_id"] for n in neighbours]}}},
+        {"$group": {
+            "_id": {"media_type": "$media_type", "tmdb_id": "$tmdb_id"},
+            "n": {"$sum": 1},
+            "title": {"$first": "$title"},
+            "poster_path": {"$first": "$poster_path"},
+        }},
+        {"$sort": {"n": -1}},
+        {"$limit": limit},
+    ]).to_list(limit)
+
+def recommendation_item(item: Any, doc: Optional[Dict], score: float) -> Dict:
+    source = doc or item
     return {
-        "ratings": ratings,
-        "rated": data.get("Rated"),
-        "awards": data.get("Awards"),
-        "box_office": data.get("BoxOffice")
+        "id": item["id"],
+        "media_type": item["media_type"],
+        "title": source.get("title"),
+        "poster_path": source.get("poster_path"),
+        "release_date": source.get("release_date"),
+        "vote_average": source.get("vote_average"),
+        "score": round(score, 4),
+    }
+
+async def build_recommendations(watchlist_ids: List[str]) -> List[Dict]:
+    """Score candidate titles for the owner of `watchlist_ids`, best first"""
+    titles = await user_titles(watchlist_ids)
+    seeds = titles[:RECOMMEND_SEED_TITLES]
+    owned = {t["key"] for t in titles}
+    together = await cooccurring_titles(seeds, watchlist_ids)
+    docs = await catalog_docs([seed["key"] for seed in seeds])
+    
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    
+    async def profile(key: tuple) -> Dict:
+        async with semaphore:
+            return await title_profile(*key, docs.get(key))
+    
+    profiles = await asyncio.gather(*(profile(seed["key"]) for seed in seeds))
+    
+    candidates: Dict[tuple, Dict] = {}
+    for seed_profile in profiles:
+        for item in seed_profile["recommendations"]:
+            key = (item["media_type"], item["id"])
+            if key not in owned:
+                candidates.setdefault(key, {"item": item, "n": 0})
+    for row in together:
+        key = (row["_id"]["media_type"], row["_id"]["tmdb_id"])
+        if key in owned:
+            continue
+        item = {"id": key[1], "media_type": key[0], "title": row["title"], "poster_path": row["poster_path"]}
+        candidates.setdefault(key, {"item": item, "n": 0})["n"] = row["n"]
+    if not candidates:
+        return []
+    
+    keys = list(candidates)
+    docs.update(await catalog_docs([key for key in keys if key not in docs]))
+    vectors = []
+    for key in keys:
+        doc = docs.get(key)
+        if doc is not None:
+            vectors.append(feature_vector(doc.get("genre_ids"), doc.get("keyword_ids"), doc.get("cast_ids")))
+        else:
+            vectors.append(feature_vector(candidates[key]["item"].get("genre_ids") or ()))
+    scores = score_candidates(
+        [p["features"] for p in profiles], [seed["weight"] for seed in seeds],
+        vectors, [candidates[key]["n"] for key in keys],
+    )
+    return [
+        recommendation_item(candidates[keys[i]]["item"], docs.get(keys[i]), float(scores[i]))
+        for i in top(scores, RECOMMEND_MAX_RESULTS) if scores[i] > 0
+    ]
+
+@api_router.get("/users/{user_id}/recommendations", response_class=FastJSONResponse)
+async def get_recommendations(user_id: str, limit: int = Query(20, ge=1, le=RECOMMEND_MAX_RESULTS)):
+    """Personalized "For You" picks from the user's watchlists"""
+    if not await db.users.find_one({"id": user_id}, {"_id": 0, "id": 1}):
+        raise HTTPException(status_code=404, detail="User not found")
+    revisions = await user_watchlist_revisions(user_id)
+    cache_key = f"for_you_{user_id}_{revisions_key(revisions)}"
+    results = cache.get(cache_key)
+    if results is None:
+        results = await inflight.do(cache_key, lambda: build_recommendations([w[0] for w in revisions]))
+        cache.set(cache_key, results, "recommendations")
+    return {"user_id": user_id, "results": results[:limit]}
+
+# ==================== USER STATS ====================
+
+# Counts by status, media type and genre plus total watch time across a
+# user's watchlists. The counting is one aggregation over the user's items;
+# genres and runtimes come from what is already known locally (cached detail
+# responses, then the catalog mirror) without calling TMDB, and the response
+# says how many titles that covered. Stats are cached under the user's
+# watchlist revisions, like recommendations.
+
+STATS_CATALOG_FIELDS = ("genre_ids", "runtime")
+
+def genre_names() -> Dict[int, str]:
+    """Genre names from the cached TMDB genre lists, the defaults otherwise"""
+    names = {g["id"]: g["name"] for g in DEFAULT_GENRES}
+    for media_type in ("movie", "tv"):
+        # tmdb_request's cache key for the parameterless genre list
+        entry = cache.peek(f"tmdb_/genre/{media_type}/list_{json.dumps({})}")
+        if entry is not None and entry.value:
+            names.update({g["id"]: g["name"] for g in entry.value.get("genres", [])})
+    return names
+
+def watch_minutes(media_type: str, data: Optional[Dict], doc: Optional[Dict]) -> Optional[int]:
+    """Minutes it takes to watch a title, None if unknown. The catalog only
+    knows a show's episode length, not how many episodes it has."""
+    if media_type == "movie":
+        return (data or doc or {}).get("runtime")
+    if data is None or not data.get("episode_run_time") or not data.get("number_of_episodes"):
+        return None
+    return data["episode_run_time"][0] * data["number_of_episodes"]
+
+async def build_user_stats(watchlist_ids: List[str]) -> Dict:
+    """Watchlist statistics for the owner of `watchlist_ids`"""
+    result = await db.watchlist_items.aggregate([
+        {"$match": {"watchlist_id": {"$in": watchlist_ids}}},
+        {"$facet": {
+            "items": [{"$group": {"_id": {"status": "$status", "media_type": "$media_type"}, "n": {"$sum": 1}}}],
+            # A title in several watchlists counts once, as watched if it is watched in any
+            "titles": [{"$group": {
+                "_id": {"media_type": "$media_type", "tmdb_id": "$tmdb_id"},
+                "watched": {"$max": {"$eq": ["$status", "watched"]}},
+            }}],
+        }},
+    ]).to_list(1)
+    facets = result[0] if result else {"items": [], "titles": []}
+    
+    by_status: Dict[str, int] = {}
+    by_media_type: Dict[str, int] = {}
+    for row in facets["items"]:
+        status = row["_id"].get("status") or "plan_to_watch"
+        media_type = row["_id"].get("media_type") or "movie"
+        by_status[status] = by_status.get(status, 0) + row["n"]
+        by_media_type[media_type] = by_media_type.get(media_type, 0) + row["n"]
+    
+    keys = [(t["_id"]["media_type"], t["_id"]["tmdb_id"]) for t in facets["titles"]]
+    details = {key: cached_details(*key) for key in keys}
+    docs = await catalog_docs([key for key, data in details.items() if data is None], STATS_CATALOG_FIELDS)
+    names = genre_names()
+    genres: Dict[int, int] = {}
+    known = watched = timed = minutes = 0
+    for row, key in zip(facets["titles"], keys):
+        data, doc = details[key], docs.get(key)
+        if data is not None:
+            genre_ids = [g["id"] for g in data.get("genres", [])]
+            names.update({g["id"]: g["name"] for g in data.get("genres", [])})
+        else:
+            genre_ids = (doc or {}).get("genre_ids")
+        if data is not None or doc is not None:
+            known += 1
+            for genre_id in genre_ids or ():
+                genres[genre_id] = genres.get(genre_id, 0) + 1
+        if row["watched"]:
+            watched += 1
+            runtime = watch_minutes(key[0], data, doc)
+            if runtime:
+                timed += 1
+                minutes += runtime
+    
+    return {
+        "items": sum(by_status.values()),
+        "titles": len(keys),
+        "by_status": by_status,
+        "by_media_type": by_media_type,
+        "genres": [
+            {"id": genre_id, "name": names.get(genre_id), "count": count}
+            for genre_id, count in sorted(genres.items(), key=lambda g: (-g[1], g[0]))
+        ],
+        "watch_time_minutes": minutes,
+        # How many titles the genre counts and watch time are based on
+        "coverage": {"titles": known, "watched": watched, "watched_with_runtime": timed},
     }
 
+@api_router.get("/users/{user_id}/stats", response_class=FastJSONResponse)
+async def get_user_stats(user_id: str):
+    """Counts by status, media type and genre and total watch time over the user's watchlists"""
+    if not await db.users.find_one({"id": user_id}, {"_id": 0, "id": 1}):
+        raise HTTPException(status_code=404, detail="User not found")
+    revisions = await user_watchlist_revisions(user_id)
+    cache_key = f"stats_{user_id}_{revisions_key(revisions)}"
+    stats = cache.get(cache_key)
+    if stats is None:
+        stats = await inflight.do(cache_key, lambda: build_user_stats([w[0] for w in revisions]))
+        cache.set(cache_key, stats, "lists")
+    return {"user_id": user_id, **stats}
+
+# ==================== OMDB ENDPOINTS ====================
+
+@api_router.get("/omdb/{imdb_id}")
+async def get_omdb_ratings(imdb_id: str):
+    """Get IMDb and Rotten Tomatoes ratings from OMDB"""
+    data = await omdb_request(imdb_id)
+    return parse_omdb_ratings(data)
+
 # ==================== HEALTH CHECK ====================
 
 @api_router.get("/health")
@@ -696,12 +2300,40 @@ async def health_check():
     return {
         "status": "healthy",
         "tmdb_api": tmdb_status,
-        "omdb_api": omdb_status
+        "omdb_api": omdb_status,
+        "tmdb_rate_limit": tmdb_limiter.stats()
     }
 
+@api_router.get("/cache/stats")
+async def cache_stats():
+    """Cache size, hit/miss and eviction counters"""
+    stats = cache.stats()
+    if cache_l2 is not None:
+        stats["l2"] = cache_l2.stats()
+    if CACHE_SNAPSHOT_PATH:
+        stats["snapshot"] = snapshot_status
+    return stats
+
+@api_router.get("/cache/warmer")
+async def cache_warmer_status():
+    """Last run of the background cache warmer"""
+    return warmer_status
+
+@api_router.get("/catalog/status")
+async def catalog_sync_status():
+    """Last catalog sync run and the number of (enriched) titles per media type"""
+    if not CATALOG_EXPORT_DIR:
+        return catalog_status
+    try:
+        titles = await catalog.counts()
+    except Exception as e:
+        logger.warning(f"Could not count catalog titles: {e}")
+        titles = None
+    return {**catalog_status, "titles": titles}
+
 @api_router.get("/")
 async def root():
-    return {"message": "CineVault API", "version": "1.0.0"}
+    return {"message": "CineVault API", "version": API_VERSION}
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -712,10 +2344,99 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+def _brotli_middleware():
+    """Brotli needs the optional `brotli-asgi` package (pip install brotli-asgi)"""
+    try:
+        from brotli_asgi import BrotliMiddleware
+        return BrotliMiddleware
+    except ImportError:
+        return None
+
+# Compress responses above COMPRESSION_MIN_SIZE for clients that accept it
+if RESPONSE_COMPRESSION == "br" and _brotli_middleware() is not None:
+    # Clients that don't accept br still get gzip
+    app.add_middleware(_brotli_middleware(), quality=4, minimum_size=COMPRESSION_MIN_SIZE, gzip_fallback=True)
+elif RESPONSE_COMPRESSION in ("br", "gzip"):
+    if RESPONSE_COMPRESSION == "br":
+        logger.warning("RESPONSE_COMPRESSION=br but brotli-asgi is not installed, falling back to gzip")
+    app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=COMPRESSION_LEVEL)
+
+@app.on_event("startup")
+async def startup_http_clients():
+    # Open the upstream pools up front so the first requests reuse them
+    get_http_client("tmdb")
+    get_http_client("omdb")
+
+@app.on_event("startup")
+async def startup_cache_l2():
+    if cache_l2 is None:
+        return
+    try:
+        await cache_l2.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Could not create tmdb_cache indexes: {e}")
+
+@app.on_event("startup")
+async def startup_cache_snapshot():
+    if not CACHE_SNAPSHOT_PATH:
+        return
+    restore_cache_snapshot()
+    background_tasks.append(asyncio.create_task(run_cache_snapshots(CACHE_SNAPSHOT_INTERVAL)))
+
+@app.on_event("startup")
+async def startup_suggest_index():
+    # After the snapshot is restored, so its titles are indexed too
+    background_tasks.append(asyncio.create_task(seed_suggest_index()))
+
+@app.on_event("startup")
+async def startup_rate_limit():
+    if tmdb_limiter.coordinator is None:
+        return
+    try:
+        await tmdb_limiter.coordinator.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Could not create rate_limits indexes: {e}")
+
+@app.on_event("startup")
+async def startup_indexes():
+    try:
+        await create_indexes()
+        await log_index_state()
+    except Exception as e:
+        logger.error(f"Could not create indexes: {e}")
+        return
+    background_tasks.append(asyncio.create_task(migrate_all_embedded_items()))
+
+@app.on_event("startup")
+async def startup_cache_sweeper():
+    background_tasks.append(asyncio.create_task(cache.run_sweeper(CACHE_SWEEP_INTERVAL)))
+
+@app.on_event("startup")
+async def startup_cache_warmer():
+    if CACHE_WARM_ENABLED and TMDB_API_KEY:
+        background_tasks.append(asyncio.create_task(run_cache_warmer()))
+
+@app.on_event("startup")
+async def startup_catalog_sync():
+    if not CATALOG_EXPORT_DIR:
+        return
+    try:
+        await catalog.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Could not create catalog indexes: {e}")
+    background_tasks.append(asyncio.create_task(run_catalog_sync()))
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    tasks = [*background_tasks, *refresh_tasks]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    background_tasks.clear()
+    if CACHE_SNAPSHOT_PATH:
+        await save_cache_snapshot()
+    await close_http_clients()
     client.close()
-
-import asyncio
@@ -0,0 +1,144 @@
+"""In-memory typeahead index over the titles the backend has seen"""
+
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+WORD = re.compile(r"[a-z0-9]+")
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents, so "Amélie" matches "ame" """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text: Optional[str]) -> Tuple[str, ...]:
+    return tuple(WORD.findall(fold(text))) if text else ()
+
+
+class Title:
+    """One indexed title; `rank` orders bucket entries, most popular first"""
+    __slots__ = ("key", "media_type", "id", "title", "year", "poster_path", "popularity", "tokens", "words", "rank")
+
+    def __init__(self, media_type: str, tmdb_id: int, title: str, year: Optional[str],
+                 poster_path: Optional[str], popularity: float, tokens: Tuple[str, ...]):
+        self.key = (media_type, tmdb_id)
+        self.media_type = media_type
+        self.id = tmdb_id
+        self.title = title
+        self.year = year
+        self.poster_path = poster_path
+        self.popularity = popularity
+        self.tokens = tokens
+        # " dark knight": a word prefix check is a substring search for " " + prefix
+        self.words = " " + " ".join(tokens)
+        self.rank = (-popularity, media_type, tmdb_id)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "media_type": self.media_type,
+            "title": self.title,
+            "year": self.year,
+            "poster_path": self.poster_path,
+            "popularity": self.popularity,
+        }
+
+
+class SuggestIndex:
+    """Word-prefix index for title autocomplete, ranked by popularity.
+
+    Every word of a title (and of its original title) is indexed under each
+    of its prefixes up to `max_prefix` characters. A bucket is a list of
+    titles kept sorted by popularity and capped at `bucket_size`, so a
+    lookup filters the most selective query word's bucket by the other words
+    and takes the first `limit` - bounded work and no sorting at query time.
+    Holds at most `max_titles`; further titles are skipped.
+    """
+
+    def __init__(self, max_titles: int = 200_000, max_prefix: int = 12, bucket_size: int = 1000):
+        self.max_titles = max_titles
+        self.max_prefix = max_prefix
+        self.bucket_size = bucket_size
+        self.titles: Dict[Tuple[str, int], Title] = {}
+        self.buckets: Dict[str, List[Title]] = {}
+        self.skipped = 0
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def prefixes(self, tokens: Iterable[str]) -> set:
+        return {token[:n] for token in tokens for n in range(1, min(len(token), self.max_prefix) + 1)}
+
+    def add(self, media_type: str, tmdb_id: Optional[int], title: Optional[str],
+            original_title: Optional[str] = None, release_date: Optional[str] = None,
+            poster_path: Optional[str] = None, popularity: Optional[float] = None):
+        """Index a title, or update it when its popularity changed.
+
+        Titles without a popularity (watchlist items) are indexed at 0 and
+        never overwrite a known popularity.
+        """
+        if media_type not in ("movie", "tv") or tmdb_id is None or not title:
+            return
+        known = self.titles.get((media_type, tmdb_id))
+        if known is not None:
+            if popularity is None or popularity == known.popularity:
+                return
+            self._remove(known)
+        elif len(self.titles) >= self.max_titles:
+            self.skipped += 1
+            return
+        tokens = tokenize(title)
+        if original_title and original_title != title:
+            tokens += tuple(t for t in tokenize(original_title) if t not in tokens)
+        entry = Title(media_type, tmdb_id, title, (release_date or "")[:4] or None, poster_path,
+                      popularity or 0.0, tokens)
+        self.titles[entry.key] = entry
+        for prefix in self.prefixes(tokens):
+            bucket = self.buckets.setdefault(prefix, [])
+            if len(bucket) >= self.bucket_size:
+                if entry.rank >= bucket[-1].rank:
+                    continue
+                bucket.pop()
+            insort(bucket, entry, key=lambda t: t.rank)
+
+    def add_item(self, item: Any):
+        """Index a normalized media item (dict or MediaItem)"""
+        self.add(item["media_type"], item["id"], item["title"], item["original_title"],
+                 item["release_date"], item["poster_path"], item["popularity"])
+
+    def _remove(self, entry: Title):
+        del self.titles[entry.key]
+        for prefix in self.prefixes(entry.tokens):
+            bucket = self.buckets.get(prefix)
+            if not bucket:
+                continue
+            i = bisect_left(bucket, entry.rank, key=lambda t: t.rank)
+            if i < len(bucket) and bucket[i] is entry:
+                del bucket[i]
+            if not bucket:
+                del self.buckets[prefix]
+
+    def suggest(self, query: str, limit: int = 8, media_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """The most popular titles with a word starting with every word of `query`"""
+        words = tokenize(query)
+        if not words:
+            return []
+        buckets = [self.buckets.get(word[:self.max_prefix]) for word in words]
+        if not all(buckets):
+            return []
+        # Filter the smallest bucket by the other words; it is already in rank order
+        start = min(range(len(words)), key=lambda i: len(buckets[i]))
+        candidates = buckets[start]
+        for i, word in enumerate(words):
+            if i != start or len(word) > self.max_prefix:
+                needle = f" {word}"
+                candidates = [entry for entry in candidates if needle in entry.words]
+        if media_type:
+            candidates = [entry for entry in candidates if entry.media_type == media_type]
+        return [entry.as_dict() for entry in candidates[:limit]]
+
+    def stats(self) -> Dict[str, int]:
+        return {"titles": len(self.titles), "prefixes": len(self.buckets), "skipped": self.skipped}
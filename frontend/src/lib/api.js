@@ -8,11 +8,22 @@ const api = axios.create({
   timeout: 30000,
 });
 
+// Lists are paged; follow the X-Next-Cursor header until the last page
+const getAllPages = async (url, params = {}) => {
+  const items = [];
+  let cursor;
+  do {
+    const response = await api.get(url, { params: { ...params, cursor } });
+    items.push(...response.data);
+    cursor = response.headers['x-next-cursor'];
+  } while (cursor);
+  return items;
+};
+
 // ==================== USERS ====================
 
 export const getUsers = async () => {
-  const response = await api.get('/users');
-  return response.data;
+  return getAllPages('/users');
 };
 
 export const createUser = async (userData) => {
@@ -33,8 +44,7 @@ export const deleteUser = async (userId) => {
 // ==================== WATCHLISTS ====================
 
 export const getWatchlists = async (userId) => {
-  const response = await api.get('/watchlists', { params: { user_id: userId } });
-  return response.data;
+  return getAllPages('/watchlists', { user_id: userId });
 };
 
 export const createWatchlist = async (data) => {
@@ -74,6 +84,19 @@ export const removeFromWatchlist = async (watchlistId, itemId) => {
   return response.data;
 };
 
+// operations: [{ op: 'add' | 'update' | 'remove' | 'move', item, item_id, status, watchlist_id }]
+export const batchUpdateWatchlist = async (watchlistId, operations, ordered = true) => {
+  const response = await api.post(`/watchlists/${watchlistId}/items:batch`, { operations, ordered });
+  return response.data;
+};
+
+// ==================== HOME ====================
+
+export const getHome = async () => {
+  const response = await api.get('/home');
+  return response.data;
+};
+
 // ==================== TMDB ====================
 
 export const getGenres = async (mediaType = 'movie') => {
@@ -135,13 +158,23 @@ export const discover = async (mediaType, filters = {}, page = 1) => {
   return response.data;
 };
 
-export const getMovieDetails = async (movieId) => {
-  const response = await api.get(`/tmdb/movie/${movieId}`);
+export const getMovieDetails = async (movieId, includeRatings = false) => {
+  const response = await api.get(`/tmdb/movie/${movieId}`, {
+    params: { include_ratings: includeRatings }
+  });
+  return response.data;
+};
+
+export const getTVDetails = async (tvId, includeRatings = false) => {
+  const response = await api.get(`/tmdb/tv/${tvId}`, {
+    params: { include_ratings: includeRatings }
+  });
   return response.data;
 };
 
-export const getTVDetails = async (tvId) => {
-  const response = await api.get(`/tmdb/tv/${tvId}`);
+// items: [{ media_type, tmdb_id }] -> { results, errors }
+export const getTitlesBatch = async (items) => {
+  const response = await api.post('/tmdb/batch', { items });
   return response.data;
 };
 
@@ -4,7 +4,7 @@ import {
   Star, Calendar, Clock, Play, ExternalLink, Users, 
   Film, Tv, Loader2, ChevronLeft 
 } from 'lucide-react';
-import { getMovieDetails, getTVDetails, getOMDBRatings } from '../lib/api';
+import { getMovieDetails, getTVDetails } from '../lib/api';
 import { AddToWatchlistButton } from '../components/AddToWatchlistButton';
 import { MediaRow } from '../components/MediaRow';
 import { Button } from '../components/ui/button';
@@ -25,16 +25,12 @@ export const DetailPage = () => {
     const fetchDetails = async () => {
       setLoading(true);
       try {
+        // OMDB ratings come inlined with the details
         const data = type === 'movie' 
-          ? await getMovieDetails(id)
-          : await getTVDetails(id);
+          ? await getMovieDetails(id, true)
+          : await getTVDetails(id, true);
         setDetails(data);
-        
-        // Fetch OMDB ratings if we have an IMDb ID
-        if (data.imdb_id) {
-          const ratings = await getOMDBRatings(data.imdb_id);
-          setOmdbRatings(ratings);
-        }
+        setOmdbRatings(data.omdb);
       } catch (error) {
         console.error('Failed to fetch details:', error);
       } finally {
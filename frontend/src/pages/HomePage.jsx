@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { Play, Info, TrendingUp, Film, Tv, Star } from 'lucide-react';
-import { getTrending, getPopularMovies, getPopularTV, getNowPlaying, getOnTheAir } from '../lib/api';
+import { getHome } from '../lib/api';
 import { MediaRow } from '../components/MediaRow';
 import { AddToWatchlistButton } from '../components/AddToWatchlistButton';
 import { Button } from '../components/ui/button';
@@ -20,25 +20,14 @@ export const HomePage = () => {
     const fetchData = async () => {
       setLoading(true);
       try {
-        const [trendingRes, moviesRes, tvRes, nowPlayingRes, onTheAirRes] = await Promise.all([
-          getTrending('all', 'week'),
-          getPopularMovies(),
-          getPopularTV(),
-          getNowPlaying(),
-          getOnTheAir()
-        ]);
+        const home = await getHome();
         
-        setTrending(trendingRes.results || []);
-        setPopularMovies(moviesRes.results || []);
-        setPopularTV(tvRes.results || []);
-        setNowPlaying(nowPlayingRes.results || []);
-        setOnTheAir(onTheAirRes.results || []);
-        
-        // Set hero item from trending
-        if (trendingRes.results?.length > 0) {
-          const heroCandidate = trendingRes.results.find(item => item.backdrop_path) || trendingRes.results[0];
-          setHeroItem(heroCandidate);
-        }
+        setTrending(home.trending || []);
+        setPopularMovies(home.popular_movies || []);
+        setPopularTV(home.popular_tv || []);
+        setNowPlaying(home.now_playing || []);
+        setOnTheAir(home.on_the_air || []);
+        setHeroItem(home.hero);
       } catch (error) {
         console.error('Failed to fetch home data:', error);
       } finally {
@@ -0,0 +1,81 @@
+"""Memory per cached title with plain dicts vs compact MediaItem records.
+
+Fills a TTLCache with normalized list pages (20 titles each, built from
+TMDB-shaped items) and measures the allocated bytes with tracemalloc.
+
+    python -m tests.bench_cache_memory [--titles 20000]
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "cinevault_bench")
+
+import server  # noqa: E402
+from cache import TTLCache  # noqa: E402
+from compact import compact_value  # noqa: E402
+from suggest import SuggestIndex  # noqa: E402
+
+GENRES = [28, 12, 16, 35, 80, 99, 18, 10751, 14, 36, 27, 10402, 9648, 10749, 878, 53]
+WORDS = "the a of night return last city dark house love star war secret king girl man lost".split()
+
+
+def tmdb_item(rng: random.Random, tmdb_id: int) -> dict:
+    title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+    return {
+        "id": tmdb_id,
+        "media_type": rng.choice(["movie", "tv"]),
+        "title": title,
+        "original_title": title if rng.random() < 0.8 else f"{title} (Original)",
+        "overview": " ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 60))),
+        "poster_path": f"/{tmdb_id:x}poster.jpg",
+        "backdrop_path": f"/{tmdb_id:x}backdrop.jpg",
+        "release_date": f"{rng.randint(1960, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "vote_average": round(rng.uniform(1, 10), 3),
+        "vote_count": rng.randint(0, 30000),
+        "popularity": round(rng.uniform(0, 3000), 3),
+        "genre_ids": sorted(rng.sample(GENRES, rng.randint(1, 3))),
+    }
+
+
+def pages(titles: int):
+    """Normalized list pages, built fresh for every run so no strings are shared"""
+    rng = random.Random(42)
+    for page in range(titles // 20):
+        items = [server.normalize_media_item(tmdb_item(rng, page * 20 + i)) for i in range(20)]
+        yield f"page_{page}", {"results": items, "page": page + 1, "total_pages": 500, "total_results": 10000}
+
+
+def measure(titles: int, compact) -> float:
+    """Bytes held by the cache after storing `titles` titles, per title"""
+    tracemalloc.start()
+    cache = TTLCache(compact=compact)
+    for key, value in pages(titles):
+        cache.set(key, value)
+    gc.collect()  # with compaction only the cached copies are still alive
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / titles
+
+
+def main(titles: int):
+    # Only the cache is measured, not the titles normalize_media_item indexes for suggestions
+    server.suggest_index = SuggestIndex(max_titles=0)
+    print(f"{titles} cached titles in {titles // 20} list pages")
+    plain = measure(titles, None)
+    compact = measure(titles, compact_value)
+    print(f"{'plain dicts':<16} {plain:8.0f} bytes/title")
+    print(f"{'MediaItem':<16} {compact:8.0f} bytes/title   {plain / compact:.1f}x smaller")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=20000)
+    main(parser.parse_args().titles)
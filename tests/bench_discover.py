@@ -0,0 +1,103 @@
+"""Local discover over a 100k-title table vs the same filters in plain Python.
+
+Builds a DiscoverTable from synthetic catalog documents and times typical
+discover queries (genre/year/vote/language/provider filters, popularity,
+rating and date sorts, first and deep pages) against a list comprehension
+plus sort over the same documents.
+
+    python -m tests.bench_discover [--titles 100000] [--rounds 50]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from discover import DiscoverTable, parse_ids  # noqa: E402
+
+GENRES = [28, 12, 16, 35, 80, 99, 18, 10751, 14, 36, 27, 10402, 9648, 10749, 878, 53, 10752, 37]
+LANGUAGES = ["en"] * 6 + ["fr", "ja", "ko", "es", "de", "hi", "it"]
+PROVIDERS = [8, 9, 15, 337, 350, 384, 386, 531, 1899]
+QUERIES = [
+    ("popular movies", "movie", "popularity.desc", 1, {}),
+    ("action 2019", "movie", "popularity.desc", 1, {"with_genres": "28", "year": 2019}),
+    ("drama|crime rated", "tv", "vote_average.desc", 1, {"with_genres": "18|80", "vote_count_gte": 200}),
+    ("netflix fr 7+", "movie", "primary_release_date.desc", 1,
+     {"with_watch_providers": "8", "with_original_language": "fr", "vote_average_gte": 7.0}),
+    ("deep page", "movie", "popularity.desc", 400, {"with_genres": "35|18"}),
+]
+
+
+def synthetic_docs(titles: int):
+    rng = random.Random(42)
+    for i in range(titles):
+        yield {
+            "id": i,
+            "media_type": "movie" if rng.random() < 0.7 else "tv",
+            "release_date": f"{rng.randint(1950, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "vote_average": round(rng.uniform(0, 10), 1),
+            "vote_count": int(rng.expovariate(1 / 300)),
+            "popularity": round(rng.expovariate(1 / 20), 3),
+            "genre_ids": rng.sample(GENRES, rng.randint(1, 3)),
+            "original_language": rng.choice(LANGUAGES),
+            "providers": {"US": rng.sample(PROVIDERS, rng.randint(0, 2))},
+        }
+
+
+def python_discover(docs, media_type, sort_by, page, filters, size=20):
+    """The same query as a list comprehension and a full sort"""
+    genre_ids, any_genre = parse_ids(filters.get("with_genres"))
+    providers, _ = parse_ids(filters.get("with_watch_providers"))
+    field, _, direction = sort_by.partition(".")
+    field = "release_date" if field == "primary_release_date" else field
+
+    def keep(d):
+        if d["media_type"] != media_type:
+            return False
+        if genre_ids and (not set(genre_ids) & set(d["genre_ids"]) if any_genre
+                          else not set(genre_ids) <= set(d["genre_ids"])):
+            return False
+        if filters.get("year") and not d["release_date"].startswith(str(filters["year"])):
+            return False
+        if d["vote_average"] < filters.get("vote_average_gte", 0) or d["vote_count"] < filters.get("vote_count_gte", 0):
+            return False
+        if filters.get("with_original_language") not in (None, d["original_language"]):
+            return False
+        return not providers or bool(set(providers) & set(d["providers"]["US"]))
+
+    matches = sorted((d for d in docs if keep(d)), key=lambda d: d[field], reverse=direction == "desc")
+    return matches[(page - 1) * size:page * size], len(matches)
+
+
+def timed(fn, rounds):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), result
+
+
+def main(titles: int, rounds: int):
+    docs = list(synthetic_docs(titles))
+    started = time.perf_counter()
+    table = DiscoverTable(docs)
+    print(f"{titles} titles, table built in {time.perf_counter() - started:.2f} s")
+    for label, media_type, sort_by, page, filters in QUERIES:
+        local_ms, local = timed(lambda: table.discover(media_type, sort_by, page, 20, **filters), rounds)
+        python_ms, (_, total) = timed(lambda: python_discover(docs, media_type, sort_by, page, filters), max(1, rounds // 10))
+        assert total == local["total_results"]
+        print(f"{label:<20} {total:>6} matches   table p50 {local_ms:7.2f} ms   "
+              f"python p50 {python_ms:7.1f} ms   {python_ms / local_ms:5.0f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=50)
+    args = parser.parse_args()
+    main(args.titles, args.rounds)
@@ -0,0 +1,126 @@
+"""Serialization time and bytes on the wire for a movie detail response.
+
+Builds a detail payload from a synthetic TMDB response shaped like a large
+title (full credits, providers for every region, recommendations) and
+compares FastAPI's default path, `jsonable_encoder` + stdlib `json`, with
+`FastJSONResponse` rendered directly, plus the compressed sizes.
+
+    python -m tests.bench_serialization [--rounds 2000]
+"""
+
+import argparse
+import asyncio
+import gzip
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "cinevault_bench")
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+import server  # noqa: E402
+
+REGIONS = ["US", "GB", "CA", "AU", "DE", "FR", "ES", "IT", "NL", "SE", "NO", "DK", "FI", "BR", "MX",
+           "AR", "JP", "KR", "IN", "IE", "NZ", "PL", "PT", "BE", "CH", "AT", "TR", "ZA", "SG", "HK"]
+
+
+def provider(i: int) -> dict:
+    return {"provider_id": i, "provider_name": f"Provider {i}", "logo_path": f"/logo{i}.jpg", "display_priority": i}
+
+
+def synthetic_movie(movie_id: int) -> dict:
+    """A TMDB /movie/{id} response with credits, videos, providers and recommendations appended"""
+    return {
+        "id": movie_id,
+        "title": "A Rather Long Synthetic Movie Title",
+        "original_title": "A Rather Long Synthetic Movie Title",
+        "overview": "An overview sentence that goes on for a while. " * 8,
+        "poster_path": "/poster.jpg",
+        "backdrop_path": "/backdrop.jpg",
+        "release_date": "2024-05-17",
+        "vote_average": 7.812,
+        "vote_count": 12345,
+        "popularity": 987.654,
+        "genres": [{"id": 28, "name": "Action"}, {"id": 12, "name": "Adventure"}, {"id": 878, "name": "Science Fiction"}],
+        "runtime": 142,
+        "status": "Released",
+        "tagline": "A tagline.",
+        "budget": 200000000,
+        "revenue": 812000000,
+        "external_ids": {"imdb_id": "tt0000001"},
+        "credits": {
+            "cast": [{"id": i, "name": f"Actor {i}", "character": f"Character {i}", "profile_path": f"/p{i}.jpg"}
+                     for i in range(80)],
+            "crew": [{"id": 1000 + i, "name": f"Crew {i}", "job": ["Director", "Writer", "Screenplay", "Editor"][i % 4],
+                      "department": "Crew"} for i in range(200)],
+        },
+        "videos": {"results": [{"type": "Trailer", "site": "YouTube", "key": f"key{i}"} for i in range(5)]},
+        "watch/providers": {"results": {
+            region: {"flatrate": [provider(i) for i in range(6)], "rent": [provider(i) for i in range(6, 10)],
+                     "buy": [provider(i) for i in range(10, 14)]}
+            for region in REGIONS
+        }},
+        "recommendations": {"results": [
+            {"id": 5000 + i, "title": f"Recommendation {i}", "overview": "Overview. " * 10, "poster_path": f"/r{i}.jpg",
+             "backdrop_path": f"/rb{i}.jpg", "release_date": "2023-01-01", "vote_average": 6.5, "vote_count": 900,
+             "popularity": 50.0, "genre_ids": [28, 12]}
+            for i in range(20)
+        ]},
+    }
+
+
+async def detail_payload(movie_id: int) -> dict:
+    server.TMDB_API_KEY = server.TMDB_API_KEY or "bench"
+    server.cache.set(server.detail_cache_key("movie", movie_id), server.movie_details(synthetic_movie(movie_id)), "details")
+    return await server.get_movie_details(movie_id)
+
+
+def default_path(payload) -> bytes:
+    """What FastAPI does for a route without a response class"""
+    return JSONResponse(jsonable_encoder(payload)).body
+
+
+def fast_path(payload) -> bytes:
+    return server.FastJSONResponse(payload).body
+
+
+def timed(render, payload, rounds: int):
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        body = render(payload)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return statistics.mean(timings), statistics.median(timings), body
+
+
+def main(rounds: int):
+    payload = asyncio.run(detail_payload(550))
+    print(f"get_movie_details payload, {rounds} rounds (orjson {'on' if server.orjson else 'missing'})")
+    results = {}
+    for label, render in (("jsonable_encoder + json", default_path), ("FastJSONResponse", fast_path)):
+        mean, median, body = timed(render, payload, rounds)
+        results[label] = mean
+        print(f"{label:<24} mean {mean:8.1f} us   p50 {median:8.1f} us   {len(body):>7} bytes")
+    speedup = results["jsonable_encoder + json"] / results["FastJSONResponse"]
+    print(f"{'':<24} {speedup:.1f}x faster")
+
+    body = fast_path(payload)
+    print(f"on the wire: identity {len(body)} bytes, "
+          f"gzip-{server.COMPRESSION_LEVEL} {len(gzip.compress(body, server.COMPRESSION_LEVEL))} bytes", end="")
+    try:
+        import brotli
+        print(f", br-4 {len(brotli.compress(body, quality=4))} bytes")
+    except ImportError:
+        print(", br n/a (brotli not installed)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000)
+    main(parser.parse_args().rounds)
@@ -0,0 +1,61 @@
+"""Suggestion lookup latency, index build time and memory for many titles.
+
+Indexes synthetic titles drawn from a small vocabulary (so short prefixes
+match tens of thousands of titles) and times typeahead queries from one
+to three typed words.
+
+    python -m tests.bench_suggest [--titles 100000] [--rounds 2000]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+from suggest import SuggestIndex  # noqa: E402
+
+WORDS = ("the a of night return last city dark house love star war secret king girl man lost "
+         "summer winter blood river road home queen ghost game empire shadow fire ice dream").split()
+QUERIES = ["t", "th", "dar", "star w", "the last k", "ghost riv", "secret of the", "zzz"]
+
+
+def build(titles: int) -> SuggestIndex:
+    rng = random.Random(42)
+    index = SuggestIndex(max_titles=titles)
+    for tmdb_id in range(titles):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+        index.add(rng.choice(["movie", "tv"]), tmdb_id, f"{title} {tmdb_id}",
+                  release_date="2020-01-01", popularity=rng.expovariate(0.05))
+    return index
+
+
+def main(titles: int, rounds: int):
+    tracemalloc.start()
+    started = time.perf_counter()
+    index = build(titles)
+    build_s = time.perf_counter() - started
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{titles} titles indexed in {build_s:.1f} s ({build_s / titles * 1e6:.0f} us/title), "
+          f"{memory / titles:.0f} bytes/title, {index.stats()['prefixes']} prefixes")
+    for query in QUERIES:
+        timings = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            results = index.suggest(query)
+            timings.append((time.perf_counter() - started) * 1e6)
+        print(f"{query!r:<18} mean {statistics.mean(timings):7.1f} us   "
+              f"p99 {statistics.quantiles(timings, n=100)[98]:7.1f} us   {len(results)} results")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.titles, args.rounds)
@@ -0,0 +1,93 @@
+"""Cold-miss latency with a per-call client vs the pooled upstream client.
+
+Simulates a cold home page (five parallel TMDB list calls) against a local
+stub whose `connect_delay` stands in for DNS + TCP + TLS setup.
+
+    python -m tests.bench_upstream_pool [--rounds 20] [--connect-delay 0.03]
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "cinevault_bench")
+
+import httpx  # noqa: E402
+
+import server  # noqa: E402
+from tests.stub_upstream import StubUpstream  # noqa: E402
+
+HOME_ENDPOINTS = [
+    "/trending/all/week",
+    "/movie/popular",
+    "/tv/popular",
+    "/movie/now_playing",
+    "/tv/on_the_air",
+]
+
+
+async def per_call_client_request(endpoint: str):
+    """The previous behaviour: a fresh AsyncClient for every cache miss"""
+    async with httpx.AsyncClient(timeout=10.0) as http_client:
+        response = await http_client.get(
+            f"{server.TMDB_BASE_URL}{endpoint}", params={"api_key": server.TMDB_API_KEY, "page": 1}
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+async def pooled_request(endpoint: str):
+    return await server.tmdb_request(endpoint, {"page": 1})
+
+
+async def run(fetch, rounds: int):
+    timings = []
+    for _ in range(rounds):
+        server.cache.clear()
+        start = time.perf_counter()
+        await asyncio.gather(*(fetch(e) for e in HOME_ENDPOINTS))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label: str, timings, connections: int):
+    timings = sorted(timings)
+    p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+    print(
+        f"{label:<18} mean {statistics.mean(timings):7.2f} ms   p50 {statistics.median(timings):7.2f} ms"
+        f"   p95 {p95:7.2f} ms   connections {connections}"
+    )
+
+
+async def main(rounds: int, connect_delay: float, latency: float):
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    server.TMDB_API_KEY = server.TMDB_API_KEY or "bench"
+    print(f"cold home page, {len(HOME_ENDPOINTS)} parallel misses x {rounds} rounds, "
+          f"connect delay {connect_delay * 1000:.0f} ms, latency {latency * 1000:.0f} ms")
+
+    async with StubUpstream(latency=latency, connect_delay=connect_delay) as stub:
+        server.TMDB_BASE_URL = stub.base_url
+        report("per-call client", await run(per_call_client_request, rounds), stub.connections)
+
+    async with StubUpstream(latency=latency, connect_delay=connect_delay) as stub:
+        server.TMDB_BASE_URL = stub.base_url
+        try:
+            report("pooled client", await run(pooled_request, rounds), stub.connections)
+        finally:
+            await server.close_http_clients()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--connect-delay", type=float, default=0.03)
+    parser.add_argument("--latency", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(main(args.rounds, args.connect_delay, args.latency))
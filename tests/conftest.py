@@ -0,0 +1,70 @@
+import asyncio
+import functools
+import os
+import sys
+import uuid
+from pathlib import Path
+
+import pytest
+
+# server.py lives in backend/ and is imported as a top-level module
+# (uvicorn server:app), so mirror that layout for the tests.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "cinevault_test")
+
+
+@pytest.fixture
+def server(monkeypatch):
+    """The backend module with API keys set and an empty cache"""
+    import server as server_module
+
+    monkeypatch.setattr(server_module, "TMDB_API_KEY", "test-key")
+    monkeypatch.setattr(server_module, "OMDB_API_KEY", "test-key")
+    server_module.cache.clear()
+    server_module.etag_cache.clear()
+    yield server_module
+    server_module.cache.clear()
+    server_module.etag_cache.clear()
+
+
+@functools.lru_cache(maxsize=None)
+def mongo_available() -> bool:
+    from pymongo import MongoClient
+
+    mongo_client = MongoClient(os.environ["MONGO_URL"], serverSelectionTimeoutMS=500)
+    try:
+        mongo_client.admin.command("ping")
+        return True
+    except Exception:
+        return False
+    finally:
+        mongo_client.close()
+
+
+@pytest.fixture
+def mongo(server, monkeypatch):
+    """Run `fn(db)` against a throwaway database; skips without MongoDB.
+
+    The Motor client is created inside the test's event loop and swapped in
+    for `server.db`, and the database is dropped afterwards.
+    """
+    if not mongo_available():
+        pytest.skip("MongoDB is not available")
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    def run(fn):
+        async def main():
+            mongo_client = AsyncIOMotorClient(os.environ["MONGO_URL"])
+            test_db = mongo_client[f"cinevault_test_{uuid.uuid4().hex[:8]}"]
+            monkeypatch.setattr(server, "db", test_db)
+            try:
+                return await fn(test_db)
+            finally:
+                await mongo_client.drop_database(test_db.name)
+                mongo_client.close()
+
+        return asyncio.run(main())
+
+    return run
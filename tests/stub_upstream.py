@@ -0,0 +1,106 @@
+"""Minimal local HTTP/1.1 server standing in for TMDB/OMDB in tests and benchmarks"""
+
+import asyncio
+import json
+from collections import Counter
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+
+def default_handler(path: str, query: Dict[str, str]) -> Tuple[int, Dict]:
+    """TMDB-shaped list payload for any path"""
+    page = int(query.get("page", 1))
+    results = [
+        {
+            "id": page * 100 + i,
+            "media_type": "movie",
+            "title": f"Stub Title {page}-{i}",
+            "overview": "Lorem ipsum " * 20,
+            "poster_path": f"/poster{i}.jpg",
+            "backdrop_path": f"/backdrop{i}.jpg",
+            "release_date": "2024-01-01",
+            "vote_average": 7.5,
+            "vote_count": 1000 + i,
+            "popularity": 100.0 - i,
+            "genre_ids": [28, 12],
+        }
+        for i in range(20)
+    ]
+    return 200, {"page": page, "results": results, "total_pages": 10, "total_results": 200}
+
+
+class StubUpstream:
+    """Keep-alive aware stub server that counts connections and hits.
+
+    `latency` delays every response, `connect_delay` is paid once per new
+    connection and stands in for the DNS + TCP + TLS setup of a real upstream.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[str, Dict[str, str]], Tuple[int, Dict]] = default_handler,
+        latency: float = 0.0,
+        connect_delay: float = 0.0,
+    ):
+        self.handler = handler
+        self.latency = latency
+        self.connect_delay = connect_delay
+        self.connections = 0
+        self.hits: Counter = Counter()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port: Optional[int] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    @property
+    def total_hits(self) -> int:
+        return sum(self.hits.values())
+
+    async def __aenter__(self):
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        if self.connect_delay:
+            await asyncio.sleep(self.connect_delay)
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                _, target, _ = lines[0].split(" ", 2)
+                headers = dict(
+                    line.split(": ", 1) for line in lines[1:] if ": " in line
+                )
+                length = int(headers.get("Content-Length", headers.get("content-length", 0)))
+                if length:
+                    await reader.readexactly(length)
+
+                url = urlsplit(target)
+                query = dict(parse_qsl(url.query))
+                query.pop("api_key", None)
+                query.pop("apikey", None)
+                self.hits[url.path] += 1
+
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                status, payload = self.handler(url.path, query)
+                body = json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} OK\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: keep-alive\r\n\r\n".encode() + body
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
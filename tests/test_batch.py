@@ -0,0 +1,50 @@
+import asyncio
+
+from tests.stub_upstream import StubUpstream
+
+
+def handler(path, query):
+    media_type, tmdb_id = path.strip("/").split("/")
+    if tmdb_id == "404":
+        return 404, {"status_message": "not found"}
+    if tmdb_id == "500":
+        return 500, {"status_message": "internal error"}
+    return 200, {
+        "id": int(tmdb_id),
+        "title" if media_type == "movie" else "name": f"Title {tmdb_id}",
+        "runtime": 120,
+        "episode_run_time": [45],
+        "genres": [{"id": 18, "name": "Drama"}],
+        "watch/providers": {"results": {"US": {"flatrate": [{"provider_name": "Netflix"}]}}},
+    }
+
+
+def test_batch_dedupes_and_reports_partial_failures(server, monkeypatch):
+    refs = [
+        {"media_type": "movie", "tmdb_id": 1},
+        {"media_type": "tv", "tmdb_id": 2},
+        {"media_type": "movie", "tmdb_id": 1},
+        {"media_type": "movie", "tmdb_id": 404},
+        {"media_type": "tv", "tmdb_id": 500},
+        {"media_type": "person", "tmdb_id": 3},
+    ]
+
+    async def main():
+        async with StubUpstream(handler) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                result = await server.get_titles_batch(server.TitleBatchRequest(items=refs))
+            finally:
+                await server.close_http_clients()
+            return stub, result
+
+    stub, result = asyncio.run(main())
+    assert stub.hits == {"/movie/1": 1, "/tv/2": 1, "/movie/404": 1, "/tv/500": 1}
+    movie, tv = result["results"]
+    assert movie["runtime"] == 120 and movie["streaming"] == ["Netflix"]
+    assert tv["title"] == "Title 2" and tv["runtime"] == 45 and tv["genres"] == ["Drama"]
+    assert result["errors"] == [
+        {"media_type": "movie", "tmdb_id": 404, "error": "Not found"},
+        {"media_type": "tv", "tmdb_id": 500, "error": "Upstream error"},
+        {"media_type": "person", "tmdb_id": 3, "error": "Unsupported media type"},
+    ]
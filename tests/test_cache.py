@@ -0,0 +1,67 @@
+import cache as cache_module
+from cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_cache(monkeypatch, **kwargs):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    return TTLCache(**kwargs), clock
+
+
+def test_lru_eviction_by_entry_count(monkeypatch):
+    c, _ = make_cache(monkeypatch, max_entries=2)
+    c.set("a", 1)
+    c.set("b", 2)
+    assert c.get("a") == 1  # "b" is now least recently used
+    c.set("c", 3)
+    assert c.get("b") is None
+    assert c.get("a") == 1 and c.get("c") == 3
+    assert c.evictions == 1
+
+
+def test_byte_budget_evicts_and_skips_oversized(monkeypatch):
+    c, _ = make_cache(monkeypatch, max_bytes=20)
+    c.set("a", "x" * 8)  # 10 bytes as JSON
+    c.set("b", "y" * 8)
+    c.set("c", "z" * 8)
+    assert len(c) == 2 and "a" not in c
+    assert c.bytes == 20
+    c.set("huge", "w" * 100)
+    assert "huge" not in c and len(c) == 2
+
+
+def test_namespace_ttls_and_lazy_expiry(monkeypatch):
+    c, clock = make_cache(monkeypatch, default_ttl=10, namespace_ttls={"config": 100})
+    c.set("list", [1], "lists")
+    c.set("genres", [2], "config")
+    clock.now += 50
+    assert c.get("list") is None
+    assert c.get("genres") == [2]
+    assert c.expirations == 1
+    assert c.stats()["hits"] == 1 and c.stats()["misses"] == 1
+
+
+def test_sweep_removes_only_expired(monkeypatch):
+    c, clock = make_cache(monkeypatch, default_ttl=10)
+    c.set("old", 1)
+    clock.now += 5
+    c.set("new", 2)
+    clock.now += 6
+    assert c.sweep() == 1
+    assert len(c) == 1 and c.get("new") == 2
+    assert c.bytes == c.fingerprint(2)[0]
+
+
+def test_cache_namespace_for_tmdb_endpoints(server):
+    assert server.cache_namespace("/genre/movie/list") == "config"
+    assert server.cache_namespace("/movie/550") == "details"
+    assert server.cache_namespace("/movie/popular") == "lists"
+    assert server.cache_namespace("/search/multi") == "lists"
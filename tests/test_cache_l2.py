@@ -0,0 +1,57 @@
+import asyncio
+import copy
+
+from cache import MongoCacheTier
+from tests.stub_upstream import StubUpstream
+
+
+class FakeCollection:
+    """Just enough of a Motor collection for MongoCacheTier"""
+
+    def __init__(self):
+        self.docs = {}
+
+    async def find_one(self, query):
+        return copy.deepcopy(self.docs.get(query["_id"]))
+
+    async def replace_one(self, query, doc, upsert=False):
+        self.docs[query["_id"]] = {"_id": query["_id"], **doc}
+
+
+def test_second_worker_reads_through_shared_tier(server, monkeypatch):
+    shared = FakeCollection()
+    monkeypatch.setattr(server, "cache_l2", MongoCacheTier(shared))
+
+    async def main():
+        async with StubUpstream() as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                first = await server.tmdb_request("/movie/550")
+                # A fresh process: empty L1, same L2
+                server.cache.clear()
+                second = await server.tmdb_request("/movie/550")
+            finally:
+                await server.close_http_clients()
+            return stub, first, second
+
+    stub, first, second = asyncio.run(main())
+    assert stub.total_hits == 1
+    assert second == first
+    doc = next(iter(shared.docs.values()))
+    assert doc["ns"] == "details" and isinstance(doc["v"], bytes)
+    assert server.cache_l2.stats() == {"hits": 1, "misses": 1, "errors": 0}
+
+
+def test_l2_entry_keeps_original_timestamp(server, monkeypatch):
+    tier = MongoCacheTier(FakeCollection())
+
+    async def main():
+        entry = server.cache.set("k", {"a": 1}, "lists")
+        entry.ts -= server.CACHE_TTL_DEFAULT + 1
+        await tier.set("k", entry)
+        server.cache.clear()
+        return await tier.fill(server.cache, "k")
+
+    filled = asyncio.run(main())
+    assert filled.value == {"a": 1}
+    assert not filled.fresh() and filled.revalidatable()
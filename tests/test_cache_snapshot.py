@@ -0,0 +1,84 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from cache import SnapshotError, TTLCache, write_snapshot
+from compact import MediaItem, compact_value
+from tests.test_compact import normalized_page
+
+
+def filled_cache(server):
+    cache = TTLCache(default_ttl=100, stale_if_error=100, compact=compact_value)
+    cache.set("page", normalized_page(server), "lists", ts=time.time() - 150)  # stale
+    cache.set("genres", {"genres": [{"id": 18, "name": "Drama"}]}, "config")
+    cache.set("gone", {"x": 1}, ts=time.time() - 1000)  # past its hard TTL
+    cache.lookup("page")  # most recently used
+    return cache
+
+
+def test_snapshot_round_trip_keeps_timestamps_and_recency(server, tmp_path):
+    path = str(tmp_path / "cache.snapshot")
+    cache = filled_cache(server)
+    saved = write_snapshot(path, cache.items_by_recency())
+    restored = TTLCache(default_ttl=100, stale_if_error=100, compact=compact_value)
+    stats = restored.load_snapshot(path, max_age=60, budget=5)
+
+    assert saved["entries"] == 2 and stats["loaded"] == 2 and stats["corrupt"] == 0
+    assert [key for key, _ in restored.items_by_recency()] == ["page", "genres"]
+    page, original = restored.lookup("page"), cache.lookup("page")
+    assert page.ts == original.ts and page.ttl == original.ttl and page.digest == original.digest
+    assert isinstance(page.value["results"][0], MediaItem)
+
+
+def test_concurrent_writers_never_share_a_temp_file(server, tmp_path):
+    path = str(tmp_path / "cache.snapshot")
+    entries = filled_cache(server).items_by_recency()
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: write_snapshot(path, entries), range(8)))
+
+    assert [p.name for p in tmp_path.iterdir()] == ["cache.snapshot"]
+    stats = TTLCache(default_ttl=100, stale_if_error=100).load_snapshot(path, max_age=60, budget=5)
+    assert stats["loaded"] == 2 and stats["corrupt"] == 0
+
+
+def test_expired_and_over_budget_records_are_skipped(server, tmp_path):
+    path = str(tmp_path / "cache.snapshot")
+    write_snapshot(path, filled_cache(server).items_by_recency())
+    # Without a stale-if-error window the stale page is past its hard TTL
+    stats = TTLCache().load_snapshot(path, max_age=60, budget=5)
+    assert stats["loaded"] == 1 and stats["expired"] == 1
+    assert TTLCache().load_snapshot(path, max_age=60, budget=-1)["over_budget"] == 2
+
+
+def test_corrupt_truncated_and_stale_snapshots(server, tmp_path):
+    path = tmp_path / "cache.snapshot"
+    write_snapshot(str(path), filled_cache(server).items_by_recency())
+    data = bytearray(path.read_bytes())
+
+    data[-5] ^= 0xFF  # inside the last record's value
+    path.write_bytes(bytes(data))
+    stats = TTLCache(stale_if_error=100).load_snapshot(str(path), max_age=60, budget=5)
+    assert stats["loaded"] == 1 and stats["corrupt"] == 1
+
+    path.write_bytes(bytes(data[:-10]))
+    stats = TTLCache(stale_if_error=100).load_snapshot(str(path), max_age=60, budget=5)
+    assert stats["loaded"] == 1 and stats["corrupt"] == 1
+
+    with pytest.raises(SnapshotError):
+        TTLCache(stale_if_error=100).load_snapshot(str(path), max_age=-1, budget=5)
+    for garbage in (b"", b"not a snapshot at all, just some bytes"):
+        path.write_bytes(garbage)
+        with pytest.raises(SnapshotError):
+            TTLCache(stale_if_error=100).load_snapshot(str(path), max_age=60, budget=5)
+
+
+def test_server_restore_tolerates_missing_and_bad_files(server, monkeypatch, tmp_path):
+    path = tmp_path / "cache.snapshot"
+    monkeypatch.setattr(server, "CACHE_SNAPSHOT_PATH", str(path))
+    server.restore_cache_snapshot()
+    assert len(server.cache) == 0
+
+    path.write_bytes(b"garbage" * 10)
+    server.restore_cache_snapshot()
+    assert "error" in server.snapshot_status["last_load"]
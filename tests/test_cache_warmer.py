@@ -0,0 +1,47 @@
+import asyncio
+
+from tests.stub_upstream import StubUpstream, default_handler
+
+
+def handler(path, query):
+    if path.startswith("/watch/providers/"):
+        return 200, {"results": [{"provider_id": 8, "provider_name": "Netflix", "logo_path": "/n.jpg"}]}
+    if path.startswith("/genre/"):
+        return 200, {"genres": [{"id": 18, "name": "Drama"}]}
+    return default_handler(path, query)
+
+
+def test_warmer_fills_then_refreshes_only_expiring_keys(server, monkeypatch):
+    monkeypatch.setattr(server, "CACHE_WARM_TOP_N", 2)
+
+    async def watchlist_titles(limit):
+        return [("tv", 7)]
+
+    monkeypatch.setattr(server, "watchlist_titles", watchlist_titles)
+
+    async def main():
+        async with StubUpstream(handler) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                cold = await server.warm_cache_once()
+                cold_hits = dict(stub.hits)
+                warm = await server.warm_cache_once()
+                warm_hits = dict(stub.hits)
+                # Everything is now inside the refresh-ahead window
+                monkeypatch.setattr(server, "CACHE_WARM_AHEAD", server.CACHE_TTL_CONFIG)
+                ahead = await server.warm_cache_once()
+            finally:
+                await server.close_http_clients()
+            return stub, cold, cold_hits, warm, warm_hits, ahead
+
+    stub, cold, cold_hits, warm, warm_hits, ahead = asyncio.run(main())
+    # 5 home rows, 2 genre lists, 2 provider lists; trending and popular movies
+    # share ids in the stub, so 2 movie and 2 TV details plus the watchlisted show
+    assert cold_hits["/tv/7"] == 1 and cold_hits["/movie/100"] == 1 and cold_hits["/tv/101"] == 1
+    # The two provider lists are fetched together and cached as one merged list
+    assert cold["refreshed"] == sum(cold_hits.values()) - 1 == 13 and cold["errors"] == 0
+    assert warm["refreshed"] == 0 and warm_hits == cold_hits
+    assert ahead["refreshed"] == ahead["checked"] == cold["checked"]
+    assert server.cache.hits == 0  # the warmer's reads don't count as traffic
+    assert server.warmer_status["runs"] == 3 and server.warmer_status["last_refreshed"] == ahead["refreshed"]
+    assert not server.warmer_status["running"]
@@ -0,0 +1,197 @@
+import asyncio
+import gzip
+import json
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from catalog import CatalogStore, latest_export, read_export
+from tests.stub_upstream import StubUpstream
+
+
+def write_export(path, lines):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def movie_line(tmdb_id, popularity=1.0):
+    return json.dumps({"adult": False, "id": tmdb_id, "original_title": f"Movie {tmdb_id}",
+                       "popularity": popularity, "video": False})
+
+
+class FakeCollection:
+    """Records bulk writes, enough of a Motor collection for CatalogStore.ingest"""
+
+    def __init__(self):
+        self.writes = []
+
+    async def bulk_write(self, operations, ordered=True):
+        self.writes.append(operations)
+        return SimpleNamespace(upserted_count=len(operations), modified_count=0)
+
+
+def test_latest_export_and_reading(tmp_path):
+    write_export(tmp_path / "movie_ids_01_02_2025.json.gz", [movie_line(1)])
+    write_export(tmp_path / "movie_ids_12_30_2024.json.gz", [movie_line(1)])
+    write_export(tmp_path / "tv_series_ids_01_01_2025.json.gz", ['{"id": 5, "original_name": "Show"}'])
+    (tmp_path / "notes.txt").write_text("not an export")
+
+    path, export_date = latest_export(str(tmp_path), "movie")
+    assert path.endswith("movie_ids_01_02_2025.json.gz") and export_date == date(2025, 1, 2)
+    assert latest_export(str(tmp_path), "tv")[1] == date(2025, 1, 1)
+
+    lines = [movie_line(1), "{broken", "", '{"no": "id"}', movie_line(2), movie_line(3)]
+    write_export(tmp_path / "mixed.json.gz", lines)
+    batches = list(read_export(str(tmp_path / "mixed.json.gz"), batch_size=2))
+    assert [[r["id"] for r in records] for records, _ in batches] == [[1, 2], [3]]
+    assert sum(skipped for _, skipped in batches) == 2
+
+
+def test_ingest_upserts_in_batches(tmp_path):
+    path = tmp_path / "movie_ids_01_02_2025.json.gz"
+    write_export(path, [movie_line(i) for i in range(5)])
+    collection = FakeCollection()
+    store = CatalogStore(collection, state=None)
+
+    stats = asyncio.run(store.ingest(str(path), "movie", date(2025, 1, 2), batch_size=2))
+    assert stats["read"] == stats["upserted"] == 5 and stats["batches"] == 3
+    assert [len(ops) for ops in collection.writes] == [2, 2, 1]
+    first = collection.writes[0][0]._doc
+    assert first["$set"]["export_date"] == "2025-01-02" and first["$setOnInsert"] == {"enriched_at": None}
+
+
+class FakeStore:
+    """Stands in for CatalogStore in the server's enrichment job"""
+
+    def __init__(self, pending):
+        self._pending = pending
+        self.saved = {}
+        self.removed = []
+        self.counted = 0
+
+    async def pending(self, limit, stale_before):
+        return self._pending[:limit]
+
+    async def save(self, media_type, tmdb_id, fields):
+        self.saved[(media_type, tmdb_id)] = fields
+
+    async def remove(self, media_type, tmdb_id):
+        self.removed.append((media_type, tmdb_id))
+
+    async def page(self, filters, sort, page, size, total=None, max_total=None):
+        self.counted += total is None
+        items = sorted(self.saved.values(), key=lambda item: item[sort], reverse=True)
+        return items[(page - 1) * size:page * size], len(items)
+
+
+def detail_handler(path, query):
+    if path == "/movie/1":
+        return 200, {
+            "id": 1, "title": "Local Hero", "original_title": "Local Hero", "popularity": 12.5,
+            "vote_average": 7.4, "vote_count": 800, "runtime": 111, "original_language": "en",
+            "genres": [{"id": 35, "name": "Comedy"}, {"id": 18, "name": "Drama"}],
+            "keywords": {"keywords": [{"id": 9, "name": "oil"}]},
+            "credits": {"cast": [{"id": 42, "name": "Burt Lancaster"}]},
+            "watch/providers": {"results": {"US": {"flatrate": [{"provider_id": 8}]}}},
+        }
+    if path == "/tv/3":
+        return 500, {}
+    return 404, {"status_message": "The resource you requested could not be found."}
+
+
+def test_enrichment_saves_details_and_drops_deleted_titles(server, monkeypatch):
+    store = FakeStore([("movie", 1), ("movie", 2), ("tv", 3)])
+    monkeypatch.setattr(server, "catalog", store)
+    monkeypatch.setattr(server, "CATALOG_EXPORT_DIR", "/exports")
+    monkeypatch.setattr(server, "catalog_totals", {})
+
+    async def main():
+        async with StubUpstream(detail_handler) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                stats = await server.enrich_catalog(10)
+            finally:
+                await server.close_http_clients()
+        # Without a TMDB key the list routes are answered from the catalog
+        monkeypatch.setattr(server, "TMDB_API_KEY", "")
+        return stub, stats, await server.get_popular_movies()
+
+    stub, stats, popular = asyncio.run(main())
+    assert stats == {"enriched": 1, "removed": 1, "errors": 1}
+    assert store.removed == [("movie", 2)]
+    entry = store.saved[("movie", 1)]
+    assert entry["genre_ids"] == [35, 18] and entry["runtime"] == 111 and entry["original_language"] == "en"
+    assert entry["keyword_ids"] == [9] and entry["cast_ids"] == [42] and entry["providers"] == {"US": [8]}
+    assert stub.hits["/movie/1"] == 1
+    assert popular["results"][0]["title"] == "Local Hero" and popular["total_results"] == 1
+
+
+def test_lists_come_from_the_mirror_once_it_covers_them(server, monkeypatch):
+    store = FakeStore([])
+    store.saved[("movie", 1)] = {"id": 1, "title": "Local Hero", "popularity": 12.5, "vote_average": 7.4}
+    monkeypatch.setattr(server, "catalog", store)
+    monkeypatch.setattr(server, "CATALOG_EXPORT_DIR", "/exports")
+    monkeypatch.setattr(server, "CATALOG_LISTS_MIN_TITLES", 1)
+    monkeypatch.setattr(server, "catalog_totals", {})
+
+    async def main():
+        async with StubUpstream(lambda path, query: (200, {"results": [], "page": 1})) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                monkeypatch.setattr(server, "catalog_enriched", {"movie": 0})
+                uncovered = await server.get_popular_movies()
+                monkeypatch.setattr(server, "catalog_enriched", {"movie": 1})
+                pages = [await server.get_popular_movies(), await server.get_popular_movies(2)]
+            finally:
+                await server.close_http_clients()
+        return stub, uncovered, pages
+
+    stub, uncovered, pages = asyncio.run(main())
+    assert uncovered["results"] == [] and stub.hits["/movie/popular"] == 1
+    assert pages[0]["results"][0]["title"] == "Local Hero" and pages[1]["results"] == []
+    assert stub.total_hits == 1  # covered lists never go upstream
+    assert store.counted == 1  # the list total is counted once per sync
+
+
+def changes_handler(path, query):
+    if path.endswith("/changes"):
+        page = int(query["page"])
+        ids = [1, 7] if page == 1 else [7, 8]
+        return 200, {"results": [{"id": i, "adult": False} for i in ids], "page": page, "total_pages": 2}
+    return detail_handler(path, query)
+
+
+def test_sync_ingests_applies_changes_and_enriches(server, mongo, monkeypatch, tmp_path):
+    export_date = datetime.now(timezone.utc).date() - timedelta(days=3)
+    name = f"movie_ids_{export_date:%m_%d_%Y}.json.gz"
+    write_export(tmp_path / name, [movie_line(1, 50.0), movie_line(2, 10.0), "{broken"])
+    monkeypatch.setattr(server, "CATALOG_EXPORT_DIR", str(tmp_path))
+
+    async def main(db):
+        store = CatalogStore(db.catalog, db.catalog_state)
+        monkeypatch.setattr(server, "catalog", store)
+        monkeypatch.setattr(server, "catalog_totals", {})
+        monkeypatch.setattr(server, "catalog_enriched", {})
+        await store.ensure_indexes()
+        await db.catalog.insert_one({"media_type": "movie", "id": 99, "export_date": "2000-01-01"})
+        async with StubUpstream(changes_handler) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                first = await server.sync_catalog_once()
+                second = await server.sync_catalog_once()
+            finally:
+                await server.close_http_clients()
+        monkeypatch.setattr(server, "TMDB_API_KEY", "")
+        popular = await server.get_popular_movies()
+        searched = await server.search_multi("hero")
+        return stub, first, second, popular, searched, await store.counts()
+
+    stub, first, second, popular, searched, counts = mongo(main)
+    assert first["ingested"]["movie"]["read"] == 2 and first["ingested"]["movie"]["skipped"] == 1
+    assert first["ingested"]["movie"]["pruned"] == 1  # id 99 is gone from the export
+    assert first["changed"] == {"movie": 2}  # 7 and 8 added, 1 was still queued
+    assert second["ingested"] == {} and second["changed"] == {}
+    assert stub.hits["/movie/changes"] == 2
+    assert first["enriched"] == 1 and first["removed"] == 3
+    assert counts == {"movie": {"titles": 1, "enriched": 1}}
+    assert [item["id"] for item in popular["results"]] == [1]
+    assert searched["results"][0]["title"] == "Local Hero"
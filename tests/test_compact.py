@@ -0,0 +1,39 @@
+import json
+
+import orjson
+
+from cache import MongoCacheTier, TTLCache, json_default
+from compact import MediaItem, compact_value
+from tests.stub_upstream import default_handler
+
+
+def normalized_page(server):
+    _, payload = default_handler("/movie/popular", {})
+    return {"results": [server.normalize_media_item(item) for item in payload["results"]], "page": 1}
+
+
+def test_compacted_items_serialize_like_the_dicts(server):
+    page = normalized_page(server)
+    compact = compact_value(page)
+    assert all(isinstance(item, MediaItem) for item in compact["results"])
+    assert orjson.dumps(compact) == orjson.dumps(page)
+    assert json.dumps(compact, default=json_default) == json.dumps(page)
+
+
+def test_compacted_items_read_like_dicts(server):
+    original = normalized_page(server)["results"][0]
+    item = compact_value(original)
+    assert item["title"] == original["title"] and item.get("missing", 1) == 1
+    assert item.as_dict() == original
+    assert {**item}.keys() == dict(item).keys() == original.keys()
+    assert item.genre_ids is compact_value(normalized_page(server)["results"][1]).genre_ids
+
+
+def test_cache_stores_compact_values_and_l2_round_trips(server):
+    cache = TTLCache(compact=compact_value)
+    page = normalized_page(server)
+    entry = cache.set("page", page)
+    assert isinstance(entry.value["results"][0], MediaItem)
+    assert entry.size == len(json.dumps(page, separators=(",", ":")))
+    tier = MongoCacheTier(collection=None)
+    assert tier.decode(tier.encode(entry.value)) == page
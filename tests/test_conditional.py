@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+from starlette.requests import Request
+
+from tests.stub_upstream import StubUpstream
+from tests.test_watchlist_items import item
+
+
+def api_client(server):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test")
+
+
+def test_catalog_revalidation_skips_the_route(server, monkeypatch):
+    calls = []
+    tmdb_response = server.tmdb_response
+    monkeypatch.setattr(server, "tmdb_response", lambda *a, **k: calls.append(1) or tmdb_response(*a, **k))
+
+    async def main():
+        async with StubUpstream() as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                async with api_client(server) as http:
+                    first = await http.get("/api/tmdb/movie/popular")
+                    etag = first.headers["etag"]
+                    # ETag bookkeeping stays out of the response cache
+                    cached_keys = list(server.cache._entries)
+                    revalidated = await http.get("/api/tmdb/movie/popular", headers={"If-None-Match": etag})
+                    skipped = len(calls) == 1
+                    # New upstream content for the same key changes the ETag
+                    key = 'popular_movies_/movie/popular_{"page": 1}'
+                    server.cache.set(key, {**server.cache.get(key), "page": 2}, "lists")
+                    changed = await http.get("/api/tmdb/movie/popular", headers={"If-None-Match": etag})
+            finally:
+                await server.close_http_clients()
+            return stub, first, revalidated, skipped, changed, cached_keys
+
+    stub, first, revalidated, skipped, changed, cached_keys = asyncio.run(main())
+    assert cached_keys == ['popular_movies_/movie/popular_{"page": 1}'] and len(server.etag_cache) == 1
+    assert first.status_code == 200 and first.headers["etag"].startswith('W/"')
+    assert first.headers["cache-control"] == server.CATALOG_CACHE_CONTROL
+    assert revalidated.status_code == 304 and revalidated.content == b""
+    assert revalidated.headers["etag"] == first.headers["etag"]
+    assert skipped
+    assert changed.status_code == 200 and changed.headers["etag"] != first.headers["etag"]
+    assert stub.total_hits == 1
+
+
+def test_a_new_answer_source_outdates_catalog_etags(server, monkeypatch):
+    async def main():
+        async with StubUpstream() as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                async with api_client(server) as http:
+                    first = await http.get("/api/tmdb/movie/popular")
+                    # e.g. the catalog mirror now covers the popular list
+                    server.answer_sources_changed()
+                    after = await http.get("/api/tmdb/movie/popular", headers={"If-None-Match": first.headers["etag"]})
+            finally:
+                await server.close_http_clients()
+            return first, after
+
+    first, after = asyncio.run(main())
+    assert after.status_code == 200 and after.headers["etag"] != first.headers["etag"]
+
+
+def test_demo_mode_responses_have_no_etag(server, monkeypatch):
+    monkeypatch.setattr(server, "TMDB_API_KEY", "")
+
+    async def main():
+        async with api_client(server) as http:
+            return await http.get("/api/tmdb/genres")
+
+    response = asyncio.run(main())
+    assert response.status_code == 200 and "etag" not in response.headers
+
+
+def test_etag_matching(server):
+    def request(header):
+        return Request({"type": "http", "headers": [(b"if-none-match", header.encode())]})
+
+    assert server.etag_matches(request('"a", W/"b"'), 'W/"b"')
+    assert server.etag_matches(request('"b"'), 'W/"b"')
+    assert server.etag_matches(request("*"), 'W/"b"')
+    assert not server.etag_matches(request('W/"c"'), 'W/"b"')
+
+
+def test_watchlist_etag_follows_revisions(server, mongo):
+    async def main(db):
+        async with api_client(server) as http:
+            watchlist = (await http.post("/api/watchlists", json={"user_id": "u1", "name": "Queue"})).json()
+            path = f"/api/watchlists/{watchlist['id']}"
+            first = await http.get(path)
+            listed = await http.get("/api/watchlists", params={"user_id": "u1"})
+            unchanged = await http.get(path, headers={"If-None-Match": first.headers["etag"]})
+            added = await http.post(f"{path}/items", json=item(1))
+            changed = await http.get(path, headers={"If-None-Match": first.headers["etag"]})
+            listed_after = await http.get(
+                "/api/watchlists", params={"user_id": "u1"}, headers={"If-None-Match": listed.headers["etag"]}
+            )
+            await http.delete(f"{path}/items/{added.json()['id']}")
+            removed = await http.get(path, headers={"If-None-Match": changed.headers["etag"]})
+        return first, unchanged, changed, listed_after, removed
+
+    first, unchanged, changed, listed_after, removed = mongo(main)
+    assert first.headers["cache-control"] == server.WATCHLIST_CACHE_CONTROL
+    assert unchanged.status_code == 304
+    assert changed.status_code == 200 and changed.json()["revision"] == 1
+    assert len(changed.json()["items"]) == 1
+    assert listed_after.status_code == 200
+    assert removed.status_code == 200 and removed.json()["revision"] == 2
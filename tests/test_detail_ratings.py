@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from tests.stub_upstream import StubUpstream
+
+
+def handler(path, query):
+    if path == "/movie/550":
+        return 200, {"id": 550, "title": "Fight Club", "external_ids": {"imdb_id": "tt0137523"}}
+    return 200, {
+        "Response": "True",
+        "imdbRating": "8.8",
+        "imdbVotes": "2,400,000",
+        "Ratings": [{"Source": "Rotten Tomatoes", "Value": "79%"}],
+    }
+
+
+def test_details_inline_omdb_ratings(server, monkeypatch):
+    async def main():
+        async with StubUpstream(handler) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            monkeypatch.setattr(server, "OMDB_BASE_URL", stub.base_url + "/")
+            try:
+                plain = await server.get_movie_details(550)
+                details = await server.get_movie_details(550, include_ratings=True)
+            finally:
+                await server.close_http_clients()
+            return stub, plain, details
+
+    stub, plain, details = asyncio.run(main())
+    assert "omdb" not in plain
+    assert details["omdb"]["ratings"]["imdb"] == {"value": "8.8", "votes": "2400000"}
+    assert details["omdb"]["ratings"]["rotten_tomatoes"] == {"value": "79%"}
+    assert stub.hits == {"/movie/550": 1, "/": 1}
+
+
+def test_known_imdb_id_starts_omdb_alongside_tmdb(server, monkeypatch):
+    latency = 0.2
+
+    async def main():
+        async with StubUpstream(handler, latency=latency) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            monkeypatch.setattr(server, "OMDB_BASE_URL", stub.base_url + "/")
+            server.cache.set("imdb_movie_550", "tt0137523", "config")
+            try:
+                start = time.perf_counter()
+                details = await server.get_movie_details(550, include_ratings=True)
+                elapsed = time.perf_counter() - start
+            finally:
+                await server.close_http_clients()
+            return stub, details, elapsed
+
+    stub, details, elapsed = asyncio.run(main())
+    assert stub.hits == {"/movie/550": 1, "/": 1}
+    assert elapsed < 2 * latency  # one upstream round trip, not two
+    assert details["omdb"]["ratings"]["imdb"]["value"] == "8.8"
@@ -0,0 +1,129 @@
+import asyncio
+import random
+
+import httpx
+
+from discover import DiscoverTable
+from tests.stub_upstream import StubUpstream
+
+GENRES = [28, 12, 16, 35, 80, 18, 27, 878]
+
+
+def synthetic_docs(n, seed=7):
+    rng = random.Random(seed)
+    return [
+        {
+            "id": i,
+            "media_type": rng.choice(["movie", "tv"]),
+            "title": f"Title {i}",
+            "release_date": f"{rng.randint(2000, 2004)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}",
+            "vote_average": rng.choice([5.0, 6.5, 7.0, 8.0]),
+            "vote_count": rng.randint(0, 5000),
+            "popularity": float(rng.randint(1, 50)),  # plenty of ties
+            "genre_ids": rng.sample(GENRES, rng.randint(0, 3)),
+            "original_language": rng.choice(["en", "fr", "ja"]),
+            "providers": {"US": rng.sample([8, 9, 337], rng.randint(0, 2)), "GB": [8]},
+        }
+        for i in range(n)
+    ]
+
+
+def reference(docs, media_type, keep, key, reverse):
+    matches = [d for d in docs if d["media_type"] == media_type and keep(d)]
+    return [d["id"] for d in sorted(matches, key=lambda d: (-key(d) if reverse else key(d), d["id"]))]
+
+
+def all_pages(table, media_type, sort_by, size=7, **filters):
+    ids, page = [], 1
+    while True:
+        data = table.discover(media_type, sort_by, page, size, **filters)
+        if not data["results"]:
+            return ids, data["total_results"]
+        ids += [item["id"] for item in data["results"]]
+        page += 1
+
+
+def test_filters_and_sorts_match_a_plain_python_evaluation():
+    docs = synthetic_docs(600)
+    table = DiscoverTable(docs)
+
+    ids, total = all_pages(table, "movie", "popularity.desc", with_genres="28,12")
+    expected = reference(docs, "movie", lambda d: {28, 12} <= set(d["genre_ids"]), lambda d: d["popularity"], True)
+    assert ids == expected and total == len(expected) > 0
+
+    ids, _ = all_pages(table, "tv", "vote_average.asc", with_genres="27|878", year=2002, vote_count_gte=1000)
+    expected = reference(
+        docs, "tv",
+        lambda d: {27, 878} & set(d["genre_ids"]) and d["release_date"].startswith("2002") and d["vote_count"] >= 1000,
+        lambda d: d["vote_average"], False,
+    )
+    assert ids == expected and expected
+
+    ids, _ = all_pages(table, "movie", "primary_release_date.desc", with_original_language="fr",
+                       vote_average_gte=6.5, vote_average_lte=7.0, with_watch_providers="8|337")
+    expected = reference(
+        docs, "movie",
+        lambda d: d["original_language"] == "fr" and 6.5 <= d["vote_average"] <= 7.0
+        and {8, 337} & set(d["providers"]["US"]),
+        lambda d: int(d["release_date"].replace("-", "")), True,
+    )
+    assert ids == expected and expected
+
+    ids, _ = all_pages(table, "movie", "vote_count.desc", with_watch_providers="8,9", watch_region="us")
+    expected = reference(docs, "movie", lambda d: {8, 9} <= set(d["providers"]["US"]), lambda d: d["vote_count"], True)
+    assert ids == expected and expected
+
+
+def test_unknown_values_match_nothing_and_unsupported_sorts_defer():
+    table = DiscoverTable(synthetic_docs(50))
+    assert table.discover("movie", None, 1, 20, with_genres="99999")["total_results"] == 0
+    assert table.discover("movie", None, 1, 20, with_original_language="xx")["total_results"] == 0
+    assert table.discover("movie", None, 1, 20, with_watch_providers="8", watch_region="JP")["total_results"] == 0
+    assert table.discover("movie", None, 1, 20, with_genres="abc")["total_results"] == 0
+    assert table.discover("movie", None, 1, 20, with_watch_providers="8|netflix")["total_results"] == 0
+    assert table.discover("movie", "revenue.desc", 1, 20) is None
+    assert table.discover("person", None, 1, 20) is None
+
+
+def test_discover_route_uses_the_table_when_it_covers_the_query(server, monkeypatch):
+    monkeypatch.setattr(server, "discover_table", DiscoverTable(synthetic_docs(600), server.discover_item))
+    monkeypatch.setattr(server, "DISCOVER_MIN_TITLES", 100)
+    monkeypatch.setattr(server, "DISCOVER_MIN_RESULTS", 20)
+
+    async def main():
+        async with StubUpstream() as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                local = await server.discover("movie", page=1, with_genres="28")
+                local_hits = stub.total_hits
+                narrow = await server.discover("movie", page=1, with_genres="28,12", year=2001)
+                unsupported = await server.discover("movie", page=1, sort_by="revenue.desc")
+                # Without TMDB the table answers whatever it can
+                monkeypatch.setattr(server, "TMDB_API_KEY", "")
+                offline = await server.discover("movie", page=1, sort_by="popularity.desc", with_genres="28,12", year=2001)
+                malformed = await server.discover("movie", page=1, with_genres="abc", with_watch_providers="netflix")
+            finally:
+                await server.close_http_clients()
+            return stub, local, local_hits, narrow, unsupported, offline, malformed
+
+    stub, local, local_hits, narrow, unsupported, offline, malformed = asyncio.run(main())
+    assert local_hits == 0 and local["total_results"] > 20 and len(local["results"]) == 20
+    assert local["results"][0]["poster_path"] is None and 28 in local["results"][0]["genre_ids"]
+    assert stub.hits["/discover/movie"] == 2
+    assert narrow["results"][0]["title"].startswith("Stub Title")
+    assert unsupported["results"][0]["title"].startswith("Stub Title")
+    assert 0 < offline["total_results"] < 20
+    assert malformed["results"] == [] and malformed["total_results"] == 0
+
+
+def test_discover_rejects_pages_before_the_first(server, monkeypatch):
+    monkeypatch.setattr(server, "discover_table", DiscoverTable(synthetic_docs(50), server.discover_item))
+    monkeypatch.setattr(server, "TMDB_API_KEY", "")
+
+    async def main():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return [(await http.get("/api/tmdb/discover/movie", params={"page": page})).status_code
+                    for page in (-3, 0, 1)]
+
+    assert asyncio.run(main()) == [422, 422, 200]
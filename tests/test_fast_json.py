@@ -0,0 +1,42 @@
+import asyncio
+import json
+
+import fastapi.routing
+import httpx
+
+from tests.stub_upstream import StubUpstream
+
+
+def test_hot_routes_skip_jsonable_encoder_and_compress(server, monkeypatch):
+    encoded = []
+    encoder = fastapi.routing.jsonable_encoder
+    monkeypatch.setattr(fastapi.routing, "jsonable_encoder", lambda *a, **k: encoded.append(1) or encoder(*a, **k))
+
+    async def main():
+        async with StubUpstream() as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            transport = httpx.ASGITransport(app=server.app)
+            try:
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                    compressed = await http.get("/api/tmdb/movie/popular", headers={"Accept-Encoding": "gzip"})
+                    plain = await http.get("/api/tmdb/movie/popular", headers={"Accept-Encoding": "identity"})
+                    small = await http.get("/api/", headers={"Accept-Encoding": "gzip"})
+                    expected = await server.get_popular_movies()
+            finally:
+                await server.close_http_clients()
+            return compressed, plain, small, expected
+
+    compressed, plain, small, expected = asyncio.run(main())
+    assert encoded == [1]  # only the non-catalog root route
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.json() == plain.json() == json.loads(server.FastJSONResponse(expected).body)
+    assert "content-encoding" not in plain.headers
+    assert int(plain.headers["content-length"]) >= server.COMPRESSION_MIN_SIZE
+    assert "content-encoding" not in small.headers
+
+
+def test_fast_json_falls_back_to_stdlib(server, monkeypatch):
+    payload = {"title": "Amélie", "vote_average": 7.9, "genres": [{"id": 35, "name": "Comedy"}]}
+    fast = server.FastJSONResponse(payload).body
+    monkeypatch.setattr(server, "orjson", None)
+    assert json.loads(server.FastJSONResponse(payload).body) == json.loads(fast) == payload
@@ -0,0 +1,28 @@
+import asyncio
+
+from tests.stub_upstream import StubUpstream
+
+
+def test_home_assembles_rows_and_caches_payload(server, monkeypatch):
+    async def main():
+        async with StubUpstream() as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                first = await server.get_home()
+                second = await server.get_home()
+            finally:
+                await server.close_http_clients()
+            return stub, first, second
+
+    stub, first, second = asyncio.run(main())
+    assert stub.total_hits == 5
+    assert second is first
+    assert first["hero"] == first["trending"][0]
+    assert first["popular_tv"][0]["media_type"] == "tv"
+
+
+def test_home_without_tmdb_is_not_cached(server, monkeypatch):
+    monkeypatch.setattr(server, "TMDB_API_KEY", "")
+    home = asyncio.run(server.get_home())
+    assert home["hero"] is None and home["trending"] == []
+    assert "home" not in server.cache
@@ -0,0 +1,40 @@
+def plan_stages(plan):
+    """Every stage name in an explain() query plan tree"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from plan_stages(value)
+
+
+HOT_QUERIES = [
+    ("users", {"id": "u1"}),
+    ("watchlists", {"id": "w1"}),
+    ("watchlists", {"user_id": "u1"}),
+    ("users", {"$or": [{"created_at": {"$gt": "2024"}}, {"created_at": "2024", "id": {"$gt": "u1"}}]}),
+    ("watchlist_items", {"watchlist_id": {"$in": ["w1", "w2"]}}),
+    ("watchlist_items", {"id": "i1", "watchlist_id": "w1"}),
+    ("watchlist_items", {"watchlist_id": "w1", "media_type": "movie", "tmdb_id": 550}),
+    ("watchlist_items", {"media_type": "movie", "tmdb_id": 550}),
+]
+
+
+def test_hot_queries_use_an_index(server, mongo):
+    async def main(db):
+        await server.create_indexes()
+        await server.create_indexes()  # idempotent
+        for name in ("users", "watchlists", "watchlist_items"):
+            await db[name].insert_one({"id": "seed", "user_id": "seed", "watchlist_id": "seed",
+                                       "media_type": "movie", "tmdb_id": 0})
+        plans = {}
+        for name, query in HOT_QUERIES:
+            explain = await db[name].find(query).explain()
+            plans[(name, str(query))] = set(plan_stages(explain["queryPlanner"]["winningPlan"]))
+        return plans
+
+    for query, stages in mongo(main).items():
+        assert "COLLSCAN" not in stages, query
+        assert any("IXSCAN" in stage for stage in stages), query
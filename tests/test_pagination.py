@@ -0,0 +1,40 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+from starlette.responses import Response
+
+
+def test_cursor_round_trip(server):
+    cursor = server.encode_cursor({"created_at": "2024-01-01T00:00:00+00:00", "id": "u1"})
+    assert server.cursor_query(cursor) == {"$or": [
+        {"created_at": {"$gt": "2024-01-01T00:00:00+00:00"}},
+        {"created_at": "2024-01-01T00:00:00+00:00", "id": {"$gt": "u1"}},
+    ]}
+    with pytest.raises(HTTPException) as exc:
+        server.cursor_query("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+def test_users_are_paged_by_cursor_and_streamed(server, mongo):
+    async def main(db):
+        await db.users.insert_many([
+            # Same created_at for the first three: the id breaks the tie
+            {"id": f"u{i}", "name": f"User {i}", "created_at": "2024-01-01" if i < 3 else f"2024-01-0{i}"}
+            for i in range(5)
+        ])
+        pages, cursor = [], None
+        while True:
+            response = Response()
+            page = await server.get_users(response, limit=2, cursor=cursor)
+            pages.append([u["id"] for u in page])
+            cursor = response.headers.get(server.NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+        streamed = server.get_users(Response(), stream=True)
+        body = "".join([chunk async for chunk in (await streamed).body_iterator])
+        return pages, [json.loads(line)["id"] for line in body.splitlines()]
+
+    pages, streamed = mongo(main)
+    assert pages == [["u0", "u1"], ["u2", "u3"], ["u4"]]
+    assert streamed == ["u0", "u1", "u2", "u3", "u4"]
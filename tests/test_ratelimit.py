@@ -0,0 +1,66 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from ratelimit import Priority, PriorityRateLimiter, RateLimitExceeded, TokenBucket
+
+
+def test_queued_calls_are_granted_by_priority():
+    async def main():
+        limiter = PriorityRateLimiter(rate=100, burst=1, max_queue=10)
+        await limiter.acquire()  # drain the bucket
+        order = []
+
+        async def call(name, priority):
+            await limiter.acquire(priority)
+            order.append(name)
+
+        await asyncio.gather(
+            call("warm-1", Priority.BACKGROUND),
+            call("list", Priority.NORMAL),
+            call("warm-2", Priority.BACKGROUND),
+            call("detail", Priority.INTERACTIVE),
+        )
+        return order
+
+    assert asyncio.run(main()) == ["detail", "list", "warm-1", "warm-2"]
+
+
+def test_pause_resumes_with_one_token_not_a_burst():
+    bucket = TokenBucket(rate=10, burst=5)
+    bucket.pause(0.05)
+    assert bucket.take() > 0
+    time.sleep(0.06)
+    assert bucket.take() == 0.0
+    assert bucket.take() > 0.05  # the next one is a full refill interval away
+
+
+def test_full_queue_displaces_lower_priority_then_sheds():
+    async def main():
+        limiter = PriorityRateLimiter(rate=20, burst=1, max_queue=2)
+        await limiter.acquire()
+        warm = [asyncio.ensure_future(limiter.acquire(Priority.BACKGROUND)) for _ in range(2)]
+        await asyncio.sleep(0)
+        detail = asyncio.ensure_future(limiter.acquire(Priority.INTERACTIVE))
+        await asyncio.sleep(0)
+        with pytest.raises(RateLimitExceeded):
+            await limiter.acquire(Priority.BACKGROUND)
+        results = await asyncio.gather(*warm, detail, return_exceptions=True)
+        return limiter, results
+
+    limiter, results = asyncio.run(main())
+    assert isinstance(results[1], RateLimitExceeded)  # newest background waiter displaced
+    assert results[0] is None and results[2] is None
+    assert limiter.shed == 2
+
+
+def test_shed_request_surfaces_as_503(server, monkeypatch):
+    limiter = PriorityRateLimiter(rate=1, burst=0, max_queue=0)
+    monkeypatch.setattr(server, "tmdb_limiter", limiter)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(server.tmdb_request("/movie/popular"))
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
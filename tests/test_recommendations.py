@@ -0,0 +1,97 @@
+import asyncio
+
+import numpy as np
+
+from recommend import feature_vector, score_candidates, top
+from tests.stub_upstream import StubUpstream
+
+
+def test_scores_blend_profile_similarity_and_cooccurrence():
+    seeds = [feature_vector([28, 878], [9], [1]), feature_vector([35])]
+    candidates = [
+        feature_vector([28, 878], [9]),  # close to the watched seed
+        feature_vector([35]),  # matches the planned seed only
+        feature_vector([99]),  # nothing in common
+        {},  # no features, co-occurrence only
+    ]
+    scores = score_candidates(seeds, [1.0, 0.4], candidates, [0, 0, 0, 4], content_weight=0.7)
+    assert scores[0] > scores[1] > 0 and scores[2] == 0
+    assert np.isclose(scores[3], 0.3)
+    assert top(scores, 2) == [0, 3] and top(scores, 10) == [0, 3, 1, 2]
+    # Group weights don't depend on how many features a title has
+    many = feature_vector([1], list(range(50)))
+    assert np.isclose(sum(v * v for k, v in many.items() if k.startswith("k")), 0.8 ** 2)
+
+
+def detail_handler(path, query):
+    tmdb_id = int(path.rsplit("/", 1)[1])
+    recommendations = {
+        1: [{"id": 10, "title": "Sci-fi pick", "genre_ids": [878]}, {"id": 11, "title": "Comedy pick", "genre_ids": [35]}],
+        2: [{"id": 11, "title": "Comedy pick", "genre_ids": [35]}, {"id": 1, "title": "Owned", "genre_ids": [878]}],
+    }
+    return 200, {
+        "id": tmdb_id, "title": f"Title {tmdb_id}", "genres": [{"id": 878, "name": "Science Fiction"}],
+        "credits": {"cast": [{"id": 7, "name": "Lead"}]},
+        "recommendations": {"results": recommendations.get(tmdb_id, [])},
+    }
+
+
+def test_recommendations_rank_candidates_and_skip_owned_titles(server, monkeypatch):
+    async def user_titles(watchlist_ids):
+        return [{"key": ("movie", 1), "weight": 1.0, "added_at": ""},
+                {"key": ("movie", 2), "weight": 0.4, "added_at": ""}]
+
+    async def cooccurring_titles(seeds, own_watchlist_ids):
+        return [{"_id": {"media_type": "movie", "tmdb_id": 1}, "n": 5, "title": "Owned", "poster_path": None},
+                {"_id": {"media_type": "tv", "tmdb_id": 12}, "n": 3, "title": "Shared show", "poster_path": None}]
+
+    monkeypatch.setattr(server, "user_titles", user_titles)
+    monkeypatch.setattr(server, "cooccurring_titles", cooccurring_titles)
+
+    async def main():
+        async with StubUpstream(detail_handler) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                first = await server.build_recommendations(["w1"])
+                hits = stub.total_hits
+                again = await server.build_recommendations(["w1"])
+            finally:
+                await server.close_http_clients()
+            return stub, hits, first, again
+
+    stub, hits, first, again = asyncio.run(main())
+    # The comedy shares nothing with the seeds and nobody watched it alongside them
+    assert [(r["media_type"], r["id"]) for r in first] == [("movie", 10), ("tv", 12)]
+    assert first[0]["title"] == "Sci-fi pick" and first[0]["score"] > first[1]["score"]
+    # Per-title profiles are cached, so recomputing needs no upstream calls
+    assert hits == 2 and stub.total_hits == 2 and again == first
+
+
+def test_recommendations_are_cached_per_watchlist_revision(server, mongo, monkeypatch):
+    calls = []
+    build = server.build_recommendations
+    monkeypatch.setattr(server, "build_recommendations", lambda ids: calls.append(ids) or build(ids))
+    monkeypatch.setattr(server, "TMDB_API_KEY", "")
+
+    def item(tmdb_id, status="watched"):
+        return server.WatchlistItemCreate(tmdb_id=tmdb_id, media_type="movie", title=f"Title {tmdb_id}", status=status)
+
+    async def main(db):
+        await server.create_indexes()
+        me = await server.create_user(server.UserCreate(name="Me"))
+        other = await server.create_user(server.UserCreate(name="Other"))
+        mine = await server.create_watchlist(server.WatchlistCreate(user_id=me.id, name="Mine"))
+        theirs = await server.create_watchlist(server.WatchlistCreate(user_id=other.id, name="Theirs"))
+        await server.add_to_watchlist(mine.id, item(1))
+        for tmdb_id in (1, 2, 3):
+            await server.add_to_watchlist(theirs.id, item(tmdb_id))
+        first = await server.get_recommendations(me.id, limit=20)
+        cached = await server.get_recommendations(me.id, limit=20)
+        await server.add_to_watchlist(mine.id, item(2, "plan_to_watch"))
+        changed = await server.get_recommendations(me.id, limit=20)
+        return first, cached, changed
+
+    first, cached, changed = mongo(main)
+    assert sorted(r["id"] for r in first["results"]) == [2, 3]
+    assert cached == first and len(calls) == 2
+    assert [r["id"] for r in changed["results"]] == [3]
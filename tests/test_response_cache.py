@@ -0,0 +1,103 @@
+import asyncio
+
+from tests.stub_upstream import StubUpstream
+from tests.test_batch import handler as detail_handler
+
+
+def test_warm_list_hit_does_no_per_item_work(server, monkeypatch):
+    normalized = []
+    normalize = server.normalize_media_item
+    monkeypatch.setattr(server, "normalize_media_item", lambda *a: normalized.append(1) or normalize(*a))
+
+    async def main():
+        async with StubUpstream() as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                first = await server.get_popular_movies()
+                cold = len(normalized)
+                second = await server.get_popular_movies()
+            finally:
+                await server.close_http_clients()
+            return first, cold, second
+
+    first, cold, second = asyncio.run(main())
+    assert cold == 20 and len(normalized) == cold
+    assert second is first
+    assert first["results"][0]["poster_path"].startswith(server.IMAGE_BASE)
+    # Only the normalized page is cached, not the raw TMDB payload
+    assert list(server.cache._entries) == ['popular_movies_/movie/popular_{"page": 1}']
+
+
+def test_detail_route_and_batch_share_the_cached_detail_response(server, monkeypatch):
+    async def main():
+        async with StubUpstream(detail_handler) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                details = await server.get_movie_details(1)
+                again = await server.get_movie_details(1)
+                batch = await server.get_titles_batch(
+                    server.TitleBatchRequest(items=[{"media_type": "movie", "tmdb_id": 1}])
+                )
+            finally:
+                await server.close_http_clients()
+            return stub, details, again, batch
+
+    stub, details, again, batch = asyncio.run(main())
+    assert stub.total_hits == 1
+    assert again == details
+    assert details["streaming"]["flatrate"] == [{"provider_name": "Netflix"}]
+    assert batch["results"][0]["streaming"] == ["Netflix"]
+    assert batch["results"][0]["runtime"] == 120
+
+
+def region_handler(path, query):
+    status, payload = detail_handler(path, query)
+    if path == "/movie/1":
+        payload["watch/providers"]["results"]["GB"] = {"rent": [{"provider_name": "Sky Store"}]}
+    return status, payload
+
+
+def test_watch_region_is_picked_from_the_cached_detail_response(server, monkeypatch):
+    async def main():
+        async with StubUpstream(region_handler) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                us = await server.get_movie_details(1)
+                gb = await server.get_movie_details(1, watch_region="gb")
+                nowhere = await server.get_movie_details(1, watch_region="XX")
+            finally:
+                await server.close_http_clients()
+            return stub, us, gb, nowhere
+
+    stub, us, gb, nowhere = asyncio.run(main())
+    assert stub.total_hits == 1
+    assert us["streaming"]["flatrate"] == [{"provider_name": "Netflix"}]
+    assert gb["streaming"] == {"flatrate": [], "rent": [{"provider_name": "Sky Store"}], "buy": []}
+    assert nowhere["streaming"] == server.NO_PROVIDERS
+    assert "watch_providers" not in us
+
+
+def provider_handler(path, query):
+    netflix = {"provider_id": 8, "provider_name": "Netflix", "logo_path": "/n.jpg"}
+    if path == "/watch/providers/movie":
+        return 200, {"results": [netflix, {"provider_id": 2, "provider_name": "Apple TV", "logo_path": None}]}
+    if path == "/watch/providers/tv":
+        return 200, {"results": [netflix]}
+    return 404, {}
+
+
+def test_watch_providers_are_merged_once_and_cached(server, monkeypatch):
+    async def main():
+        async with StubUpstream(provider_handler) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                first = await server.get_watch_providers("GB")
+                second = await server.get_watch_providers("gb")  # same list, same cache entry
+            finally:
+                await server.close_http_clients()
+            return stub, first, second
+
+    stub, first, second = asyncio.run(main())
+    assert stub.total_hits == 2 and second is first
+    assert [p["provider_name"] for p in first["providers"]] == ["Netflix", "Apple TV"]
+    assert list(server.cache._entries) == ["watch_providers_GB"]
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+
+from cache import SingleFlight
+from tests.stub_upstream import StubUpstream
+
+
+def test_concurrent_misses_hit_upstream_once(server, monkeypatch):
+    async def main():
+        async with StubUpstream(latency=0.05) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                results = await asyncio.gather(
+                    *(server.tmdb_request("/movie/550") for _ in range(300))
+                )
+            finally:
+                await server.close_http_clients()
+            return stub, results
+
+    stub, results = asyncio.run(main())
+    assert stub.total_hits == 1
+    assert all(r is results[0] for r in results)
+    assert len(server.inflight) == 0
+
+
+def test_upstream_error_reaches_every_waiter(server, monkeypatch):
+    def failing(path, query):
+        return 500, {"status_message": "boom"}
+
+    async def main():
+        async with StubUpstream(failing, latency=0.02) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            monkeypatch.setattr(server, "OMDB_BASE_URL", stub.base_url + "/")
+            try:
+                results = await asyncio.gather(
+                    *(server.omdb_request("tt0137523") for _ in range(50)),
+                    *(server.tmdb_request("/movie/550") for _ in range(50)),
+                )
+            finally:
+                await server.close_http_clients()
+            return stub, results
+
+    stub, results = asyncio.run(main())
+    assert results == [None] * 100
+    assert stub.hits == {"/": 1, "/movie/550": 1}
+    assert len(server.cache) == 0
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    async def main():
+        flight = SingleFlight()
+        calls = 0
+
+        async def load():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.02)
+            return "value"
+
+        first = asyncio.ensure_future(flight.do("k", load))
+        second = asyncio.ensure_future(flight.do("k", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "value"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return calls
+
+    assert asyncio.run(main()) == 1
+
+
+def test_last_cancelled_waiter_cancels_call():
+    async def main():
+        flight = SingleFlight()
+        started = asyncio.Event()
+
+        async def load():
+            started.set()
+            await asyncio.sleep(10)
+
+        waiter = asyncio.ensure_future(flight.do("k", load))
+        await started.wait()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert len(flight) == 0
+
+        async def fresh():
+            return "fresh"
+
+        # A new caller starts a fresh call instead of joining the cancelled one
+        return await flight.do("k", fresh)
+
+    assert asyncio.run(main()) == "fresh"
@@ -0,0 +1,60 @@
+import asyncio
+
+from tests.stub_upstream import StubUpstream, default_handler
+
+KEY = 'tmdb_/movie/popular_{"page": 1}'
+
+
+def age_entry(server, seconds: float):
+    server.cache.lookup(KEY).ts -= seconds
+
+
+def test_stale_entry_is_served_while_refreshing(server, monkeypatch):
+    async def main():
+        async with StubUpstream(latency=0.02) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                first = await server.tmdb_request("/movie/popular", {"page": 1})
+                age_entry(server, server.CACHE_TTL_DEFAULT + 1)
+
+                stale = await server.tmdb_request("/movie/popular", {"page": 1})
+                assert stale is first
+                assert stub.total_hits == 1  # returned without waiting on upstream
+
+                await asyncio.gather(*server.refresh_tasks)
+                refreshed = await server.tmdb_request("/movie/popular", {"page": 1})
+            finally:
+                await server.close_http_clients()
+            return stub, first, refreshed
+
+    stub, first, refreshed = asyncio.run(main())
+    assert stub.total_hits == 2
+    assert refreshed is not first and server.cache.lookup(KEY).fresh()
+
+
+def test_stale_entry_is_served_when_upstream_fails(server, monkeypatch):
+    healthy = True
+
+    def handler(path, query):
+        return default_handler(path, query) if healthy else (503, {})
+
+    async def main():
+        nonlocal healthy
+        async with StubUpstream(handler) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                first = await server.tmdb_request("/movie/popular", {"page": 1})
+                healthy = False
+                # Past the revalidate window: the miss goes upstream and fails
+                age_entry(server, server.CACHE_TTL_DEFAULT + server.CACHE_STALE_WHILE_REVALIDATE + 1)
+                fallback = await server.tmdb_request("/movie/popular", {"page": 1})
+                # Past the error grace period there is nothing left to serve
+                age_entry(server, server.CACHE_STALE_IF_ERROR)
+                gone = await server.tmdb_request("/movie/popular", {"page": 1})
+            finally:
+                await server.close_http_clients()
+            return first, fallback, gone
+
+    first, fallback, gone = asyncio.run(main())
+    assert fallback is first
+    assert gone is None
@@ -0,0 +1,111 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+
+from suggest import SuggestIndex
+from tests.stub_upstream import StubUpstream
+
+
+def titles(results):
+    return [r["title"] for r in results]
+
+
+def test_prefix_matches_ranked_by_popularity():
+    index = SuggestIndex()
+    index.add("movie", 1, "The Dark Knight", popularity=90.0, release_date="2008-07-16")
+    index.add("movie", 2, "Dark City", popularity=20.0)
+    index.add("tv", 3, "Dark", popularity=50.0)
+    index.add("movie", 4, "Amélie", "Le Fabuleux Destin d'Amélie Poulain", popularity=30.0)
+    index.add("movie", 5, "Knight and Day", popularity=10.0)
+
+    assert titles(index.suggest("dar")) == ["The Dark Knight", "Dark", "Dark City"]
+    assert titles(index.suggest("dark kn")) == ["The Dark Knight"]
+    assert titles(index.suggest("DARK", media_type="tv")) == ["Dark"]
+    assert titles(index.suggest("ame")) == titles(index.suggest("fabuleux")) == ["Amélie"]
+    assert titles(index.suggest("d", limit=2)) == ["The Dark Knight", "Dark"]
+    assert index.suggest("dark kn")[0]["year"] == "2008"
+    assert index.suggest("zzz") == [] and index.suggest("  ") == []
+
+
+def test_updates_reorder_and_limits_hold():
+    index = SuggestIndex(max_titles=3, bucket_size=2)
+    index.add("movie", 1, "Star Wars", popularity=10.0)
+    index.add("movie", 2, "Star Trek", popularity=20.0)
+    index.add("movie", 3, "Stardust", popularity=5.0)
+    # Stardust is the least popular "star" title and falls out of the capped bucket
+    assert titles(index.suggest("star")) == ["Star Trek", "Star Wars"]
+    assert titles(index.suggest("stard")) == ["Stardust"]
+
+    index.add("movie", 1, "Star Wars", popularity=30.0)
+    assert titles(index.suggest("star")) == ["Star Wars", "Star Trek"]
+    # A watchlist item without a popularity doesn't overwrite the known one
+    index.add("movie", 1, "Star Wars")
+    assert index.suggest("wars")[0]["popularity"] == 30.0
+
+    index.add("movie", 4, "Starship Troopers", popularity=99.0)
+    assert len(index) == 3 and index.stats()["skipped"] == 1
+
+
+def test_titles_seen_by_list_routes_are_suggested_without_upstream_calls(server, monkeypatch):
+    monkeypatch.setattr(server, "suggest_index", SuggestIndex())
+
+    async def main():
+        async with StubUpstream() as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            transport = httpx.ASGITransport(app=server.app)
+            try:
+                await server.get_popular_movies()
+                hits = stub.total_hits
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                    top = await http.get("/api/search/suggest", params={"q": "stub title", "limit": 3})
+                    one = await http.get("/api/search/suggest", params={"q": "stub 1-15"})
+            finally:
+                await server.close_http_clients()
+            return stub, hits, top, one
+
+    stub, hits, top, one = asyncio.run(main())
+    assert stub.total_hits == hits == 1
+    # Stub popularity falls with the position on the page
+    assert [r["id"] for r in top.json()["results"]] == [100, 101, 102]
+    assert [r["id"] for r in one.json()["results"]] == [115]
+    assert top.json()["results"][0]["poster_path"].startswith(server.IMAGE_BASE)
+
+
+class NoItems:
+    def find(self, query, projection):
+        async def empty():
+            return
+            yield
+
+        return empty()
+
+
+def test_seeding_yields_to_the_event_loop(server, monkeypatch):
+    monkeypatch.setattr(server, "suggest_index", SuggestIndex())
+    monkeypatch.setattr(server, "db", SimpleNamespace(watchlist_items=NoItems()))
+    monkeypatch.setattr(server, "CATALOG_EXPORT_DIR", "")
+    server.cache.set("page", {"results": [
+        server.normalize_media_item({"id": i, "title": f"Title {i}", "popularity": 1.0}, "movie") for i in range(300)
+    ]}, "lists")
+
+    async def main():
+        ticks = 0
+        done = asyncio.Event()
+
+        async def ticker():
+            nonlocal ticks
+            while not done.is_set():
+                ticks += 1
+                await asyncio.sleep(0)
+
+        task = asyncio.create_task(ticker())
+        await asyncio.sleep(0)
+        await server.seed_suggest_index()
+        done.set()
+        await task
+        return ticks
+
+    ticks = asyncio.run(main())
+    assert len(server.suggest_index) == 300
+    assert server.SUGGEST_SEED_CHUNK <= 100 and ticks >= 300 // server.SUGGEST_SEED_CHUNK
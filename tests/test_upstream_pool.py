@@ -0,0 +1,33 @@
+import asyncio
+
+from tests.stub_upstream import StubUpstream
+
+
+def test_cache_misses_reuse_pooled_connection(server, monkeypatch):
+    async def main():
+        async with StubUpstream() as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                for page in range(1, 6):
+                    data = await server.tmdb_request("/movie/popular", {"page": page})
+                    assert data["page"] == page
+            finally:
+                await server.close_http_clients()
+            return stub
+
+    stub = asyncio.run(main())
+    assert stub.total_hits == 5
+    assert stub.connections == 1
+
+
+def test_clients_are_per_upstream_and_recreated_after_close(server):
+    async def main():
+        tmdb = server.get_http_client("tmdb")
+        assert server.get_http_client("tmdb") is tmdb
+        assert server.get_http_client("omdb") is not tmdb
+        await server.close_http_clients()
+        assert tmdb.is_closed
+        assert server.get_http_client("tmdb") is not tmdb
+        await server.close_http_clients()
+
+    asyncio.run(main())
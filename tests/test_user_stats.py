@@ -0,0 +1,123 @@
+import asyncio
+from types import SimpleNamespace
+
+from tests.stub_upstream import StubUpstream
+
+
+class FakeItems:
+    """Answers the stats aggregation with canned facets"""
+
+    def __init__(self, facets):
+        self.facets = facets
+        self.pipelines = []
+
+    def aggregate(self, pipeline):
+        self.pipelines.append(pipeline)
+        facets = self.facets
+
+        class Cursor:
+            async def to_list(self, length):
+                return [facets]
+
+        return Cursor()
+
+
+class FakeCatalog:
+    def __init__(self, docs):
+        self.docs = docs
+
+    async def find_titles(self, titles, fields):
+        return {key: self.docs[key] for key in titles if key in self.docs}
+
+
+def detail_handler(path, query):
+    if path == "/movie/1":
+        return 200, {"id": 1, "title": "Cached", "runtime": 100, "genres": [{"id": 878, "name": "Science Fiction"}]}
+    if path == "/tv/2":
+        return 200, {"id": 2, "name": "Show", "episode_run_time": [30], "number_of_episodes": 10,
+                     "genres": [{"id": 10765, "name": "Sci-Fi & Fantasy"}]}
+    return 404, {}
+
+
+def title(media_type, tmdb_id, watched):
+    return {"_id": {"media_type": media_type, "tmdb_id": tmdb_id}, "watched": watched}
+
+
+def test_stats_count_items_and_enrich_from_cached_data(server, monkeypatch):
+    items = FakeItems({
+        "items": [
+            {"_id": {"status": "watched", "media_type": "movie"}, "n": 3},
+            {"_id": {"status": "watched", "media_type": "tv"}, "n": 1},
+            {"_id": {"status": "plan_to_watch", "media_type": "movie"}, "n": 2},
+        ],
+        "titles": [title("movie", 1, True), title("tv", 2, True), title("movie", 3, True),
+                   title("movie", 4, False), title("movie", 5, True)],
+    })
+    monkeypatch.setattr(server, "db", SimpleNamespace(watchlist_items=items))
+    monkeypatch.setattr(server, "CATALOG_EXPORT_DIR", "/exports")
+    monkeypatch.setattr(server, "catalog", FakeCatalog({
+        ("movie", 1): {"id": 1, "genre_ids": [18], "runtime": 1},  # the cached details win
+        ("movie", 3): {"id": 3, "genre_ids": [878, 18], "runtime": 90},
+        ("movie", 4): {"id": 4, "genre_ids": [35], "runtime": 120},  # not watched yet
+    }))
+
+    async def main():
+        async with StubUpstream(detail_handler) as stub:
+            monkeypatch.setattr(server, "TMDB_BASE_URL", stub.base_url)
+            try:
+                # Titles whose detail pages were opened are in the cache
+                await server.tmdb_details("movie", 1)
+                await server.tmdb_details("tv", 2)
+                hits = stub.total_hits
+                stats = await server.build_user_stats(["w1", "w2"])
+            finally:
+                await server.close_http_clients()
+        return stub, hits, stats
+
+    stub, hits, stats = asyncio.run(main())
+    assert stub.total_hits == hits  # stats never call TMDB
+    assert items.pipelines[0][0] == {"$match": {"watchlist_id": {"$in": ["w1", "w2"]}}}
+    assert stats["items"] == 6 and stats["titles"] == 5
+    assert stats["by_status"] == {"watched": 4, "plan_to_watch": 2}
+    assert stats["by_media_type"] == {"movie": 5, "tv": 1}
+    assert stats["genres"] == [
+        {"id": 878, "name": "Science Fiction", "count": 2},
+        {"id": 18, "name": "Drama", "count": 1},
+        {"id": 35, "name": "Comedy", "count": 1},
+        {"id": 10765, "name": "Sci-Fi & Fantasy", "count": 1},
+    ]
+    assert stats["watch_time_minutes"] == 100 + 30 * 10 + 90
+    assert stats["coverage"] == {"titles": 4, "watched": 4, "watched_with_runtime": 3}
+
+
+def test_stats_endpoint_is_cached_per_watchlist_revision(server, mongo, monkeypatch):
+    calls = []
+    build = server.build_user_stats
+    monkeypatch.setattr(server, "build_user_stats", lambda ids: calls.append(ids) or build(ids))
+
+    def item(tmdb_id, media_type="movie", status="watched"):
+        return server.WatchlistItemCreate(tmdb_id=tmdb_id, media_type=media_type, title=f"Title {tmdb_id}",
+                                          status=status)
+
+    async def main(db):
+        await server.create_indexes()
+        me = await server.create_user(server.UserCreate(name="Me"))
+        films = await server.create_watchlist(server.WatchlistCreate(user_id=me.id, name="Films"))
+        shows = await server.create_watchlist(server.WatchlistCreate(user_id=me.id, name="Shows"))
+        await server.add_to_watchlist(films.id, item(1))
+        await server.add_to_watchlist(films.id, item(2, status="plan_to_watch"))
+        await server.add_to_watchlist(shows.id, item(1))  # the same film in a second list
+        await server.add_to_watchlist(shows.id, item(7, "tv", "watching"))
+        first = await server.get_user_stats(me.id)
+        cached = await server.get_user_stats(me.id)
+        await server.add_to_watchlist(shows.id, item(8, "tv"))
+        changed = await server.get_user_stats(me.id)
+        return first, cached, changed
+
+    first, cached, changed = mongo(main)
+    assert first["items"] == 4 and first["titles"] == 3
+    assert first["by_status"] == {"watched": 2, "plan_to_watch": 1, "watching": 1}
+    assert first["by_media_type"] == {"movie": 3, "tv": 1}
+    assert first["coverage"] == {"titles": 0, "watched": 1, "watched_with_runtime": 0}
+    assert cached == first and len(calls) == 2
+    assert changed["by_media_type"] == {"movie": 3, "tv": 2}
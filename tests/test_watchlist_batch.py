@@ -0,0 +1,74 @@
+from tests.test_watchlist_items import item
+
+
+def test_batch_applies_mixed_operations(server, mongo):
+    async def main(db):
+        await server.create_indexes()
+        source = await server.create_watchlist(server.WatchlistCreate(user_id="u1", name="Queue"))
+        target = await server.create_watchlist(server.WatchlistCreate(user_id="u1", name="Done"))
+        other_user = await server.create_watchlist(server.WatchlistCreate(user_id="u2", name="Theirs"))
+        a = await server.add_to_watchlist(source.id, server.WatchlistItemCreate(**item(1)))
+        b = await server.add_to_watchlist(source.id, server.WatchlistItemCreate(**item(2)))
+        c = await server.add_to_watchlist(source.id, server.WatchlistItemCreate(**item(3)))
+
+        batch = server.WatchlistBatchRequest(ordered=False, operations=[
+            {"op": "add", "item": item(4)},
+            {"op": "add", "item": item(1)},  # duplicate
+            {"op": "update", "item_id": a.id, "status": "watching"},
+            {"op": "move", "item_id": b.id, "watchlist_id": target.id, "status": "watched"},
+            {"op": "move", "item_id": c.id, "watchlist_id": other_user.id},
+            {"op": "remove", "item_id": c.id},
+            {"op": "remove", "item_id": "missing"},
+        ])
+        result = await server.batch_update_watchlist(source.id, batch)
+        lists = {w["name"]: w for w in await server.get_watchlists(server.Response(), user_id="u1", limit=100, cursor=None)}
+        return result["results"], lists
+
+    results, lists = mongo(main)
+    assert [r["status"] for r in results] == ["ok", "error", "ok", "ok", "error", "ok", "error"]
+    assert results[1]["error"] == "Item already in watchlist"
+    assert results[4]["error"] == "Target watchlist not found"
+    assert sorted(i["tmdb_id"] for i in lists["Queue"]["items"]) == [1, 4]
+    assert [(i["tmdb_id"], i["status"]) for i in lists["Done"]["items"]] == [(2, "watched")]
+
+
+def test_ordered_batch_stops_at_first_error(server, mongo):
+    async def main(db):
+        await server.create_indexes()
+        watchlist = await server.create_watchlist(server.WatchlistCreate(user_id="u1", name="Queue"))
+        batch = server.WatchlistBatchRequest(operations=[
+            {"op": "add", "item": item(1)},
+            {"op": "add", "item": item(1)},
+            {"op": "add", "item": item(2)},
+        ])
+        result = await server.batch_update_watchlist(watchlist.id, batch)
+        return result["results"], await server.get_watchlist(watchlist.id)
+
+    results, watchlist = mongo(main)
+    assert [r["status"] for r in results] == ["ok", "error", "skipped"]
+    assert [i["tmdb_id"] for i in watchlist["items"]] == [1]
+
+
+def test_operations_see_earlier_ones_in_the_same_batch(server, mongo):
+    async def main(db):
+        await server.create_indexes()
+        source = await server.create_watchlist(server.WatchlistCreate(user_id="u1", name="Queue"))
+        target = await server.create_watchlist(server.WatchlistCreate(user_id="u1", name="Done"))
+        a = await server.add_to_watchlist(source.id, server.WatchlistItemCreate(**item(1)))
+        b = await server.add_to_watchlist(source.id, server.WatchlistItemCreate(**item(2)))
+
+        batch = server.WatchlistBatchRequest(ordered=False, operations=[
+            {"op": "remove", "item_id": a.id},
+            {"op": "move", "item_id": a.id, "watchlist_id": target.id},  # already removed
+            {"op": "move", "item_id": b.id, "watchlist_id": source.id},  # same list
+            {"op": "move", "item_id": b.id, "watchlist_id": target.id},
+            {"op": "update", "item_id": b.id, "status": "watched"},  # moved away
+        ])
+        result = await server.batch_update_watchlist(source.id, batch)
+        return result["results"], await server.get_watchlist(source.id), await server.get_watchlist(target.id)
+
+    results, source, target = mongo(main)
+    assert [r["status"] for r in results] == ["ok", "error", "error", "ok", "error"]
+    assert results[1]["error"] == results[4]["error"] == "Item not found"
+    assert results[2]["error"] == "Item is already in this watchlist"
+    assert source["items"] == [] and [i["tmdb_id"] for i in target["items"]] == [2]
@@ -0,0 +1,45 @@
+import pytest
+from fastapi import HTTPException
+
+
+def item(tmdb_id, **extra):
+    return {"tmdb_id": tmdb_id, "media_type": "movie", "title": f"Title {tmdb_id}", **extra}
+
+
+def test_items_round_trip_and_duplicates_are_rejected(server, mongo):
+    async def main(db):
+        await server.create_indexes()
+        watchlist = await server.create_watchlist(server.WatchlistCreate(user_id="u1", name="Later"))
+        first = await server.add_to_watchlist(watchlist.id, server.WatchlistItemCreate(**item(1)))
+        await server.add_to_watchlist(watchlist.id, server.WatchlistItemCreate(**item(2)))
+        with pytest.raises(HTTPException) as exc:
+            await server.add_to_watchlist(watchlist.id, server.WatchlistItemCreate(**item(1)))
+        assert exc.value.status_code == 400
+
+        await server.update_watchlist_item(watchlist.id, first.id, server.WatchlistItemUpdate(status="watched"))
+        await server.remove_from_watchlist(watchlist.id, first.id)
+        return await server.get_watchlists(server.Response(), user_id="u1", limit=100, cursor=None)
+
+    (watchlist,) = mongo(main)
+    assert [i["tmdb_id"] for i in watchlist["items"]] == [2]
+
+
+def test_embedded_items_are_migrated_on_read(server, mongo):
+    embedded = [
+        {"id": "a", "added_at": "2024-01-01T00:00:00", "status": "watched", **item(1)},
+        {"id": "b", "added_at": "2024-01-02T00:00:00", "status": "plan_to_watch", **item(2)},
+    ]
+
+    async def main(db):
+        await server.create_indexes()
+        await db.watchlists.insert_one({"id": "w1", "user_id": "u1", "name": "Old", "items": embedded})
+        watchlist = await server.get_watchlist("w1")
+        # Mutations on a migrated item hit the new collection
+        await server.update_watchlist_item("w1", "b", server.WatchlistItemUpdate(status="watching"))
+        stored = await db.watchlists.find_one({"id": "w1"})
+        return watchlist, stored, await server.get_watchlist("w1")
+
+    watchlist, stored, reread = mongo(main)
+    assert [i["id"] for i in watchlist["items"]] == ["a", "b"]
+    assert stored["items"] == []
+    assert reread["items"][1]["status"] == "watching"